@@ -0,0 +1 @@
+"""Offline benchmarks (no network; external services replaced by fakes)."""
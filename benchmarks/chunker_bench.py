@@ -0,0 +1,110 @@
+"""
+Chunking throughput: RecursiveCharacterTextSplitter vs SpanChunker (compat / fast).
+
+Reports chunks/second and MB/second per splitter and checks that compat mode produced
+exactly the same chunks as LangChain.
+
+Run:
+  python -m benchmarks.chunker_bench                      # synthetic corpus
+  python -m benchmarks.chunker_bench --pdf data/test-rag-assignment.pdf --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any, Callable
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.stats import format_table
+from rag_pipeline.chunker import SpanChunker
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def synthetic_pages(n_pages: int = 200, seed: int = 0) -> list[str]:
+    """
+    PDF-like pages: short lines, paragraph breaks, occasional long unbroken tokens (URLs, tables).
+    """
+    rng = random.Random(seed)
+    vocab = [
+        "model", "token", "attention", "retrieval", "the", "of", "and", "prompt", "context", "layer",
+        "transformer", "embedding", "vector", "a", "in", "is", "for", "chain-of-thought", "RLHF", "2022",
+    ]
+    pages: list[str] = []
+    for _ in range(n_pages):
+        paras = []
+        for _ in range(rng.randint(3, 8)):
+            lines = []
+            for _ in range(rng.randint(2, 10)):
+                words = [rng.choice(vocab) for _ in range(rng.randint(5, 14))]
+                if rng.random() < 0.03:
+                    words.append("https://example.com/" + "x" * rng.randint(50, 900))
+                lines.append(" ".join(words))
+            paras.append("\n".join(lines))
+        pages.append("\n\n".join(paras))
+    return pages
+
+
+def _bench(name: str, split: Callable[[str], list[str]], pages: list[str], repeat: int) -> tuple[dict[str, Any], list[list[str]]]:
+    out: list[list[str]] = []
+    start = time.perf_counter()
+    for r in range(repeat):
+        res = [split(p) for p in pages]
+        if r == 0:
+            out = res
+    elapsed = time.perf_counter() - start
+    n_chunks = sum(len(c) for c in out) * repeat
+    n_bytes = sum(len(p.encode("utf-8")) for p in pages) * repeat
+    return (
+        {
+            "splitter": name,
+            "chunks": sum(len(c) for c in out),
+            "seconds": elapsed,
+            "chunks_per_s": n_chunks / elapsed if elapsed else 0.0,
+            "mb_per_s": n_bytes / elapsed / 1e6 if elapsed else 0.0,
+        },
+        out,
+    )
+
+
+def run(pages: list[str], chunk_size: int, chunk_overlap: int, repeat: int) -> list[dict[str, Any]]:
+    baseline = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=SEPARATORS)
+    compat = SpanChunker(chunk_size, chunk_overlap, SEPARATORS, mode="compat")
+    fast = SpanChunker(chunk_size, chunk_overlap, SEPARATORS, mode="fast")
+
+    base_row, base_out = _bench("RecursiveCharacterTextSplitter", baseline.split_text, pages, repeat)
+    compat_row, compat_out = _bench("SpanChunker(compat)", compat.split_text, pages, repeat)
+    fast_row, _ = _bench("SpanChunker(fast)", fast.split_text, pages, repeat)
+
+    compat_row["identical"] = compat_out == base_out
+    for row in (base_row, compat_row, fast_row):
+        row["speedup"] = row["chunks_per_s"] / base_row["chunks_per_s"] if base_row["chunks_per_s"] else 0.0
+    return [base_row, compat_row, fast_row]
+
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="Benchmark on the pages of this PDF instead of synthetic text")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic page count")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.pdf:
+        from rag_pipeline.loader import iter_pdf_pages
+
+        pages = [p.page_content for p in iter_pdf_pages(args.pdf)]
+    else:
+        pages = synthetic_pages(args.pages)
+
+    rows = run(pages, args.chunk_size, args.chunk_overlap, args.repeat)
+    print(format_table(rows, ["splitter", "chunks", "seconds", "chunks_per_s", "mb_per_s", "speedup", "identical"]))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
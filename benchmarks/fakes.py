@@ -0,0 +1,334 @@
+"""
+In-process stand-ins for every external service the agent talks to.
+
+- FakeChatModel        -> ChatOpenAI (router, location extraction, weather + RAG generation)
+- HashingEmbeddings    -> the embedding backend (deterministic hashed bag-of-words vectors)
+- LatencyQdrantClient  -> QdrantClient (real qdrant-client local mode, `:memory:`)
+- FakeOpenWeatherMap   -> OpenWeatherMapAPIWrapper
+
+Each fake takes a `LatencyModel` (distribution + failure rate) so benchmarks can model
+slow or flaky dependencies. All randomness is seeded, so runs are repeatable.
+
+Usage:
+  with install_fakes(FakeProfile.default()):
+      run_agent("What's the weather in Mumbai?")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+
+from rag_pipeline.embeddings import HashingBackend, hashed_vector
+
+
+class FakeServiceError(RuntimeError):
+    """Injected failure (see `LatencyModel.failure_rate`)."""
+
+
+@dataclass
+class LatencyModel:
+    """
+    Per-call latency distribution (milliseconds) plus an independent failure probability.
+
+    kind:
+      - "constant":  always `median_ms`
+      - "uniform":   uniform in [low_ms, high_ms]
+      - "lognormal": median `median_ms`, 95th percentile `p95_ms` (long right tail)
+    """
+
+    kind: str = "constant"
+    median_ms: float = 0.0
+    p95_ms: float = 0.0
+    low_ms: float = 0.0
+    high_ms: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            if self.kind == "uniform":
+                return self._rng.uniform(self.low_ms, self.high_ms)
+            if self.kind == "lognormal":
+                if self.median_ms <= 0:
+                    return 0.0
+                sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+                return self._rng.lognormvariate(math.log(self.median_ms), sigma)
+            return self.median_ms
+
+    def should_fail(self) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    def wait(self, what: str) -> None:
+        """
+        Sleep for one sampled latency, then maybe raise an injected failure.
+        """
+        delay = self.sample_ms()
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if self.should_fail():
+            raise FakeServiceError(f"injected failure: {what}")
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "LatencyModel":
+        """
+        Parse CLI specs:
+          "0"                      -> constant 0ms
+          "25"                     -> constant 25ms
+          "uniform:10:40"          -> uniform 10..40ms
+          "lognormal:300:1200"     -> median 300ms, p95 1200ms
+          any of the above + "@0.01" -> 1% failure rate
+        """
+        failure = 0.0
+        if "@" in spec:
+            spec, rate = spec.split("@", 1)
+            failure = float(rate)
+        parts = spec.split(":")
+        if parts[0] == "uniform":
+            return cls("uniform", low_ms=float(parts[1]), high_ms=float(parts[2]), failure_rate=failure, seed=seed)
+        if parts[0] == "lognormal":
+            return cls("lognormal", median_ms=float(parts[1]), p95_ms=float(parts[2]), failure_rate=failure, seed=seed)
+        return cls("constant", median_ms=float(parts[-1]), failure_rate=failure, seed=seed)
+
+
+@dataclass
+class FakeProfile:
+    chat: LatencyModel
+    embed: LatencyModel
+    qdrant: LatencyModel
+    owm: LatencyModel
+
+    @classmethod
+    def zero(cls) -> "FakeProfile":
+        return cls(LatencyModel(), LatencyModel(), LatencyModel(), LatencyModel())
+
+    @classmethod
+    def default(cls, seed: int = 7) -> "FakeProfile":
+        """
+        Rough shape of the hosted services (gpt-4o-mini, text-embedding-3-small, Qdrant Cloud, OWM).
+        """
+        return cls(
+            chat=LatencyModel("lognormal", median_ms=450, p95_ms=1500, seed=seed),
+            embed=LatencyModel("lognormal", median_ms=60, p95_ms=180, seed=seed + 1),
+            qdrant=LatencyModel("lognormal", median_ms=25, p95_ms=90, seed=seed + 2),
+            owm=LatencyModel("lognormal", median_ms=120, p95_ms=400, seed=seed + 3),
+        )
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(HashingBackend):
+    """
+    The hashing embedding backend with injected latency (stands in for the OpenAI API).
+    """
+
+    def __init__(self, dim: int = 1536, latency: LatencyModel | None = None, **_: Any):
+        super().__init__(dim=dim)
+        self.latency = latency or LatencyModel()
+
+    def embed_query(self, text: str) -> list[float]:
+        self.latency.wait("embed_query")
+        return super().embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.latency.wait("embed_documents")
+        return super().embed_documents(texts)
+
+
+_WEATHER_WORDS_RE = re.compile(r"\b(weather|temperature|rain|forecast|humidity|wind|umbrella)\b", re.IGNORECASE)
+
+
+class FakeChatModel(Runnable):
+    """
+    Drop-in for `ChatOpenAI`: works with `llm.invoke(messages)` and `prompt | llm | parser`.
+    Replies are chosen from the system prompt so every call site gets a well-formed answer.
+    """
+
+    def __init__(self, latency: LatencyModel | None = None, **kwargs: Any):
+        self.latency = latency or LatencyModel()
+        self.model = kwargs.get("model", "fake-chat")
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> AIMessage:
+        messages = input.to_messages() if hasattr(input, "to_messages") else list(input)
+        system = " ".join(str(m.content) for m in messages if getattr(m, "type", "") == "system")
+        human = " ".join(str(m.content) for m in messages if getattr(m, "type", "") == "human")
+
+        self.latency.wait("chat")
+        if "routing classifier" in system:
+            content = "weather" if _WEATHER_WORDS_RE.search(human) else "pdf"
+        elif "Extract the location" in system:
+            content = '{"location": null}'
+        else:
+            content = "Fake answer based on the provided context (page=1, chunk_ref=fake)."
+
+        prompt_tokens = len(_TOKEN_RE.findall(system + " " + human))
+        completion_tokens = len(_TOKEN_RE.findall(content))
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+
+class FakeOpenWeatherMap:
+    """
+    Drop-in for `OpenWeatherMapAPIWrapper` (only `.run(location)` is used).
+    """
+
+    def __init__(self, latency: LatencyModel | None = None, **_: Any):
+        self.latency = latency or LatencyModel()
+
+    def run(self, location: str) -> str:
+        self.latency.wait("owm")
+        return (
+            f"In {location}, the current weather is as follows:\n"
+            "Detailed status: scattered clouds\n"
+            "Wind speed: 3.1 m/s, direction: 250°\n"
+            "Humidity: 62%\n"
+            "Temperature: \n  - Current: 29.0°C\n  - High: 30.0°C\n  - Low: 27.5°C\n"
+        )
+
+
+class LatencyQdrantClient:
+    """
+    Wraps a real local-mode `QdrantClient` and injects latency before every read
+    (`search`, `query_points`, `scroll`, `retrieve`, ...: whichever the qdrant-client version
+    and the caller use). Local mode isn't documented as thread-safe, so every underlying call
+    is serialised (the injected latency, which dominates, still overlaps across threads).
+    """
+
+    READS = frozenset(
+        {"search", "search_batch", "query_points", "query_batch_points", "scroll", "retrieve", "count", "recommend"}
+    )
+
+    def __init__(self, client: Any, latency: LatencyModel | None = None):
+        self._client = client
+        self._lock = threading.Lock()
+        self.latency = latency or LatencyModel()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        delayed = name in self.READS
+
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            if delayed:
+                self.latency.wait(f"qdrant.{name}")
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return _call
+
+
+SAMPLE_CORPUS: list[tuple[int, str]] = [
+    (1, "Large language models are neural networks trained on large text corpora to predict the next token."),
+    (2, "The transformer architecture uses self-attention layers, feed-forward layers and residual connections."),
+    (3, "Retrieval-augmented generation (RAG) retrieves relevant documents and adds them to the prompt as context."),
+    (4, "Chain-of-thought prompting was demonstrated in 2022 and improves multi-step reasoning."),
+    (5, "System prompts set the behaviour, tone and constraints of the assistant for the whole conversation."),
+    (6, "Reinforcement learning from human feedback (RLHF) aligns model outputs with human preferences."),
+    (7, "Key limitations include hallucinations, outdated knowledge, context length limits and cost."),
+    (8, "Extensibility techniques include tool use, function calling, plugins and retrieval."),
+    (9, "GPT-4o is a multimodal model that accepts text, audio and image inputs."),
+    (10, "The main topic of the document is how large language models work and how to use them effectively."),
+]
+
+
+def build_memory_qdrant(
+    corpus: list[tuple[int, str]] | None = None,
+    embeddings: HashingEmbeddings | None = None,
+    collection_name: str | None = None,
+    vector_name: str | None = None,
+):
+    """
+    Create a local in-memory Qdrant collection shaped like the production one (named dense vector).
+    """
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    from rag_pipeline import retriever as retriever_mod
+
+    corpus = corpus or SAMPLE_CORPUS
+    embeddings = embeddings or HashingEmbeddings()
+    collection_name = collection_name or retriever_mod.COLLECTION_NAME
+    vector_name = vector_name or retriever_mod.VECTOR_NAME
+
+    client = QdrantClient(location=":memory:")
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config={vector_name: VectorParams(size=embeddings.dim, distance=Distance.COSINE)},
+    )
+    texts = [t for _, t in corpus]
+    vectors = [hashed_vector(t, embeddings.dim) for t in texts]
+    points = []
+    for (page, text), vector in zip(corpus, vectors):
+        chunk_ref = f"sample.pdf::p{page}::{hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]}"
+        points.append(
+            PointStruct(
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, chunk_ref)),
+                vector={vector_name: vector},
+                payload={"text": text, "page": page, "source": "sample.pdf", "chunk_ref": chunk_ref},
+            )
+        )
+    client.upsert(collection_name=collection_name, points=points)
+    return client
+
+
+@contextmanager
+def install_fakes(profile: FakeProfile | None = None) -> Iterator[FakeProfile]:
+    """
+    Patch every external client constructor used by the agent with a fake.
+    The in-memory Qdrant collection is built once and shared by all retrievers.
+    """
+    profile = profile or FakeProfile.zero()
+    qdrant = LatencyQdrantClient(build_memory_qdrant(), profile.qdrant)
+
+    def chat_factory(*args: Any, **kwargs: Any) -> FakeChatModel:
+        return FakeChatModel(profile.chat, **kwargs)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ, {"OPENWEATHER_API_KEY": os.getenv("OPENWEATHER_API_KEY") or "fake"}))
+        for target in (
+            "langgraph_pipeline.router.ChatOpenAI",
+            "openweather_pipeline.service.ChatOpenAI",
+            "openweather_pipeline.weather.ChatOpenAI",
+            "rag_pipeline.service.ChatOpenAI",
+        ):
+            stack.enter_context(mock.patch(target, chat_factory))
+        stack.enter_context(
+            mock.patch("rag_pipeline.retriever.get_embeddings", lambda *a, **k: HashingEmbeddings(latency=profile.embed))
+        )
+        stack.enter_context(mock.patch("rag_pipeline.retriever.QdrantClient", lambda *a, **k: qdrant))
+        stack.enter_context(
+            mock.patch(
+                "openweather_pipeline.weather.OpenWeatherMapAPIWrapper",
+                lambda *a, **k: FakeOpenWeatherMap(latency=profile.owm),
+            )
+        )
+        yield profile
@@ -0,0 +1,278 @@
+"""
+Open-loop load generator: replay a JSONL query log at a target arrival rate.
+
+Requests are *scheduled* from a Poisson process (exponential inter-arrival times) and
+dispatched regardless of whether earlier requests finished, so queueing delay shows up
+in latency instead of silently lowering the offered load (the closed-loop trap).
+
+Targets:
+  - in-process `run_agent` (default; add --fake to use the offline stand-ins from benchmarks.fakes)
+  - an HTTP endpoint (--url): POST {"query": ...} as JSON, any 2xx response counts as success;
+    the response's "route" field (if JSON) is used for the route mix.
+
+Stages ramp the offered rate, e.g. warm-up then step up until saturation:
+  --stage 30s@1 --stage 60s@2 --stage 60s@4 --stage 60s@8
+
+Run:
+  python -m benchmarks.loadgen --log queries.jsonl --stage 60s@2
+  python -m benchmarks.loadgen --log queries.jsonl --field query --fake --stage 20s@5 --stage 20s@20 --window 5
+  python -m benchmarks.loadgen --log queries.jsonl --url http://localhost:8000/agent --stage 120s@10 --json out.json
+
+Output: one row per reporting window (offered vs achieved rate, p50/p95/p99, error rate, route mix),
+plus a per-stage summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from benchmarks.stats import format_table, percentile
+
+_STAGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)(ms|s|m)?\s*@\s*(\d+(?:\.\d+)?)\s*$")
+
+
+@dataclass(frozen=True)
+class Stage:
+    duration_s: float
+    qps: float
+
+
+@dataclass
+class Sample:
+    scheduled_at: float  # seconds since run start
+    latency_s: float
+    ok: bool
+    route: str | None
+    stage: int
+    lag_s: float = 0.0  # dispatch delay vs schedule (should stay ~0; large values mean the generator saturated)
+
+
+@dataclass
+class LoadResult:
+    samples: list[Sample] = field(default_factory=list)
+    stages: list[Stage] = field(default_factory=list)
+
+
+def parse_stage(spec: str) -> Stage:
+    """
+    "60s@5" -> 60 seconds at 5 req/s. Units: ms, s (default), m.
+    """
+    m = _STAGE_RE.match(spec)
+    if not m:
+        raise ValueError(f"Bad stage spec {spec!r}; expected e.g. '60s@5'")
+    value, unit, qps = float(m.group(1)), m.group(2) or "s", float(m.group(3))
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0}[unit]
+    return Stage(duration_s=value * scale, qps=qps)
+
+
+def poisson_schedule(stages: list[Stage], seed: int = 0) -> list[tuple[float, int]]:
+    """
+    Arrival offsets (seconds from start) and the stage index each arrival belongs to.
+    """
+    rng = random.Random(seed)
+    out: list[tuple[float, int]] = []
+    stage_start = 0.0
+    for idx, st in enumerate(stages):
+        t = stage_start
+        end = stage_start + st.duration_s
+        if st.qps > 0:
+            while True:
+                t += rng.expovariate(st.qps)
+                if t >= end:
+                    break
+                out.append((t, idx))
+        stage_start = end
+    return out
+
+
+def load_query_log(path: str, field_name: str = "query") -> list[str]:
+    """
+    Read queries from JSONL. Falls back to "question"/"title" keys, or the raw line for plain text logs.
+    """
+    queries: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                queries.append(line)
+                continue
+            if isinstance(row, dict):
+                q = row.get(field_name) or row.get("question") or row.get("title")
+                if q:
+                    queries.append(str(q))
+            elif isinstance(row, str):
+                queries.append(row)
+    return queries
+
+
+def http_target(url: str, timeout_s: float = 60.0) -> Callable[[str], dict[str, Any]]:
+    import requests
+
+    session = requests.Session()
+
+    def call(query: str) -> dict[str, Any]:
+        resp = session.post(url, json={"query": query}, timeout=timeout_s)
+        resp.raise_for_status()
+        try:
+            body = resp.json()
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+    return call
+
+
+def run_load(
+    target: Callable[[str], dict[str, Any]],
+    queries: list[str],
+    stages: list[Stage],
+    seed: int = 0,
+    max_in_flight: int = 512,
+) -> LoadResult:
+    """
+    Dispatch requests on the Poisson schedule. `max_in_flight` bounds worker threads only;
+    once it is reached, new arrivals queue in the executor and that wait counts as latency.
+    """
+    if not queries:
+        raise ValueError("Query log is empty")
+
+    schedule = poisson_schedule(stages, seed=seed)
+    result = LoadResult(stages=list(stages))
+    lock = threading.Lock()
+    pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="loadgen")
+    start = time.perf_counter()
+
+    def fire(i: int, offset: float, stage_idx: int, lag: float) -> None:
+        query = queries[i % len(queries)]
+        t0 = start + offset  # latency measured from the *scheduled* arrival
+        ok, route = True, None
+        try:
+            out = target(query) or {}
+            route = out.get("route")
+        except Exception:
+            ok = False
+        sample = Sample(offset, time.perf_counter() - t0, ok, route, stage_idx, lag)
+        with lock:
+            result.samples.append(sample)
+
+    try:
+        for i, (offset, stage_idx) in enumerate(schedule):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lag = max(0.0, time.perf_counter() - (start + offset))
+            pool.submit(fire, i, offset, stage_idx, lag)
+    finally:
+        pool.shutdown(wait=True)
+    result.samples.sort(key=lambda s: s.scheduled_at)
+    return result
+
+
+def _row(samples: list[Sample], span_s: float, offered_qps: float) -> dict[str, Any]:
+    ok = [s.latency_s for s in samples if s.ok]
+    routes = Counter(s.route or "unknown" for s in samples if s.ok)
+    total = len(samples)
+    return {
+        "offered_qps": offered_qps,
+        "achieved_qps": (len(ok) / span_s) if span_s > 0 else 0.0,
+        "requests": total,
+        "error_rate": ((total - len(ok)) / total) if total else 0.0,
+        "p50_ms": percentile(ok, 50) * 1000,
+        "p95_ms": percentile(ok, 95) * 1000,
+        "p99_ms": percentile(ok, 99) * 1000,
+        "max_lag_ms": max((s.lag_s for s in samples), default=0.0) * 1000,
+        "routes": " ".join(f"{k}={v}" for k, v in sorted(routes.items())),
+    }
+
+
+def report_windows(result: LoadResult, window_s: float) -> list[dict[str, Any]]:
+    """
+    Time-series view: one row per `window_s` bucket of scheduled arrival time.
+    """
+    if not result.samples:
+        return []
+    bounds: list[tuple[float, float]] = []
+    t = 0.0
+    for st in result.stages:
+        bounds.append((t, t + st.duration_s))
+        t += st.duration_s
+
+    rows: list[dict[str, Any]] = []
+    n_windows = int(t // window_s) + (1 if t % window_s else 0)
+    for w in range(n_windows):
+        lo, hi = w * window_s, min((w + 1) * window_s, t)
+        in_window = [s for s in result.samples if lo <= s.scheduled_at < hi]
+        stage_idx = next((i for i, (a, b) in enumerate(bounds) if a <= lo < b), len(bounds) - 1)
+        row = _row(in_window, hi - lo, result.stages[stage_idx].qps)
+        rows.append({"t_s": f"{lo:.0f}-{hi:.0f}", "stage": stage_idx, **row})
+    return rows
+
+
+def report_stages(result: LoadResult) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for idx, st in enumerate(result.stages):
+        samples = [s for s in result.samples if s.stage == idx]
+        rows.append({"stage": idx, "duration_s": st.duration_s, **_row(samples, st.duration_s, st.qps)})
+    return rows
+
+
+_COLUMNS = ["offered_qps", "achieved_qps", "requests", "error_rate", "p50_ms", "p95_ms", "p99_ms", "max_lag_ms", "routes"]
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", required=True, help="JSONL query log")
+    parser.add_argument("--field", default="query", help="JSON key holding the query text")
+    parser.add_argument("--stage", action="append", required=True, help="DURATION@QPS, repeatable (e.g. 60s@5)")
+    parser.add_argument("--url", help="POST queries to this endpoint instead of calling run_agent in-process")
+    parser.add_argument("--fake", action="store_true", help="In-process run_agent against benchmarks.fakes")
+    parser.add_argument("--window", type=float, default=10.0, help="Reporting window in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    queries = load_query_log(args.log, args.field)
+    stages = [parse_stage(s) for s in args.stage]
+
+    if args.url:
+        result = run_load(http_target(args.url), queries, stages, seed=args.seed, max_in_flight=args.max_in_flight)
+    else:
+        from langgraph_pipeline.graph import run_agent
+
+        if args.fake:
+            from benchmarks.fakes import FakeProfile, install_fakes
+
+            with install_fakes(FakeProfile.default(seed=args.seed)):
+                result = run_load(run_agent, queries, stages, seed=args.seed, max_in_flight=args.max_in_flight)
+        else:
+            result = run_load(run_agent, queries, stages, seed=args.seed, max_in_flight=args.max_in_flight)
+
+    windows = report_windows(result, args.window)
+    per_stage = report_stages(result)
+    print(format_table(windows, ["t_s", "stage", *_COLUMNS]))
+    print()
+    print(format_table(per_stage, ["stage", "duration_s", *_COLUMNS]))
+
+    out = {"windows": windows, "stages": per_stage}
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    return out
+
+
+if __name__ == "__main__":
+    main()
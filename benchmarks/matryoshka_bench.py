@@ -0,0 +1,133 @@
+"""
+Matryoshka prefetch: recall vs latency of low-dim candidate search + full-vector rescoring.
+
+Compares exact full-dimension search against the two-stage search the retriever runs with
+QDRANT_PREFETCH_DIM (search the first `dim` components for top_k * factor candidates, then
+rescore them with the full vector). Brute force in NumPy, so the numbers isolate the cost
+that scales with dimension (CPU + memory bandwidth); HNSW on a Qdrant server cuts both
+stages further but keeps the ratio.
+
+Vectors come from a local index written by ingest (--index data/index, see
+rag_pipeline/local_index.py) or a synthetic corpus whose variance decays with dimension,
+like Matryoshka-trained embeddings. Queries are perturbed copies of corpus vectors.
+
+Run:
+  python -m benchmarks.matryoshka_bench
+  python -m benchmarks.matryoshka_bench --index data/index --dims 128,256,512 --factors 2,4,8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any
+
+import numpy as np
+
+from benchmarks.stats import format_table
+
+
+def _unit(m: np.ndarray) -> np.ndarray:
+    n = np.linalg.norm(m, axis=-1, keepdims=True)
+    n[n == 0] = 1.0
+    return (m / n).astype(np.float32)
+
+
+def synthetic_corpus(n: int = 20000, dim: int = 1536, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 32.0)  # early dims carry most of the signal
+    return _unit(rng.normal(size=(n, dim)).astype(np.float32) * scale)
+
+
+def make_queries(corpus: np.ndarray, n_queries: int, noise: float = 0.5, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    base = corpus[rng.integers(0, len(corpus), n_queries)]
+    spread = np.sqrt((corpus[:1000] ** 2).mean(axis=0))
+    return _unit(base + noise * rng.normal(size=base.shape).astype(np.float32) * spread)
+
+
+def _topk(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= len(scores):
+        return np.argsort(-scores)
+    idx = np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+    return idx[np.argsort(-scores[idx])]
+
+
+def exact_search(corpus: np.ndarray, q: np.ndarray, k: int) -> np.ndarray:
+    return _topk(corpus @ q, k)
+
+
+def two_stage_search(corpus: np.ndarray, low: np.ndarray, q: np.ndarray, k: int, candidates: int) -> np.ndarray:
+    cand = _topk(low @ _unit(q[: low.shape[1]]), candidates)
+    return cand[_topk(corpus[cand] @ q, k)]
+
+
+def run(corpus: np.ndarray, queries: np.ndarray, dims: list[int], factors: list[int], top_k: int) -> list[dict[str, Any]]:
+    full_dim = corpus.shape[1]
+    truth = [set(exact_search(corpus, q, top_k).tolist()) for q in queries]
+
+    start = time.perf_counter()
+    for q in queries:
+        exact_search(corpus, q, top_k)
+    full_ms = (time.perf_counter() - start) / len(queries) * 1000
+    rows: list[dict[str, Any]] = [
+        {"dim": full_dim, "factor": "-", "recall_at_k": 1.0, "ms_per_query": full_ms, "speedup": 1.0, "ram_ratio": 1.0}
+    ]
+
+    for dim in dims:
+        if dim >= full_dim:
+            continue
+        low = _unit(corpus[:, :dim])
+        for factor in factors:
+            hits = 0
+            start = time.perf_counter()
+            results = [two_stage_search(corpus, low, q, top_k, top_k * factor) for q in queries]
+            ms = (time.perf_counter() - start) / len(queries) * 1000
+            for res, want in zip(results, truth):
+                hits += len(want.intersection(res.tolist()))
+            rows.append(
+                {
+                    "dim": dim,
+                    "factor": factor,
+                    "recall_at_k": hits / (len(queries) * top_k),
+                    "ms_per_query": ms,
+                    "speedup": full_ms / ms if ms else 0.0,
+                    # vectors scanned per query / kept hot, relative to the full-dim index
+                    "ram_ratio": dim / full_dim,
+                }
+            )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", help="Local index directory (vectors.npy) instead of synthetic vectors")
+    parser.add_argument("--n", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dims", default="64,128,256,512")
+    parser.add_argument("--factors", default="2,4,8")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.index:
+        from rag_pipeline.local_index import open_index
+
+        corpus = np.asarray(open_index(args.index).vectors, dtype=np.float32)
+    else:
+        corpus = synthetic_corpus(args.n, seed=args.seed)
+    queries = make_queries(corpus, args.queries, seed=args.seed + 1)
+
+    rows = run(
+        corpus,
+        queries,
+        [int(d) for d in args.dims.split(",")],
+        [int(f) for f in args.factors.split(",")],
+        args.top_k,
+    )
+    print(format_table(rows, ["dim", "factor", "recall_at_k", "ms_per_query", "speedup", "ram_ratio"]))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
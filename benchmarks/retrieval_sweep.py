@@ -0,0 +1,312 @@
+"""
+Retrieval parameter sweep: recall@k / MRR / prompt tokens / latency per configuration.
+
+Re-chunks the PDF for every (chunk_size, chunk_overlap) pair, ingests each variant into its
+own local Qdrant collection (in-memory by default, or embedded on disk / a server URL), and
+replays a labelled question set across top_k, min-score and HNSW `ef` settings.
+
+Labels (JSONL, one per line):
+  {"question": "In which year was chain-of-thought prompting demonstrated?", "page": 4, "evidence": "2022"}
+
+A retrieved chunk counts as relevant when it is on `page` (if given) and contains `evidence`
+(whitespace/case-insensitive, if given). Chunk ids change with chunking, so labels are
+expressed in terms of page + text rather than chunk_ref.
+
+Run:
+  python -m benchmarks.retrieval_sweep --pdf data/test-rag-assignment.pdf --labels data/labels.jsonl
+  python -m benchmarks.retrieval_sweep ... --chunk-sizes 400,800,1200 --overlaps 0,100 \\
+      --top-k 2,4,8 --min-scores 0,0.25,0.35 --ef 16,64,128 --embeddings hash --json sweep.json
+
+Notes:
+  - Chunk and question embeddings are cached across configurations (each unique text is embedded once).
+  - Local-mode Qdrant always searches exactly; `ef` only has an effect with --qdrant-url.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import time
+import uuid
+import warnings
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from langchain_core.documents import Document
+
+from benchmarks.stats import format_table, percentile
+from rag_pipeline.retriever import filter_by_min_score
+from rag_pipeline.service import build_context
+
+_WS_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Label:
+    question: str
+    page: int | None = None
+    evidence: str | None = None
+
+
+@dataclass(frozen=True)
+class SweepGrid:
+    chunk_sizes: tuple[int, ...] = (400, 800, 1200)
+    chunk_overlaps: tuple[int, ...] = (0, 100)
+    top_ks: tuple[int, ...] = (2, 4, 8)
+    min_scores: tuple[float, ...] = (0.0, 0.25, 0.35)
+    hnsw_efs: tuple[int, ...] = (64,)
+
+
+def load_labels(path: str) -> list[Label]:
+    labels: list[Label] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            labels.append(Label(question=row["question"], page=row.get("page"), evidence=row.get("evidence")))
+    return labels
+
+
+def _norm(text: str) -> str:
+    return _WS_RE.sub(" ", text).strip().lower()
+
+
+def is_relevant(hit: dict[str, Any], label: Label) -> bool:
+    if label.page is not None and hit.get("page") != label.page:
+        return False
+    if label.evidence:
+        return _norm(label.evidence) in _norm(hit.get("text") or "")
+    return label.page is not None
+
+
+class EmbeddingCache:
+    """
+    Memoises embeddings by text so overlapping chunk variants and repeated questions are embedded once.
+    """
+
+    def __init__(self, embeddings: Any, batch_size: int = 128):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self._vectors: dict[str, list[float]] = {}
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        missing = list(dict.fromkeys(t for t in texts if t not in self._vectors))
+        for i in range(0, len(missing), self.batch_size):
+            batch = missing[i : i + self.batch_size]
+            for text, vec in zip(batch, self.embeddings.embed_documents(batch)):
+                self._vectors[text] = vec
+        return [self._vectors[t] for t in texts]
+
+
+def _token_counter(model: str) -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+        return lambda s: len(enc.encode(s))
+    except Exception:
+        # Offline fallback: rough word-piece estimate.
+        return lambda s: int(len(s.split()) * 1.3)
+
+
+def _ingest_variant(client: Any, name: str, vector_name: str, chunks: list[Document], vectors: list[list[float]]) -> None:
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config={vector_name: VectorParams(size=len(vectors[0]), distance=Distance.COSINE)},
+    )
+    points = [
+        PointStruct(
+            id=str(c.metadata.get("point_id") or uuid.uuid4()),
+            vector={vector_name: v},
+            payload={
+                "text": c.page_content,
+                "page": c.metadata.get("page"),
+                "source": c.metadata.get("source"),
+                "chunk_ref": c.metadata.get("chunk_ref"),
+            },
+        )
+        for c, v in zip(chunks, vectors)
+    ]
+    for i in range(0, len(points), 256):
+        client.upsert(collection_name=name, points=points[i : i + 256])
+
+
+def run_sweep(
+    chunk_fn: Callable[[int, int], list[Document]],
+    labels: list[Label],
+    grid: SweepGrid,
+    embeddings: Any,
+    client: Any = None,
+    vector_name: str = "text",
+    model: str = "gpt-4o-mini",
+) -> list[dict[str, Any]]:
+    """
+    Evaluate every grid point. `chunk_fn(chunk_size, chunk_overlap)` returns chunk Documents
+    (normally `load_and_chunk_pdf`). Returns one result row per configuration.
+    """
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import SearchParams
+
+    client = client or QdrantClient(location=":memory:")
+    cache = EmbeddingCache(embeddings)
+    count_tokens = _token_counter(model)
+    question_vectors = cache.embed_many([lb.question for lb in labels])
+
+    rows: list[dict[str, Any]] = []
+    # Local mode ignores `ef` (exact search) and warns on every call; the module docstring says so once.
+    # Silenced for the sweep only, not for the rest of the process.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Local mode performs exact", category=UserWarning)
+        for chunk_size, overlap in itertools.product(grid.chunk_sizes, grid.chunk_overlaps):
+            if overlap >= chunk_size:
+                continue
+            chunks = chunk_fn(chunk_size, overlap)
+            if not chunks:
+                continue
+            collection = f"sweep_cs{chunk_size}_ov{overlap}"
+            _ingest_variant(client, collection, vector_name, chunks, cache.embed_many([c.page_content for c in chunks]))
+
+            for ef, top_k in itertools.product(grid.hnsw_efs, grid.top_ks):
+                # One search per (question, ef, top_k); min-score variants are post-filters on the same hits.
+                per_question: list[tuple[list[dict[str, Any]], float]] = []
+                for vec in question_vectors:
+                    start = time.perf_counter()
+                    points = client.query_points(
+                        collection_name=collection,
+                        query=vec,
+                        using=vector_name,
+                        limit=top_k,
+                        search_params=SearchParams(hnsw_ef=ef),
+                    ).points
+                    elapsed = time.perf_counter() - start
+                    hits = [
+                        {
+                            "score": p.score,
+                            "text": (p.payload or {}).get("text", ""),
+                            "page": (p.payload or {}).get("page"),
+                            "chunk_ref": (p.payload or {}).get("chunk_ref"),
+                        }
+                        for p in points
+                    ]
+                    per_question.append((hits, elapsed))
+
+                latencies = [lat for _, lat in per_question]
+                for min_score in grid.min_scores:
+                    found = 0
+                    rr_total = 0.0
+                    tokens: list[int] = []
+                    empty = 0
+                    for label, (hits, _) in zip(labels, per_question):
+                        kept = filter_by_min_score(hits, min_score)
+                        if not kept:
+                            empty += 1
+                        tokens.append(count_tokens(label.question + "\n" + build_context(kept)) if kept else 0)
+                        for rank, hit in enumerate(kept, start=1):
+                            if is_relevant(hit, label):
+                                found += 1
+                                rr_total += 1.0 / rank
+                                break
+                    n = max(len(labels), 1)
+                    rows.append(
+                        {
+                            "chunk_size": chunk_size,
+                            "overlap": overlap,
+                            "chunks": len(chunks),
+                            "top_k": top_k,
+                            "min_score": min_score,
+                            "ef": ef,
+                            "recall_at_k": found / n,
+                            "mrr": rr_total / n,
+                            "empty_rate": empty / n,
+                            "prompt_tokens": sum(tokens) / n,
+                            "search_p50_ms": percentile(latencies, 50) * 1000,
+                            "search_p95_ms": percentile(latencies, 95) * 1000,
+                        }
+                    )
+    return rows
+
+
+def _floats(s: str) -> tuple[float, ...]:
+    return tuple(float(x) for x in s.split(",") if x.strip())
+
+
+def _ints(s: str) -> tuple[int, ...]:
+    return tuple(int(x) for x in s.split(",") if x.strip())
+
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", required=True)
+    parser.add_argument("--labels", required=True)
+    parser.add_argument("--chunk-sizes", default="400,800,1200")
+    parser.add_argument("--overlaps", default="0,100")
+    parser.add_argument("--top-k", default="2,4,8")
+    parser.add_argument("--min-scores", default="0,0.25,0.35")
+    parser.add_argument("--ef", default="64")
+    parser.add_argument("--embeddings", choices=["openai", "hash"], default="openai")
+    parser.add_argument("--qdrant-url", help="Qdrant server (default: local in-memory)")
+    parser.add_argument("--qdrant-path", help="Embedded on-disk local Qdrant directory")
+    parser.add_argument("--sort", default="recall_at_k", help="Column to sort by (descending)")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    from qdrant_client import QdrantClient
+
+    from rag_pipeline.loader import load_and_chunk_pdf
+
+    if args.embeddings == "hash":
+        from benchmarks.fakes import HashingEmbeddings
+
+        embeddings = HashingEmbeddings()
+    else:
+        from rag_pipeline.embeddings import get_embeddings
+
+        embeddings = get_embeddings()
+
+    if args.qdrant_url:
+        client = QdrantClient(url=args.qdrant_url)
+    elif args.qdrant_path:
+        client = QdrantClient(path=args.qdrant_path)
+    else:
+        client = QdrantClient(location=":memory:")
+
+    grid = SweepGrid(
+        chunk_sizes=_ints(args.chunk_sizes),
+        chunk_overlaps=_ints(args.overlaps),
+        top_ks=_ints(args.top_k),
+        min_scores=_floats(args.min_scores),
+        hnsw_efs=_ints(args.ef),
+    )
+    rows = run_sweep(
+        lambda size, overlap: load_and_chunk_pdf(args.pdf, chunk_size=size, chunk_overlap=overlap),
+        load_labels(args.labels),
+        grid,
+        embeddings,
+        client=client,
+    )
+    rows.sort(key=lambda r: (-r.get(args.sort, 0), r["prompt_tokens"], r["search_p50_ms"]))
+    print(
+        format_table(
+            rows,
+            ["chunk_size", "overlap", "chunks", "top_k", "min_score", "ef", "recall_at_k", "mrr",
+             "empty_rate", "prompt_tokens", "search_p50_ms", "search_p95_ms"],
+        )
+    )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
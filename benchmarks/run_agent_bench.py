@@ -0,0 +1,218 @@
+"""
+End-to-end `run_agent` benchmark against in-process fakes (no network, no API keys).
+
+Measures p50/p95/p99 latency and QPS for sequential, threaded and async execution, and for a
+pre-forked pool of agent processes (`processes`, langgraph_pipeline.workers; Linux/macOS).
+Latency/failure of each fake is configurable, and all randomness is seeded, so two runs
+with the same arguments produce the same numbers (up to scheduler noise).
+
+Run:
+  python -m benchmarks.run_agent_bench
+  python -m benchmarks.run_agent_bench --profile zero --requests 500 --concurrency 16
+  python -m benchmarks.run_agent_bench --chat lognormal:300:1200@0.01 --qdrant 20 --modes threaded,async
+  python -m benchmarks.run_agent_bench --profile zero --modes threaded,processes --workers 4 --concurrency 16
+
+Latency specs: "25" (constant ms), "uniform:10:40", "lognormal:MEDIAN:P95", optional "@FAILURE_RATE".
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from benchmarks.fakes import FakeProfile, LatencyModel, install_fakes
+from benchmarks.stats import format_table, summarize
+from observability import metrics
+
+DEFAULT_QUERIES = [
+    "What's the weather in Mumbai right now?",
+    "Should I carry an umbrella in Pune today?",
+    "Temperature of Darjeeling?",
+    "What is the main topic of the document?",
+    "Explain retrieval-augmented generation (RAG).",
+    "In which year was chain-of-thought prompting demonstrated?",
+    "What does the document say about RLHF?",
+    "What are the key limitations discussed in the document?",
+]
+
+
+def _timed_call(fn: Callable[[str], dict[str, Any]], query: str) -> tuple[float, dict[str, Any] | None]:
+    start = time.perf_counter()
+    try:
+        out = fn(query)
+    except Exception:
+        return time.perf_counter() - start, None
+    return time.perf_counter() - start, out
+
+
+def _collect(results: list[tuple[float, dict[str, Any] | None]], wall: float) -> dict[str, Any]:
+    latencies = [lat for lat, out in results if out is not None]
+    errors = sum(1 for _, out in results if out is None)
+    summary = summarize(latencies, wall, errors)
+
+    # Mean per-stage breakdown from run_agent's `timings` (metrics are enabled for benchmarks).
+    stages: dict[str, list[float]] = {}
+    for _, out in results:
+        for stage, seconds in ((out or {}).get("timings") or {}).items():
+            if not stage.startswith(("tokens.", "cache_hit.", "hedge.")):
+                stages.setdefault(stage, []).append(seconds)
+    summary["stages_ms"] = {k: sum(v) / len(v) * 1000 for k, v in sorted(stages.items())}
+    return summary
+
+
+def run_sequential(fn: Callable[[str], dict[str, Any]], queries: list[str]) -> dict[str, Any]:
+    start = time.perf_counter()
+    results = [_timed_call(fn, q) for q in queries]
+    return _collect(results, time.perf_counter() - start)
+
+
+def run_threaded(fn: Callable[[str], dict[str, Any]], queries: list[str], concurrency: int) -> dict[str, Any]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda q: _timed_call(fn, q), queries))
+    return _collect(results, time.perf_counter() - start)
+
+
+def run_async(fn: Callable[[str], dict[str, Any]], queries: list[str], concurrency: int) -> dict[str, Any]:
+    async def _main() -> list[tuple[float, dict[str, Any] | None]]:
+        sem = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+
+        async def one(q: str):
+            async with sem:
+                # The agent is synchronous; async callers offload it the same way a server would.
+                return await loop.run_in_executor(pool, _timed_call, fn, q)
+
+        try:
+            return await asyncio.gather(*(one(q) for q in queries))
+        finally:
+            pool.shutdown(wait=True)
+
+    start = time.perf_counter()
+    results = asyncio.run(_main())
+    return _collect(results, time.perf_counter() - start)
+
+
+def run_processes(queries: list[str], workers: int, concurrency: int) -> dict[str, Any]:
+    """
+    `concurrency` requests in flight against a pool of `workers` agent processes (forked under
+    the active fakes). Adds the workers' mean memory (Linux) to the summary.
+    """
+    from langgraph_pipeline.workers import WorkerPool
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with WorkerPool(workers, start_method="fork", cache_dir=cache_dir) as pool:
+            summary = run_threaded(pool.run, queries, concurrency)
+            memory = list(pool.memory().values())
+    for field in ("pss_kb", "private_kb"):
+        values = [m[field] for m in memory if field in m]
+        if values:
+            summary[f"worker_{field}"] = sum(values) // len(values)
+    return summary
+
+
+def run_benchmark(
+    profile: FakeProfile,
+    modes: list[str],
+    n_requests: int,
+    concurrency: int,
+    queries: list[str] | None = None,
+    warmup: int = 5,
+    workers: int = 4,
+) -> list[dict[str, Any]]:
+    """
+    Run `run_agent` under fakes for each mode and return one summary row per mode.
+    """
+    from langgraph_pipeline.graph import run_agent
+
+    base = queries or DEFAULT_QUERIES
+    workload = [base[i % len(base)] for i in range(n_requests)]
+
+    was_enabled = metrics.enabled()
+    metrics.set_enabled(True)
+    rows: list[dict[str, Any]] = []
+    try:
+        with install_fakes(profile):
+            for q in base[:warmup]:
+                _timed_call(run_agent, q)
+            for mode in modes:
+                if mode == "sequential":
+                    summary = run_sequential(run_agent, workload)
+                elif mode == "threaded":
+                    summary = run_threaded(run_agent, workload, concurrency)
+                elif mode == "async":
+                    summary = run_async(run_agent, workload, concurrency)
+                elif mode == "processes":
+                    summary = run_processes(workload, workers, concurrency)
+                    summary["workers"] = workers
+                else:
+                    raise ValueError(
+                        f"Unknown mode: {mode!r} (expected sequential, threaded, async or processes)"
+                    )
+                rows.append({"mode": mode, "concurrency": 1 if mode == "sequential" else concurrency, **summary})
+    finally:
+        metrics.set_enabled(was_enabled)
+    return rows
+
+
+def _profile_from_args(args: argparse.Namespace) -> FakeProfile:
+    profile = FakeProfile.zero() if args.profile == "zero" else FakeProfile.default(seed=args.seed)
+    for name in ("chat", "embed", "qdrant", "owm"):
+        spec = getattr(args, name)
+        if spec is not None:
+            setattr(profile, name, LatencyModel.parse(spec, seed=args.seed))
+    return profile
+
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=["default", "zero"], default="default")
+    parser.add_argument("--chat", help="ChatOpenAI latency spec")
+    parser.add_argument("--embed", help="OpenAIEmbeddings latency spec")
+    parser.add_argument("--qdrant", help="Qdrant search latency spec")
+    parser.add_argument("--owm", help="OpenWeatherMap latency spec")
+    parser.add_argument("--modes", default="sequential,threaded,async")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4, help="Agent processes for the processes mode")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--queries", help="File with one query per line (default: built-in mix)")
+    parser.add_argument("--json", dest="json_path", help="Also write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    queries = None
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    rows = run_benchmark(
+        _profile_from_args(args),
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+        n_requests=args.requests,
+        concurrency=args.concurrency,
+        queries=queries,
+        workers=args.workers,
+    )
+
+    columns = ["mode", "concurrency", "requests", "errors", "qps", "p50_ms", "p95_ms", "p99_ms"]
+    if any("worker_pss_kb" in r for r in rows):
+        columns += ["workers", "worker_pss_kb", "worker_private_kb"]
+    print(format_table(rows, columns))
+    for r in rows:
+        stages = ", ".join(f"{k}={v:.1f}" for k, v in r["stages_ms"].items())
+        print(f"\n[{r['mode']}] mean stage ms: {stages}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
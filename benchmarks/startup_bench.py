@@ -0,0 +1,127 @@
+"""
+Cold-start cost: import time of the app's entry modules, measured with `python -X importtime`
+in a fresh interpreter per run (the same cost a CLI run, a serverless worker or a pytest
+collection pays).
+
+Reports the cumulative import time of each module (median over --repeat runs), the heavy
+third-party packages it pulled in, and the slowest imports underneath it.
+
+Run:
+  python -m benchmarks.startup_bench
+  python -m benchmarks.startup_bench --module rag_pipeline.service --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any
+
+from benchmarks.stats import format_table
+
+ENTRY_MODULES = (
+    "langgraph_pipeline.graph",
+    "rag_pipeline.service",
+    "openweather_pipeline.service",
+)
+
+# Packages that must only load when a route actually needs them
+HEAVY_PACKAGES = (
+    "langgraph",
+    "langchain_openai",
+    "langchain_community",
+    "openai",
+    "qdrant_client",
+    "pyowm",
+    "numpy",
+)
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportRecord]:
+    """
+    Parse `-X importtime` lines: "import time: self [us] | cumulative | <indent>module".
+    """
+    records: list[ImportRecord] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def measure(module: str, python: str = sys.executable) -> list[ImportRecord]:
+    # Run from the repo root so the app packages resolve like `python -m ...`
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def summarize(module: str, runs: list[list[ImportRecord]], top: int = 10) -> dict[str, Any]:
+    totals = []
+    for records in runs:
+        target = [r for r in records if r.module == module]
+        totals.append(target[-1].cumulative_us if target else 0)
+    last = runs[-1]
+    loaded = {r.module.split(".")[0] for r in last}
+    slowest = sorted((r for r in last if r.module != module), key=lambda r: r.self_us, reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": statistics.median(totals) / 1000.0,
+        "modules": len(last),
+        "heavy": ",".join(p for p in HEAVY_PACKAGES if p in loaded) or "-",
+        "slowest": [(r.module, r.self_us / 1000.0) for r in slowest],
+    }
+
+
+def run(modules: tuple[str, ...] | list[str] = ENTRY_MODULES, repeat: int = 3, top: int = 10) -> list[dict[str, Any]]:
+    return [summarize(m, [measure(m) for _ in range(repeat)], top) for m in modules]
+
+
+def main(argv: list[str] | None = None) -> list[dict[str, Any]]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="Entry module to measure (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module")
+    args = parser.parse_args(argv)
+
+    rows = run(args.module or ENTRY_MODULES, args.repeat, args.top)
+    print(format_table(rows, ["module", "import_ms", "modules", "heavy"]))
+    for row in rows:
+        print(f"\nslowest imports under {row['module']} (self ms):")
+        for name, ms in row["slowest"]:
+            print(f"  {ms:8.1f}  {name}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Small latency statistics helpers shared by the benchmark scripts.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """
+    Linear-interpolated percentile (q in [0, 100]); 0.0 for an empty sample.
+    """
+    xs = sorted(values)
+    if not xs:
+        return 0.0
+    if len(xs) == 1:
+        return xs[0]
+    pos = (len(xs) - 1) * (q / 100.0)
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    if lo == hi:
+        return xs[lo]
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+
+def summarize(latencies: list[float], wall_seconds: float, errors: int = 0) -> dict[str, Any]:
+    """
+    p50/p95/p99/mean in milliseconds plus throughput for one benchmark run.
+    """
+    n = len(latencies)
+    return {
+        "requests": n + errors,
+        "errors": errors,
+        "qps": (n / wall_seconds) if wall_seconds > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (sum(latencies) / n * 1000) if n else 0.0,
+    }
+
+
+def format_table(rows: list[dict[str, Any]], columns: list[str]) -> str:
+    """
+    Plain fixed-width table for terminal output.
+    """
+
+    def cell(v: Any) -> str:
+        return f"{v:.2f}" if isinstance(v, float) else str(v)
+
+    widths = {c: max(len(c), *(len(cell(r.get(c, ""))) for r in rows)) if rows else len(c) for c in columns}
+    out = ["  ".join(c.rjust(widths[c]) for c in columns)]
+    for r in rows:
+        out.append("  ".join(cell(r.get(c, "")).rjust(widths[c]) for c in columns))
+    return "\n".join(out)
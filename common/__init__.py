@@ -0,0 +1 @@
+"""Shared runtime helpers (configuration bootstrap, lazy imports)."""
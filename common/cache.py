@@ -0,0 +1,286 @@
+# shared caches (routing, query embeddings, answers) that a pre-warm job can fill offline
+
+# common/cache.py
+
+"""
+Process-wide LRU caches with an optional TTL:
+  ROUTES      LLM routing decisions, keyed on router model + normalized query
+  EMBEDDINGS  query vectors, keyed on the embedding backend's info + query text
+  ANSWERS     one-shot PDF answers, keyed on the index / model settings + normalized query
+
+Every cache can be written to and read from a JSON-lines file (`save` / `load`). On its first
+lookup a cache loads CACHE_DIR/<name>.jsonl if that file exists, so a process started after
+`python -m langgraph_pipeline.prewarm` already has the popular questions cached.
+
+SHARED_EMBEDDINGS is a read-only copy of the warm query vectors in memory-mapped .npy files
+(`freeze_embeddings`), so the processes of a worker pool (langgraph_pipeline.workers) share one
+copy through the OS page cache instead of each loading its own.
+
+A size of 0 disables a cache. Answers are opt-in: a cached answer skips retrieval and
+generation, so it can be up to ANSWER_CACHE_TTL_SECONDS older than the index.
+
+Env vars:
+  CACHE_DIR=data/cache
+  ROUTE_CACHE_SIZE=10000
+  EMBED_CACHE_SIZE=10000
+  ANSWER_CACHE_SIZE=0
+  ANSWER_CACHE_TTL_SECONDS=86400
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from common.config import env_float, env_int, load_env
+from observability.metrics import record_cache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+load_env()
+
+CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+ROUTE_CACHE_SIZE = env_int("ROUTE_CACHE_SIZE", 10000)
+EMBED_CACHE_SIZE = env_int("EMBED_CACHE_SIZE", 10000)
+ANSWER_CACHE_SIZE = env_int("ANSWER_CACHE_SIZE", 0)
+ANSWER_CACHE_TTL_SECONDS = env_float("ANSWER_CACHE_TTL_SECONDS", 86400)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key form of a question: case, spacing and trailing punctuation don't matter.
+    """
+    return _SPACE_RE.sub(" ", text).strip().rstrip("?!.").strip().lower()
+
+
+class TTLCache:
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float | None = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        # key -> (created wall-clock time, value); wall clock so entries survive save / load
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._warm_loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def path(self, directory: str | os.PathLike | None = None) -> Path:
+        return Path(directory or CACHE_DIR) / f"{self.name}.jsonl"
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def warm(self) -> None:
+        """
+        Load the saved file (CACHE_DIR/<name>.jsonl), once; `get` and `put` call this first.
+        """
+        if not self._warm_loaded:
+            self._warm_loaded = True
+            if self.path().exists():
+                self.load()
+
+    def get(self, key: str) -> Any | None:
+        if not self.enabled:
+            return None
+        self.warm()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache(self.name, hit=entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: str, value: Any, created: float | None = None) -> None:
+        if not self.enabled:
+            return
+        self.warm()
+        with self._lock:
+            self._entries[key] = (time.time() if created is None else created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self, directory: str | os.PathLike | None = None) -> int:
+        path = self.path(directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for key, (created, value) in entries:
+                f.write(json.dumps({"key": key, "created": created, "value": value}, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        return len(entries)
+
+    def load(self, directory: str | os.PathLike | None = None) -> int:
+        """
+        Add the unexpired entries of a saved cache file; returns how many were added.
+        """
+        self._warm_loaded = True
+        now = time.time()
+        added = 0
+        with open(self.path(directory), encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if not self._expired(row["created"], now):
+                    self.put(row["key"], row["value"], created=row["created"])
+                    added += 1
+        return added
+
+    def mark_loaded(self) -> None:
+        """
+        Treat the saved file as loaded (its entries are served from elsewhere) without reading it.
+        """
+        self._warm_loaded = True
+
+    def items(self) -> list[tuple[str, Any]]:
+        with self._lock:
+            return [(key, value) for key, (_, value) in self._entries.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._warm_loaded = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SharedVectors:
+    """
+    Read-only vector table keyed like a TTLCache, as two memory-mapped files:
+      <name>.keys.npy  uint64 [n]       sorted 64-bit hashes of the keys
+      <name>.npy       float32 [n, dim] rows in the same order
+    A lookup is one `np.searchsorted` plus a row copy. Nothing is held in Python objects, so a
+    forked worker adds no memory for it; the pages live once in the OS page cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._keys: np.ndarray | None = None
+        self._vectors: np.ndarray | None = None
+        self._opened = False
+
+    def paths(self, directory: str | os.PathLike | None = None) -> tuple[Path, Path]:
+        base = Path(directory or CACHE_DIR)
+        return base / f"{self.name}.keys.npy", base / f"{self.name}.npy"
+
+    def build(
+        self,
+        entries: Iterable[tuple[str, Any]],
+        directory: str | os.PathLike | None = None,
+        merge: bool = False,
+    ) -> int:
+        """
+        Write the table, plus the rows of the existing one with `merge`; returns its size.
+        Vectors of another dimension than the first one are skipped.
+        """
+        import numpy as np
+
+        rows: dict[int, Any] = {}
+        dim = None
+        keys_path, vectors_path = self.paths(directory)
+        if merge and keys_path.exists() and vectors_path.exists():
+            old = np.load(vectors_path)
+            rows.update(zip(np.load(keys_path).tolist(), old))
+            dim = old.shape[1] if old.size else None
+        for key, vector in entries:
+            dim = dim or len(vector)
+            if len(vector) == dim:
+                rows[_key_hash(key)] = vector
+        hashes = np.array(sorted(rows), dtype=np.uint64)
+        vectors = np.array([rows[int(h)] for h in hashes], dtype=np.float32).reshape(len(hashes), dim or 0)
+
+        keys_path.parent.mkdir(parents=True, exist_ok=True)
+        for path, array in ((vectors_path, vectors), (keys_path, hashes)):
+            tmp = path.with_suffix(".tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, path)
+        self._opened = False
+        return len(hashes)
+
+    def open(self, directory: str | os.PathLike | None = None) -> bool:
+        import numpy as np
+
+        self._opened = True
+        keys_path, vectors_path = self.paths(directory)
+        if not (keys_path.exists() and vectors_path.exists()):
+            self._keys = self._vectors = None
+            return False
+        self._keys = np.load(keys_path, mmap_mode="r")
+        self._vectors = np.load(vectors_path, mmap_mode="r")
+        return True
+
+    def get(self, key: str) -> list[float] | None:
+        if not self._opened:
+            self.open()
+        keys = self._keys
+        if keys is None or not len(keys):
+            return None
+        import numpy as np
+
+        h = np.uint64(_key_hash(key))
+        i = int(np.searchsorted(keys, h))
+        hit = i < len(keys) and keys[i] == h
+        record_cache(f"{self.name}_shared", hit=hit)
+        return self._vectors[i].tolist() if hit else None
+
+    def close(self) -> None:
+        self._keys = self._vectors = None
+        self._opened = False
+
+    def __len__(self) -> int:
+        return 0 if self._keys is None else len(self._keys)
+
+
+ROUTES = TTLCache("route", ROUTE_CACHE_SIZE)
+EMBEDDINGS = TTLCache("embedding", EMBED_CACHE_SIZE)
+ANSWERS = TTLCache("answer", ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS)
+CACHES = (ROUTES, EMBEDDINGS, ANSWERS)
+SHARED_EMBEDDINGS = SharedVectors("embedding")
+
+
+def save_all(directory: str | os.PathLike | None = None) -> dict[str, int]:
+    return {c.name: c.save(directory) for c in CACHES}
+
+
+def clear_all() -> None:
+    for c in CACHES:
+        c.clear()
+    SHARED_EMBEDDINGS.close()
+
+
+def freeze_embeddings(directory: str | os.PathLike | None = None) -> int:
+    """
+    Move the warm query vectors (EMBEDDINGS plus its saved file) into SHARED_EMBEDDINGS and empty
+    the per-process cache, which then only holds vectors first seen after this point.
+    """
+    EMBEDDINGS.warm()
+    if not len(EMBEDDINGS) and not SHARED_EMBEDDINGS.paths(directory)[0].exists():
+        return 0
+    n = SHARED_EMBEDDINGS.build(EMBEDDINGS.items(), directory, merge=True)
+    SHARED_EMBEDDINGS.open(directory)
+    EMBEDDINGS.clear()
+    EMBEDDINGS.mark_loaded()  # its file is in the table now
+    return n
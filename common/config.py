@@ -0,0 +1,52 @@
+# process-wide configuration bootstrap
+
+# common/config.py
+
+"""
+`.env` is read once per process (first call to `load_env()`), not once per imported module.
+Values are still resolved from the environment. The typed helpers keep the parsing rules
+(booleans, blank-as-unset) the same everywhere.
+
+Usage:
+  from common.config import env_flag, env_int, load_env
+
+  load_env()
+  TOP_K = env_int("RAG_TOP_K", 4)
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+_TRUE = {"1", "true", "yes", "on"}
+
+
+@lru_cache(maxsize=1)
+def load_env() -> bool:
+    """
+    Load `.env` into os.environ (existing variables win). Later calls are free.
+    """
+    from dotenv import load_dotenv
+
+    return load_dotenv()
+
+
+def env_str(name: str, default: str | None = None) -> str | None:
+    value = os.getenv(name)
+    return default if value is None or value.strip() == "" else value
+
+
+def env_int(name: str, default: int) -> int:
+    value = env_str(name)
+    return default if value is None else int(value)
+
+
+def env_float(name: str, default: float) -> float:
+    value = env_str(name)
+    return default if value is None else float(value)
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = env_str(name)
+    return default if value is None else value.strip().lower() in _TRUE
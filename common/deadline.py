@@ -0,0 +1,264 @@
+# per-request deadlines and hedged external calls
+
+# common/deadline.py
+
+"""
+Every request gets one deadline (REQUEST_DEADLINE_SECONDS from its start). `run_agent` puts it
+in the graph state, each node scopes it, and every external call (embedding, Qdrant, OWM, LLM)
+runs through `call(stage, fn, ...)`:
+  - a call that isn't hedged runs inline, in the caller's thread. The client's own timeout,
+    set from what is left of the deadline (`client_timeout()`), bounds it; a call that fails
+    or returns after the deadline raises `DeadlineExceeded`. No shared pool sits in front of
+    ordinary calls, so concurrent requests never queue behind each other for a thread,
+  - with HEDGE_REQUESTS on, stages listed in HEDGE_STAGES run in the HEDGE_WORKERS pool and send
+    a duplicate call once the first one is slower than that stage's recent p95 (HEDGE_QUANTILE);
+    the first to finish wins and the caller waits at most until the deadline. It only costs an
+    extra call for the slowest ~5% of requests and cuts their tail.
+
+Latency samples for the hedge delay come from the primary call of each stage (a hedge win
+doesn't shorten the recorded latency), last HEDGE_WINDOW calls, and no hedging before
+HEDGE_MIN_SAMPLES of them.
+
+Usage:
+  with deadline_scope(Deadline.after(5.0)):
+      hits = call("qdrant.search", client.query_points, ...)
+
+Env vars:
+  REQUEST_DEADLINE_SECONDS=20      (0 or blank: no deadline)
+  HEDGE_REQUESTS=false
+  HEDGE_STAGES=embed.query,qdrant.search,qdrant.pages,owm.fetch   (idempotent reads; LLM calls cost tokens)
+  HEDGE_QUANTILE=0.95
+  HEDGE_MIN_DELAY_SECONDS=0.02
+  HEDGE_MIN_SAMPLES=20
+  HEDGE_WINDOW=500
+  HEDGE_WORKERS=32                 (threads for hedged stages only)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, TypeVar
+
+from common.config import env_flag, env_float, env_int, env_str, load_env
+from observability.metrics import record_hedge
+
+load_env()
+
+REQUEST_DEADLINE_SECONDS = env_float("REQUEST_DEADLINE_SECONDS", 20.0)
+HEDGE_REQUESTS = env_flag("HEDGE_REQUESTS")
+HEDGE_STAGES = frozenset(
+    s.strip()
+    for s in (env_str("HEDGE_STAGES", "embed.query,qdrant.search,qdrant.pages,owm.fetch") or "").split(",")
+    if s.strip()
+)
+HEDGE_QUANTILE = env_float("HEDGE_QUANTILE", 0.95)
+HEDGE_MIN_DELAY_SECONDS = env_float("HEDGE_MIN_DELAY_SECONDS", 0.02)
+HEDGE_MIN_SAMPLES = env_int("HEDGE_MIN_SAMPLES", 20)
+HEDGE_WINDOW = env_int("HEDGE_WINDOW", 500)
+HEDGE_WORKERS = env_int("HEDGE_WORKERS", 32)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before `stage` returned."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"deadline exceeded during {stage}")
+        self.stage = stage
+
+
+@dataclass(frozen=True)
+class Deadline:
+    # time.monotonic() value; only meaningful inside this process
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+_current: ContextVar[Deadline | None] = ContextVar("request_deadline", default=None)
+
+
+def request_deadline(seconds: float | None = None) -> Deadline | None:
+    """
+    A new deadline `seconds` (default REQUEST_DEADLINE_SECONDS) from now; None when that is 0.
+    """
+    seconds = REQUEST_DEADLINE_SECONDS if seconds is None else seconds
+    return Deadline.after(seconds) if seconds and seconds > 0 else None
+
+
+def current_deadline() -> Deadline | None:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | float | None) -> Iterator[Deadline | None]:
+    """
+    Make `deadline` (or a raw `expires_at`, as carried in the graph state) current for the block.
+    A block inside another scope never gets more time than the outer deadline allows.
+    """
+    if isinstance(deadline, (int, float)):
+        deadline = Deadline(float(deadline))
+    outer = _current.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def remaining() -> float | None:
+    """
+    Seconds left on the current deadline (None without one).
+    """
+    deadline = _current.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def client_timeout(floor: float = 0.1) -> float | None:
+    """
+    Timeout to hand an SDK client built for this request: what is left of the deadline
+    (at least `floor`, so a late call still fails fast instead of with timeout=0).
+    """
+    left = remaining()
+    return max(floor, left) if left is not None else None
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent call latencies per stage (seconds).
+    """
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, stage: str, q: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(stage) or ())
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+LATENCIES = LatencyTracker()
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="deadline")
+        return _pool
+
+
+def _reset_after_fork() -> None:
+    # The parent's threads don't exist in a forked worker (langgraph_pipeline.workers)
+    global _pool, _pool_lock
+    _pool, _pool_lock = None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def hedge_delay(stage: str) -> float | None:
+    """
+    How long to wait for `stage` before sending a duplicate; None = don't hedge.
+    """
+    if not HEDGE_REQUESTS or stage not in HEDGE_STAGES:
+        return None
+    p = LATENCIES.quantile(stage, HEDGE_QUANTILE, HEDGE_MIN_SAMPLES)
+    return max(p, HEDGE_MIN_DELAY_SECONDS) if p is not None else None
+
+
+def _submit(stage: str, fn: Callable[..., T], args: tuple, kwargs: dict, track: bool) -> Future:
+    start = time.perf_counter()
+    # copy_context per attempt: metrics and nested deadlines follow the call into the worker
+    future = _executor().submit(copy_context().run, fn, *args, **kwargs)
+    if track:
+        future.add_done_callback(lambda _: LATENCIES.observe(stage, time.perf_counter() - start))
+    return future
+
+
+def call(stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    `fn(*args, **kwargs)` bounded by the current deadline, hedged if `stage` is configured for it.
+    Without a hedge it is a plain call in this thread (plus a latency sample): the deadline is
+    checked before and after, and the client's timeout bounds the call itself.
+    """
+    deadline = _current.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(stage)
+    delay = hedge_delay(stage)
+    if delay is None:
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            # e.g. the client's timeout, which is what is left of the deadline
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(stage) from e
+            raise
+        finally:
+            LATENCIES.observe(stage, time.perf_counter() - start)
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(stage)
+        return result
+
+    pending = {_submit(stage, fn, args, kwargs, track=True)}
+    hedged: Future | None = None
+    if delay is not None:
+        first_wait = delay if deadline is None else min(delay, deadline.remaining())
+        done, _ = wait(pending, timeout=first_wait)
+        if not done and (deadline is None or not deadline.expired()):
+            hedged = _submit(stage, fn, args, kwargs, track=False)
+            pending.add(hedged)
+
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining() if deadline else None, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                if hedged is not None:
+                    record_hedge(stage, won=future is hedged)
+                return future.result()
+            error = error or future.exception()
+        # One attempt failed: keep waiting for the other, if any
+    if error is not None and not pending:
+        raise error
+    raise DeadlineExceeded(stage)
@@ -0,0 +1,40 @@
+# defer heavy third-party imports to first use
+
+# common/lazy.py
+
+"""
+`lazy("langchain_openai", "ChatOpenAI")` is a module-level stand-in for a class or function
+from a heavy package. The package is only imported on the first call. Importing the app
+therefore doesn't load every SDK, and a route loads only the clients it uses.
+
+It is an ordinary module attribute, so tests and benchmarks can still monkeypatch
+`module.ChatOpenAI` like before.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+
+class LazyCallable:
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._target: Any = None
+
+    def resolve(self) -> Any:
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self.module), self.name)
+        return self._target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else "not loaded"
+        return f"<lazy {self.module}.{self.name} ({state})>"
+
+
+def lazy(module: str, name: str) -> LazyCallable:
+    return LazyCallable(module, name)
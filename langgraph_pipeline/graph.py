@@ -1,28 +1,60 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Literal
-
-from langgraph.graph import StateGraph, END
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Literal
 
+from common.deadline import deadline_scope, request_deadline
 from langgraph_pipeline.router import hybrid_route
+from langgraph_pipeline.session import SESSIONS, Session
 from langgraph_pipeline.state import AgentState, Route
-from openweather_pipeline.service import answer_from_weather
-from rag_pipeline.service import answer_from_pdf
+from observability.metrics import timed, track_request
+from observability.profiler import capture_slow_request, start_from_env
+
+
+# Each route's service (and its SDKs: pyowm / langchain_community, qdrant_client / numpy)
+# is imported on the first query that takes that route, not when the graph module loads.
+def answer_from_weather(query: str, **kwargs: Any) -> dict[str, Any]:
+    from openweather_pipeline.service import answer_from_weather as answer
+
+    return answer(query, **kwargs)
+
+
+def answer_from_pdf(query: str, **kwargs: Any) -> dict[str, Any]:
+    from rag_pipeline.service import answer_from_pdf as answer
+
+    return answer(query, **kwargs)
+
+
+def _session(state: AgentState) -> Session | None:
+    session_id = state.get("session_id")
+    return SESSIONS.get(session_id) if session_id else None
+
+
+def _session_kwargs(state: AgentState) -> dict[str, Any]:
+    # One-shot queries keep the plain `answer_from_*(query)` call
+    session = _session(state)
+    return {"session": session} if session is not None else {}
 
 
 def route_node(state: AgentState) -> AgentState:
     query = state["query"]
-    route, reason = hybrid_route(query)
+    session = _session(state)
+    previous = session.last_route if session is not None and session.is_follow_up(query) else None
+    with deadline_scope(state.get("deadline")), timed("node.route"):
+        route, reason = hybrid_route(query, previous) if previous else hybrid_route(query)
     return {**state, "route": route, "route_reason": reason}
 
 
 def weather_node(state: AgentState) -> AgentState:
-    result = answer_from_weather(state["query"])
+    with deadline_scope(state.get("deadline")), timed("node.weather"):
+        result = answer_from_weather(state["query"], **_session_kwargs(state))
     return {**state, "result": result}
 
 
 def pdf_node(state: AgentState) -> AgentState:
-    result = answer_from_pdf(state["query"])
+    with deadline_scope(state.get("deadline")), timed("node.pdf"):
+        result = answer_from_pdf(state["query"], **_session_kwargs(state))
     return {**state, "result": result}
 
 
@@ -31,6 +63,8 @@ def _branch(state: AgentState) -> Route:
 
 
 def build_graph():
+    from langgraph.graph import END, StateGraph
+
     g = StateGraph(AgentState)
     g.add_node("route", route_node)
     g.add_node("weather", weather_node)
@@ -43,19 +77,91 @@ def build_graph():
     return g.compile()
 
 
-def run_agent(query: str) -> dict[str, Any]:
-    app = build_graph()
-    out: Dict[str, Any] = app.invoke({"query": query})
-    # Normalize
+@lru_cache(maxsize=1)
+def get_app():
+    """
+    Compiled graph, built once per process. Nodes resolve their services at call time,
+    so monkeypatching `answer_from_*` on this module still takes effect.
+    """
+    start_from_env()  # PROFILE_ON_START_SECONDS
+    return build_graph()
+
+
+def _initial_state(query: str, session_id: str | None, deadline_seconds: float | None) -> Dict[str, Any]:
+    state: Dict[str, Any] = {"query": query}
+    if session_id:
+        state["session_id"] = session_id
+    deadline = request_deadline(deadline_seconds)
+    if deadline is not None:
+        state["deadline"] = deadline.expires_at
+    return state
+
+
+def _record(query: str, session_id: str | None, result: dict[str, Any]) -> None:
+    if session_id:
+        session = SESSIONS.get(session_id)
+        with session.lock:
+            session.record_turn(query, result)
+
+
+def _normalize(query: str, out: Dict[str, Any], timings: dict[str, float]) -> dict[str, Any]:
     result = out.get("result") or {}
     return {
         "query": query,
         "route": out.get("route"),
         "route_reason": out.get("route_reason"),
+        **({"session_id": out["session_id"]} if out.get("session_id") else {}),
         **result,
+        # Stage -> seconds (plus token / cache-hit counts). Empty unless METRICS_ENABLED.
+        "timings": dict(timings),
     }
 
 
+def run_agent(query: str, session_id: str | None = None, deadline_seconds: float | None = None) -> dict[str, Any]:
+    """
+    `session_id` makes the query part of a conversation (follow-ups reuse its route,
+    retrieved chunks and history); without it every query is independent.
+
+    Every external call gets what is left of `deadline_seconds` (default REQUEST_DEADLINE_SECONDS,
+    0 = none). Close to the deadline the answer degrades (e.g. citations without generation)
+    and carries `"degraded": "deadline"`.
+    """
+    start = time.perf_counter()
+    with track_request() as timings:
+        out: Dict[str, Any] = get_app().invoke(_initial_state(query, session_id, deadline_seconds))
+    _record(query, session_id, out.get("result") or {})
+    result = _normalize(query, out, timings)
+    capture_slow_request(result, out, time.perf_counter() - start)
+    return result
+
+
+def stream_agent(
+    query: str, session_id: str | None = None, deadline_seconds: float | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Like `run_agent`, but yields `(node, state_so_far)` as each graph node finishes
+    (e.g. ("route", {...}) then ("pdf", {...})), and finally ("done", <run_agent output>).
+    """
+    state: Dict[str, Any] = _initial_state(query, session_id, deadline_seconds)
+    # Time spent in the graph only: the consumer's time between yields isn't part of the request
+    busy = 0.0
+    with track_request() as timings:
+        updates = iter(get_app().stream(state, stream_mode="updates"))
+        while True:
+            start = time.perf_counter()
+            update = next(updates, None)
+            busy += time.perf_counter() - start
+            if update is None:
+                break
+            for node, node_state in update.items():
+                state = {**state, **(node_state or {})}
+                yield node, state
+    _record(query, session_id, state.get("result") or {})
+    result = _normalize(query, state, timings)
+    capture_slow_request(result, state, busy)
+    yield "done", result
+
+
 if __name__ == "__main__":
     import os
 
@@ -0,0 +1,231 @@
+# offline cache pre-warming: popular + document-derived questions through the agent
+
+# langgraph_pipeline/prewarm.py
+
+"""
+Fill the routing, query-embedding and answer caches (common.cache) before traffic is switched
+to a fresh deploy or re-ingested index, then save them to CACHE_DIR so the serving processes
+load them on their first lookup.
+
+Questions, deduplicated on their normalized form:
+  1. the --top most frequent queries of each --log (JSONL with a "query" field, or plain lines),
+  2. the Streamlit QUICK_QUESTIONS,
+  3. up to --doc-questions questions derived from the ingested chunks, without an LLM:
+     "What is <term>?" for acronyms defined in parentheses ("retrieval-augmented generation (RAG)")
+     and for definitional sentences ("A transformer is a ...").
+Weather questions the rule router already recognises are skipped: their answers are live data
+and routing them costs nothing.
+
+Each question goes through `run_agent` (no request deadline, so nothing is stored degraded)
+with --concurrency questions in flight. Answers are only cached with ANSWER_CACHE_SIZE > 0
+(or --answers).
+
+Run:
+  python -m langgraph_pipeline.prewarm --log queries.jsonl --top 200
+  python -m langgraph_pipeline.prewarm --log queries.jsonl --answers --concurrency 8 --doc-questions 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+from common import cache
+from common.cache import normalize_query
+
+QUICK_QUESTIONS = [
+    # Weather
+    "Weather — What's the weather in Mumbai right now?",
+    "Weather — Should I carry an umbrella in Pune today?",
+    "Weather — Temperature of Darjeeling?",
+    "Weather — Is it raining in Delhi right now?",
+    "Weather — What's the humidity in Bengaluru?",
+    "Weather — What's the wind speed in Chennai today?",
+    "Weather — Forecast for Hyderabad today?",
+    "Weather — What's the weather in Amritsar, IN today?",
+    "Weather — What's the temperature in Nerul?",
+    "Weather — What's the temperature in sector 23 of Nerul?",
+    # PDF
+    "PDF — What is the main topic of the document?",
+    "PDF — Explain retrieval-augmented generation (RAG).",
+    "PDF — In which year was chain-of-thought prompting demonstrated?",
+    "PDF — What does the document say about system prompts?",
+    "PDF — Summarize the section about transformers.",
+    "PDF — What does the document say about RLHF?",
+    "PDF — What are the key limitations discussed in the document?",
+    "PDF — What examples of extensibility techniques are mentioned?",
+    "PDF — Does the document mention GPT-4o? If yes, what does it say?",
+    "PDF — Who is Shah Rukh Khan? (should say not in the document)",
+]
+
+# "retrieval-augmented generation (RAG)": the acronym and the 1-5 words it abbreviates
+_ACRONYM_RE = re.compile(r"\b((?:[A-Za-z][\w-]*\s+){0,4}[A-Za-z][\w-]*)\s+\(([A-Z][A-Za-z0-9-]{1,9})\)")
+# "A transformer is a ...", "Chain-of-thought prompting is an ..." at the start of a sentence
+_DEFINITION_RE = re.compile(
+    r"(?:^|(?<=[.!?]\s))([A-Z][\w-]*(?:\s+[\w-]+){0,3}?)\s+(?:is|are|refers to)\s+(?:an?|the)\s+\w",
+)
+_ARTICLE_RE = re.compile(r"^(?:an?|the)\s+", re.IGNORECASE)
+_STOP_TERMS = {"it", "this", "that", "there", "these", "those", "they", "he", "she", "we", "what", "which", "here"}
+
+
+def quick_questions() -> list[str]:
+    """
+    QUICK_QUESTIONS without their "Weather — " / "PDF — " labels, as the app sends them.
+    """
+    return [q.split("—", 1)[-1].strip() for q in QUICK_QUESTIONS]
+
+
+def top_logged_queries(paths: Iterable[str], top: int, field_name: str = "query") -> list[str]:
+    """
+    The `top` most frequent queries across the logs (by normalized form; the first spelling seen wins).
+    """
+    from benchmarks.loadgen import load_query_log
+
+    counts: Counter[str] = Counter()
+    spelling: dict[str, str] = {}
+    for path in paths:
+        for q in load_query_log(path, field_name):
+            key = normalize_query(q)
+            if key:
+                counts[key] += 1
+                spelling.setdefault(key, q.strip())
+    return [spelling[key] for key, _ in counts.most_common(top)]
+
+
+def document_questions(texts: Iterable[str], limit: int) -> list[str]:
+    """
+    "What is <term>?" for the terms the chunks define, most frequently defined first.
+    """
+    counts: Counter[str] = Counter()
+    for text in texts:
+        flat = " ".join((text or "").split())
+        for _, acronym in _ACRONYM_RE.findall(flat):
+            counts[acronym] += 2  # an explicit definition is the stronger signal
+        for term in _DEFINITION_RE.findall(flat):
+            # "A transformer" -> "What is a transformer?"
+            term = _ARTICLE_RE.sub(lambda m: m.group(0).lower(), term)
+            if _ARTICLE_RE.sub("", term).lower() not in _STOP_TERMS:
+                counts[term] += 1
+    return [f"What is {term}?" for term, _ in counts.most_common(limit)]
+
+
+def indexed_texts() -> list[str]:
+    """
+    Chunk texts of the configured index (local index or Qdrant shards, hydrated from the chunk store).
+    """
+    from rag_pipeline import ingest
+    from rag_pipeline.snapshot import export_local, export_qdrant
+
+    if ingest.RETRIEVER_BACKEND == "local":
+        _, _, payloads, _ = export_local(ingest.LOCAL_INDEX_DIR)
+    else:
+        from qdrant_client import QdrantClient
+
+        from rag_pipeline.chunk_store import open_chunk_store
+        from rag_pipeline.shards import registry_from_env
+
+        client = QdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+            timeout=ingest.QDRANT_TIMEOUT_SECONDS,
+        )
+        store = open_chunk_store(ingest.CHUNK_STORE_DIR) if ingest.CHUNK_STORE else None
+        collections = registry_from_env(ingest.COLLECTION_NAME).shards()
+        _, _, payloads, _ = export_qdrant(client, collections, ingest.VECTOR_NAME, store)
+    return [p.get("text") or "" for p in payloads]
+
+
+def collect_questions(
+    logs: Iterable[str] = (),
+    top: int = 100,
+    doc_texts: Iterable[str] | None = None,
+    doc_limit: int = 30,
+    field_name: str = "query",
+) -> list[str]:
+    """
+    Logged, quick and document questions in that order, deduplicated, without rule-routed weather.
+    """
+    from langgraph_pipeline.router import _rule_route
+
+    candidates = top_logged_queries(logs, top, field_name) + quick_questions()
+    if doc_texts is not None and doc_limit > 0:
+        candidates += document_questions(doc_texts, doc_limit)
+
+    questions: list[str] = []
+    seen: set[str] = set()
+    for q in candidates:
+        key = normalize_query(q)
+        if not key or key in seen or _rule_route(q)[0] == "weather":
+            continue
+        seen.add(key)
+        questions.append(q)
+    return questions
+
+
+def prewarm(questions: list[str], concurrency: int = 4, answers: bool = False) -> dict[str, Any]:
+    """
+    Run `questions` through the agent so the caches fill up; returns counts per route / outcome.
+    Cache sizes are raised to hold at least every question (answers only with `answers`).
+    """
+    from langgraph_pipeline.graph import run_agent
+
+    for c in cache.CACHES:
+        if c is not cache.ANSWERS or answers:
+            c.max_entries = max(c.max_entries, len(questions))
+
+    def _run(q: str) -> dict[str, Any]:
+        try:
+            return run_agent(q, deadline_seconds=0)
+        except Exception as e:  # one bad question shouldn't stop the job
+            return {"route": "error", "error": f"{type(e).__name__}: {e}"}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(_run, questions))
+    return {
+        "questions": len(questions),
+        "routes": dict(Counter(r.get("route") for r in results)),
+        "errors": [(q, r["error"]) for q, r in zip(questions, results) if "error" in r],
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", action="append", default=[], help="Query log (JSONL or plain text); repeatable")
+    parser.add_argument("--field", default="query", help="JSON field holding the query")
+    parser.add_argument("--top", type=int, default=100, help="Most frequent logged queries to warm")
+    parser.add_argument("--doc-questions", type=int, default=30, help="Questions derived from the chunks (0 = none)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--answers", action="store_true", help="Also cache answers (even with ANSWER_CACHE_SIZE=0)")
+    parser.add_argument("--out", default=None, help="Cache directory (default: CACHE_DIR)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the questions and exit")
+    args = parser.parse_args(argv)
+
+    texts = indexed_texts() if args.doc_questions > 0 else None
+    questions = collect_questions(args.log, args.top, texts, args.doc_questions, args.field)
+    if args.dry_run:
+        print("\n".join(questions))
+        return {"questions": len(questions)}
+
+    out_dir = args.out or cache.CACHE_DIR
+    report = prewarm(questions, args.concurrency, args.answers)
+    report["saved"] = cache.save_all(out_dir)
+    print(
+        f"Warmed {report['questions']} questions in {report['seconds']}s "
+        f"(routes: {report['routes']}, errors: {len(report['errors'])})"
+    )
+    for name, n in report["saved"].items():
+        print(f"  {name}: {n} entries -> {os.path.join(out_dir, name + '.jsonl')}")
+    for q, err in report["errors"]:
+        print(f"  failed: {q!r}: {err}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,17 @@ import os
 import re
 from typing import Literal, Tuple
 
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-
+from common.cache import ROUTES, normalize_query
+from common.config import load_env
+from common.deadline import DeadlineExceeded, call, client_timeout
+from common.lazy import lazy
 from langgraph_pipeline.state import Route
+from observability.metrics import record_tokens, timed
+
+load_env()
 
-load_dotenv()
+# Only the LLM fallback needs these; rule-routed queries never load langchain_openai
+ChatOpenAI = lazy("langchain_openai", "ChatOpenAI")
 
 
 _WEATHER_HINT_RE = re.compile(
@@ -30,8 +33,16 @@ def _rule_route(query: str) -> Tuple[Route | None, str | None]:
 
 
 def _llm_route(query: str) -> Tuple[Route, str]:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
     model = os.getenv("OPENAI_ROUTER_MODEL", os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini"))
-    llm = ChatOpenAI(model=model, temperature=0)
+    key = f"{model}|{normalize_query(query)}"
+    cached = ROUTES.get(key)
+    if cached is not None:
+        return cached[0], cached[1]
+
+    llm = ChatOpenAI(model=model, temperature=0, timeout=client_timeout())
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -46,22 +57,36 @@ def _llm_route(query: str) -> Tuple[Route, str]:
         ]
     )
 
-    route_str = (prompt | llm | StrOutputParser()).invoke(
-        {"query": query},
-        config={"tags": ["router"], "metadata": {"component": "router", "model": model}},
-    ).strip().lower()
+    with timed("llm.router"):
+        # The message, not the parsed string: its usage_metadata carries the token counts
+        response = call(
+            "llm.router",
+            (prompt | llm).invoke,
+            {"query": query},
+            config={"tags": ["router"], "metadata": {"component": "router", "model": model}},
+        )
+    record_tokens("route_classification", response)
+    route_str = StrOutputParser().invoke(response).strip().lower()
     route: Route = "weather" if "weather" in route_str else "pdf"
-    return route, f"llm_router(model={model})"
+    reason = f"llm_router(model={model})"
+    ROUTES.put(key, [route, reason])
+    return route, reason
 
 
-def hybrid_route(query: str) -> Tuple[Route, str]:
+def hybrid_route(query: str, previous: Route | None = None) -> Tuple[Route, str]:
     """
     Hybrid routing:
     - rules first (cheap + deterministic)
-    - LLM fallback for ambiguous cases
+    - a follow-up in a session (`previous` set) stays on the previous route
+    - LLM fallback for ambiguous cases (the PDF route if the deadline cuts it short)
     """
     route, reason = _rule_route(query)
     if route is not None:
         return route, reason or "rule_match"
-    return _llm_route(query)
+    if previous is not None:
+        return previous, "session_follow_up"
+    try:
+        return _llm_route(query)
+    except DeadlineExceeded:
+        return "pdf", "deadline_default"
 
@@ -0,0 +1,191 @@
+"""
+Conversation sessions: history plus the retrieval context of the last PDF answer, so
+follow-up questions ("and what about its limitations?") don't start from scratch.
+
+For a follow-up the session:
+  - keeps the previous route when the rule router has no opinion (no LLM routing call),
+  - resolves the question against the topic it follows up on (`contextualize`), which is
+    what gets embedded instead of the bare pronoun,
+  - answers from the cached chunks when the contextualized question is still close to the
+    previous one (SESSION_REUSE_MIN_SIM, cosine), otherwise searches again and carries the
+    best SESSION_CARRY_CHUNKS cached chunks along,
+  - passes the recent history to the LLM, trimmed to SESSION_HISTORY_TOKENS.
+
+Sessions live in process memory (LRU, SESSION_MAX entries, idle expiry after SESSION_TTL_SECONDS).
+
+Env vars:
+  SESSION_HISTORY_TOKENS=800
+  SESSION_REUSE_MIN_SIM=0.6
+  SESSION_CARRY_CHUNKS=2
+  SESSION_TTL_SECONDS=3600
+  SESSION_MAX=1000
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from common.config import env_float, env_int, load_env
+from langgraph_pipeline.state import Route
+
+load_env()
+
+SESSION_HISTORY_TOKENS = env_int("SESSION_HISTORY_TOKENS", 800)
+SESSION_REUSE_MIN_SIM = env_float("SESSION_REUSE_MIN_SIM", 0.6)
+SESSION_CARRY_CHUNKS = env_int("SESSION_CARRY_CHUNKS", 2)
+SESSION_TTL_SECONDS = env_float("SESSION_TTL_SECONDS", 3600)
+SESSION_MAX = env_int("SESSION_MAX", 1000)
+# Longer questions with a stray "it" are usually self-contained
+FOLLOW_UP_MAX_WORDS = 12
+
+_CONTINUATION_RE = re.compile(
+    r"^\s*(and|also|what about|how about|why|so|then|tell me more|more on|elaborate|explain (?:that|it|more))\b",
+    re.IGNORECASE,
+)
+_ANAPHORA_RE = re.compile(
+    r"\b(it|its|it's|they|them|their|this|that|these|those|he|she|his|her|there|same|above|previous|earlier)\b",
+    re.IGNORECASE,
+)
+# "this document" names the PDF, it doesn't point back at the conversation
+_DOC_REF_RE = re.compile(r"\b(this|that|the)\s+(document|pdf|paper|file|report)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # tiktoken missing or its encoding not downloadable
+        return None
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    return len(enc.encode(text)) if enc is not None else max(1, len(text) // 4)
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+@dataclass
+class Turn:
+    role: str  # "user" | "assistant"
+    content: str
+    route: Route | None = None
+    tokens: int = 0
+
+
+@dataclass
+class Session:
+    session_id: str
+    turns: list[Turn] = field(default_factory=list)
+    last_route: Route | None = None
+    # Last self-contained question; follow-ups are read against it
+    topic: str | None = None
+    # Retrieval context of the last PDF answer
+    query_vector: list[float] | None = None
+    chunks: list[dict[str, Any]] = field(default_factory=list)
+    last_location: str | None = None
+    updated: float = field(default_factory=time.monotonic)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    def is_follow_up(self, query: str) -> bool:
+        if not self.turns:
+            return False
+        if _CONTINUATION_RE.search(query):
+            return True
+        q = _DOC_REF_RE.sub(" ", query)
+        return bool(_ANAPHORA_RE.search(q)) and len(query.split()) <= FOLLOW_UP_MAX_WORDS
+
+    def contextualize(self, query: str) -> str:
+        """
+        Standalone text for retrieval: the follow-up read together with the question it follows.
+        """
+        if self.topic and self.is_follow_up(query):
+            return f"{self.topic} {query}"
+        return query
+
+    def similarity(self, query_vector: list[float]) -> float:
+        return _cosine(query_vector, self.query_vector) if self.query_vector else 0.0
+
+    def remember_retrieval(self, query_vector: list[float], chunks: list[dict[str, Any]]) -> None:
+        self.query_vector = list(query_vector)
+        self.chunks = [dict(c) for c in chunks]
+
+    def history(self, max_tokens: int | None = None) -> list[Turn]:
+        """
+        Most recent turns that fit in `max_tokens`, oldest first.
+        """
+        budget = SESSION_HISTORY_TOKENS if max_tokens is None else max_tokens
+        kept: list[Turn] = []
+        for turn in reversed(self.turns):
+            if turn.tokens > budget:
+                break
+            budget -= turn.tokens
+            kept.append(turn)
+        return kept[::-1]
+
+    def record_turn(self, query: str, result: dict[str, Any]) -> None:
+        follow_up = self.is_follow_up(query)
+        route = result.get("route")
+        answer = str(result.get("answer") or "")
+        self.turns.append(Turn("user", query, route, count_tokens(query)))
+        self.turns.append(Turn("assistant", answer, route, count_tokens(answer)))
+        # Drop turns that can never fit the budget again (bounded memory per session)
+        while len(self.turns) > 2 and sum(t.tokens for t in self.turns[2:]) >= SESSION_HISTORY_TOKENS:
+            del self.turns[:2]
+        if not follow_up or self.topic is None:
+            self.topic = query
+        self.last_route = route or self.last_route
+        if result.get("location"):
+            self.last_location = result["location"]
+        self.updated = time.monotonic()
+
+
+class SessionStore:
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl_seconds
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str | None = None) -> Session:
+        """
+        The session for `session_id` (created if unknown or expired); a new id if None.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.updated > self.ttl:
+                session = None
+            if session is None:
+                session = Session(session_id)
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+SESSIONS = SessionStore()
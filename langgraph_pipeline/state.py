@@ -8,6 +8,10 @@ Route = Literal["weather", "pdf"]
 
 class AgentState(TypedDict):
     query: str
+    # Conversation this query belongs to (see langgraph_pipeline.session); absent = one-shot
+    session_id: NotRequired[str]
+    # Request deadline as a time.monotonic() value (see common.deadline); absent = none
+    deadline: NotRequired[float]
     route: NotRequired[Route]
     route_reason: NotRequired[str]
     result: NotRequired[dict[str, Any]]
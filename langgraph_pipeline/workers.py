@@ -0,0 +1,294 @@
+# pre-fork worker pool: N agent processes sharing read-only data and one request queue
+
+# langgraph_pipeline/workers.py
+
+"""
+The agent is synchronous Python, so one process uses one core. `WorkerPool` runs
+WORKER_PROCESSES copies of `run_agent` that pull from a shared request queue.
+
+Pre-fork: the parent loads everything read-only once (`preload`), then forks. The workers share it:
+  - the compiled graph and the imported service modules (copy-on-write pages, kept clean by
+    `gc.freeze()` so the collector doesn't touch them),
+  - the warm query embeddings, moved into memory-mapped .npy files (common.cache.SHARED_EMBEDDINGS),
+  - the local vector index (RETRIEVER_BACKEND=local), whose matrix is already memory-mapped.
+The mapped files live once in the OS page cache. A worker's private memory is its clients,
+its per-process caches and the requests it serves, so it doesn't grow with the worker count.
+
+Sessions (follow-up questions) live in the process that served them, so the pool serves
+independent questions only. Metrics are per worker; each result still carries its `timings`.
+
+Shutdown drains: `close()` stops accepting work, lets the workers finish every queued request
+(up to WORKER_DRAIN_SECONDS), then stops them. A worker that dies is replaced, and the request
+it was running fails with WorkerError. Each worker sends its results on its own pipe: a worker
+dying mid-write can't leave a shared lock held, and the pipe closing is how its death is noticed.
+
+Run (one question per line on stdin, or a query log; one JSON result per line on stdout):
+  python -m langgraph_pipeline.workers --workers 4 < questions.txt
+  python -m langgraph_pipeline.workers --log queries.jsonl --deadline 10
+
+Env vars:
+  WORKER_PROCESSES=<cpu count>
+  WORKER_DRAIN_SECONDS=30
+  WORKER_START_METHOD=fork      (spawn works too, but then nothing is pre-loaded or shared)
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Any
+
+from common.config import env_float, env_int, env_str, load_env
+
+load_env()
+
+WORKER_PROCESSES = env_int("WORKER_PROCESSES", os.cpu_count() or 1)
+WORKER_DRAIN_SECONDS = env_float("WORKER_DRAIN_SECONDS", 30.0)
+WORKER_START_METHOD = env_str("WORKER_START_METHOD", "fork")
+
+
+_IDLE = -1
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def preload(cache_dir: str | None = None) -> dict[str, int]:
+    """
+    Load the shared read-only data in this (parent) process; returns what was loaded.
+    """
+    from common.cache import EMBEDDINGS, freeze_embeddings
+    from langgraph_pipeline.graph import get_app
+    from openweather_pipeline import service as _weather  # noqa: F401 (code pages shared by the workers)
+    from rag_pipeline import retriever, service as _rag  # noqa: F401
+
+    get_app()
+    loaded = {"shared_embeddings": freeze_embeddings(cache_dir) if EMBEDDINGS.enabled else 0}
+    if retriever.RETRIEVER_BACKEND == "local" and os.path.isdir(retriever.LOCAL_INDEX_DIR):
+        loaded["local_index_rows"] = len(retriever.open_index(retriever.LOCAL_INDEX_DIR))
+    # Objects created so far are never collected, so the collector never writes to their pages
+    gc.collect()
+    gc.freeze()
+    return loaded
+
+
+def _worker(slot: int, jobs, results, current) -> None:
+    # `results` is this worker's end of its own pipe; send() writes in this thread, no feeder
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl-C and drains
+    from langgraph_pipeline.graph import run_agent
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, query, deadline_seconds = job
+        # Shared memory, not a queue message: still readable if this process dies mid-request
+        current[slot] = job_id
+        try:
+            results.send((job_id, "ok", run_agent(query, deadline_seconds=deadline_seconds)))
+        except Exception as e:
+            results.send((job_id, "error", f"{type(e).__name__}: {e}"))
+        current[slot] = _IDLE
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    # Linux only: Rss counts shared pages fully, Pss splits them between the processes mapping them
+    fields = {"Rss": "rss_kb", "Pss": "pss_kb", "Private_Clean": "private_kb", "Private_Dirty": "private_kb"}
+    out: dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    out[fields[name]] = out.get(fields[name], 0) + int(rest.split()[0])
+    except OSError:
+        return {}
+    return out
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        workers: int = WORKER_PROCESSES,
+        start_method: str | None = WORKER_START_METHOD,
+        cache_dir: str | None = None,
+    ):
+        self._ctx = multiprocessing.get_context(start_method)
+        self.preloaded = preload(cache_dir) if self._ctx.get_start_method() == "fork" else {}
+        self._jobs = self._ctx.Queue()
+        self._futures: dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closing = False
+        workers = max(1, workers)
+        # Id of the request each worker is running (_IDLE when waiting)
+        self._current = self._ctx.RawArray("q", [_IDLE] * workers)
+        # Per worker: its process and the parent's end of its result pipe (None once closed)
+        self._procs: list = [None] * workers
+        self._results: list = [None] * workers
+        for slot in range(workers):
+            self._spawn(slot)
+        self._collector = threading.Thread(target=self._collect, name="worker-results", daemon=True)
+        self._collector.start()
+
+    def _spawn(self, slot: int) -> None:
+        self._current[slot] = _IDLE
+        reader, writer = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(target=_worker, args=(slot, self._jobs, writer, self._current), daemon=True)
+        proc.start()
+        writer.close()  # the worker holds the only write end: EOF means it exited
+        self._procs[slot], self._results[slot] = proc, reader
+
+    @property
+    def pids(self) -> list[int]:
+        return [p.pid for p in self._procs]
+
+    def submit(self, query: str, deadline_seconds: float | None = None) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closing:
+                raise WorkerError("worker pool is shutting down")
+            job_id = next(self._ids)
+            self._futures[job_id] = future
+        self._jobs.put((job_id, query, deadline_seconds))
+        return future
+
+    def run(self, query: str, deadline_seconds: float | None = None) -> dict[str, Any]:
+        return self.submit(query, deadline_seconds).result()
+
+    def _collect(self) -> None:
+        # Returns once the pool is closing and every worker's pipe is closed
+        while True:
+            with self._lock:
+                readers = {r: slot for slot, r in enumerate(self._results) if r is not None}
+                if self._closing and not readers:
+                    return
+            for reader in wait(list(readers), timeout=0.5):
+                try:
+                    job_id, kind, payload = reader.recv()
+                except EOFError:
+                    self._worker_exited(readers[reader])
+                    continue
+                with self._lock:
+                    future = self._futures.pop(job_id, None)
+                if future is not None:
+                    if kind == "ok":
+                        future.set_result(payload)
+                    else:
+                        future.set_exception(WorkerError(payload))
+
+    def _worker_exited(self, slot: int) -> None:
+        # Its pipe is drained: fail the request it was running, then replace it unless closing
+        proc = self._procs[slot]
+        proc.join(5)
+        with self._lock:
+            self._results[slot].close()
+            self._results[slot] = None
+            lost = self._futures.pop(self._current[slot], None)
+            if not self._closing:
+                self._spawn(slot)
+        if lost is not None:
+            lost.set_exception(WorkerError(f"worker {proc.pid} exited with code {proc.exitcode}"))
+
+    def memory(self) -> dict[int, dict[str, int]]:
+        """
+        Per-worker memory from /proc (empty off Linux): rss_kb, pss_kb and private_kb.
+        """
+        return {p.pid: _memory_kb(p.pid) for p in self._procs if p.is_alive()}
+
+    def close(self, drain: bool = True, timeout: float = WORKER_DRAIN_SECONDS) -> None:
+        """
+        Stop accepting requests. With `drain` the queued ones still run; otherwise they are cancelled.
+        Workers still busy after `timeout` seconds are terminated.
+        """
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+        if not drain:
+            while True:
+                try:
+                    job = self._jobs.get(timeout=0.05)
+                except queue.Empty:
+                    break
+                if job is not None:
+                    with self._lock:
+                        future = self._futures.pop(job[0], None)
+                    if future is not None:
+                        future.cancel()
+        # One stop marker per worker, behind every queued request
+        for _ in self._procs:
+            self._jobs.put(None)
+        end = time.monotonic() + timeout
+        for proc in self._procs:
+            proc.join(max(0.0, end - time.monotonic()))
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        self._collector.join()
+        with self._lock:
+            left, self._futures = list(self._futures.values()), {}
+        for future in left:
+            future.set_exception(WorkerError("worker pool shut down before the request finished"))
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=WORKER_PROCESSES)
+    parser.add_argument("--log", default=None, help="Query log (JSONL or plain text); default: stdin, one per line")
+    parser.add_argument("--field", default="query", help="JSON field holding the query")
+    parser.add_argument("--deadline", type=float, default=None, help="Per-request deadline in seconds")
+    args = parser.parse_args(argv)
+
+    if args.log:
+        from benchmarks.loadgen import load_query_log
+
+        queries = load_query_log(args.log, args.field)
+    else:
+        queries = [line.strip() for line in sys.stdin if line.strip()]
+
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    failed = 0
+    with WorkerPool(args.workers) as pool:
+        print(f"{len(pool.pids)} workers, pre-loaded {pool.preloaded}", file=sys.stderr)
+        pending = [(q, pool.submit(q, args.deadline)) for q in queries]
+        while pending:
+            q, future = pending[0]
+            try:
+                out = future.result()
+            except KeyboardInterrupt:
+                print(f"Draining {len(pending)} requests ...", file=sys.stderr)
+                pool.close()
+                continue
+            except Exception as e:
+                failed += 1
+                out = {"query": q, "error": str(e)}
+            pending.pop(0)
+            print(json.dumps(out, ensure_ascii=False, default=str), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
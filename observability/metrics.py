@@ -0,0 +1,341 @@
+"""
+In-process metrics: stage timings, token counts and cache hits.
+
+Goal:
+Tell whether a slow request was routing, embedding, Qdrant search, OWM or generation
+without relying on LangSmith spans alone.
+
+Usage:
+  with timed("qdrant.search"):
+      ...
+  record_tokens("rag_answer_generation", response)
+  record_cache("embedding", hit=True)
+  record_hedge("qdrant.search", won=True)
+
+Every `timed(...)` block feeds a process-wide histogram (exported in Prometheus text
+format via `render_prometheus()`) and, when a request is being tracked with
+`track_request()`, the per-request `timings` dict returned by `run_agent`.
+
+Env vars:
+  METRICS_ENABLED=true   (optional, default false; when off every hook is a no-op)
+  METRICS_PORT=9464      (optional, the Streamlit app serves /metrics on this port)
+  DEBUG_ENDPOINTS=false  (optional; true also serves the /debug/profile and /debug/slow endpoints of
+                         observability.profiler, which expose queries and answers: keep them off
+                         on a port others can reach)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from common.config import env_flag, load_env
+
+load_env()
+
+# Seconds. Covers sub-ms local hops up to slow LLM generations.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_enabled = env_flag("METRICS_ENABLED")
+DEBUG_ENDPOINTS = env_flag("DEBUG_ENDPOINTS")
+
+# Per-request timings (stage -> seconds). None means "no request is being tracked".
+_request_timings: ContextVar[dict[str, float] | None] = ContextVar("request_timings", default=None)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    """
+    Toggle collection at runtime (tests, benchmarks, the Streamlit app).
+    """
+    global _enabled
+    _enabled = bool(value)
+
+
+class Histogram:
+    """
+    Fixed-bucket cumulative histogram (Prometheus semantics).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store for histograms and counters, keyed by (metric, labels).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def histogram(self, name: str, **labels: str) -> Histogram | None:
+        with self._lock:
+            return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines: list[str] = []
+        typed: set[str] = set()
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, le=_fmt_float(bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, le='+Inf')} {hist.count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_float(hist.sum)}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_fmt_labels(labels)} {_fmt_float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_float(v: float) -> str:
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: tuple[tuple[str, str], ...], **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = "agent_stage_seconds"
+LLM_TOKENS = "agent_llm_tokens_total"
+CACHE_REQUESTS = "agent_cache_requests_total"
+HEDGED_CALLS = "agent_hedged_calls_total"
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.start
+        REGISTRY.observe(STAGE_SECONDS, elapsed, stage=self.stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            # Accumulate: a stage can run several times per request (e.g. OWM candidates).
+            timings[self.stage] = timings.get(self.stage, 0.0) + elapsed
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage: str) -> _Timer | _NoopTimer:
+    """
+    Time a block under `stage` (e.g. "node.route", "embed.query", "llm.rag").
+    Returns a shared no-op context manager when metrics are disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Timer(stage)
+
+
+def record_tokens(component: str, response: Any) -> None:
+    """
+    Count LLM tokens from a LangChain message's `usage_metadata` (if the provider returned it).
+    """
+    if not _enabled:
+        return
+    usage = getattr(response, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        n = usage.get(kind)
+        if isinstance(n, (int, float)) and n:
+            REGISTRY.inc(LLM_TOKENS, n, component=component, kind=kind.split("_", 1)[0])
+            timings = _request_timings.get()
+            if timings is not None:
+                key = f"tokens.{kind.split('_', 1)[0]}"
+                timings[key] = timings.get(key, 0) + n
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup for `cache` (e.g. "embedding", "route", "answer").
+    """
+    if not _enabled:
+        return
+    REGISTRY.inc(CACHE_REQUESTS, cache=cache, result="hit" if hit else "miss")
+    timings = _request_timings.get()
+    if timings is not None and hit:
+        key = f"cache_hit.{cache}"
+        timings[key] = timings.get(key, 0) + 1
+
+
+def record_hedge(stage: str, won: bool) -> None:
+    """
+    Count a hedged call for `stage` (see common.deadline) and whether the duplicate finished first.
+    """
+    if not _enabled:
+        return
+    REGISTRY.inc(HEDGED_CALLS, stage=stage, result="won" if won else "lost")
+    timings = _request_timings.get()
+    if timings is not None:
+        key = f"hedge.{stage}"
+        timings[key] = timings.get(key, 0) + 1
+
+
+@contextmanager
+def track_request() -> Iterator[dict[str, float]]:
+    """
+    Collect the timings of every `timed(...)` block run while the context is active
+    (including LangGraph nodes, which inherit the context). Yields the dict being filled.
+    """
+    timings: dict[str, float] = {}
+    if not _enabled:
+        yield timings
+        return
+    token = _request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        total = time.perf_counter() - start
+        timings["total"] = total
+        REGISTRY.observe(STAGE_SECONDS, total, stage="total")
+        _request_timings.reset(token)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def _debug_response(path: str, params: dict[str, list[str]]) -> tuple[int, str, str]:
+    # (status, content type, body) for the profiler endpoints
+    import json
+
+    from observability import profiler
+
+    if path == "/debug/profile":
+        try:
+            seconds = float(params.get("seconds", ["10"])[0])
+            out = profiler.profile(seconds)
+        except ValueError:
+            return 400, "text/plain", "seconds must be a number\n"
+        except RuntimeError as e:
+            return 409, "text/plain", f"{e}\n"
+        return 200, "text/plain", out.read_text(encoding="utf-8")
+    try:
+        limit = max(0, int(params.get("limit", ["20"])[0]))
+    except ValueError:
+        return 400, "text/plain", "limit must be an integer\n"
+    return 200, "application/json", json.dumps(profiler.slow_log().entries(limit), default=str)
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", debug: bool | None = None):
+    """
+    Serve `GET /metrics` from a daemon thread (stdlib only). Returns the server.
+    With `debug` (default: DEBUG_ENDPOINTS) also serves `GET /debug/profile?seconds=N` (sample
+    stacks for N seconds, collapsed-stack text) and `GET /debug/slow?limit=N` (the latest slow
+    requests as JSON), see observability.profiler.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    debug = DEBUG_ENDPOINTS if debug is None else debug
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802 (http.server API)
+            url = urlsplit(self.path)
+            path = url.path.rstrip("/")
+            if path == "/metrics":
+                status, content_type, text = 200, "text/plain; version=0.0.4", render_prometheus()
+            elif debug and path in ("/debug/profile", "/debug/slow"):
+                status, content_type, text = _debug_response(path, parse_qs(url.query))
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = text.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # keep stdout clean
+            return
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
@@ -0,0 +1,298 @@
+# on-demand stack sampling (collapsed-stack output) and a ring buffer of slow requests
+
+# observability/profiler.py
+
+"""
+Where the Python time goes between spans: candidate loops, hit formatting, prompt building.
+
+Sampling profiler:
+  A daemon thread reads every thread's stack (`sys._current_frames()`) each PROFILE_INTERVAL_MS
+  for a window of seconds and writes the counts as collapsed stacks, one line per distinct stack:
+      <thread>;<frame>;<frame>;... <samples>
+  with frames as `function (path/file.py:first_line)`. flamegraph.pl, speedscope and inferno read it.
+  Threads parked in a lock, queue or select (idle pool threads, servers) are left out unless
+  `idle=True`, so the graph shows work, not waiting.
+  Nothing runs outside a window. Start one with:
+    - GET /debug/profile?seconds=10 on the metrics server (returns the file's content),
+    - PROFILE_ON_START_SECONDS=30 (the first window starts when the graph is built),
+    - python -m observability.profiler (runs queries through the agent while sampling).
+
+Slow requests:
+  With SLOW_REQUEST_SECONDS > 0, every request that takes at least that long is written to
+  SLOW_REQUEST_DIR as slow-<slot>.json (its answer, timing breakdown and graph state), in a ring
+  of SLOW_REQUEST_KEEP files: the oldest is overwritten. GET /debug/slow lists them, newest first.
+  The breakdown comes from the metrics timers, so this turns metrics collection on.
+
+Env vars:
+  PROFILE_INTERVAL_MS=5
+  PROFILE_DIR=data/profiles
+  PROFILE_ON_START_SECONDS=0
+  SLOW_REQUEST_SECONDS=0           (0 = off)
+  SLOW_REQUEST_DIR=data/slow_requests
+  SLOW_REQUEST_KEEP=50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from common.config import env_float, env_int, load_env
+from observability import metrics
+
+load_env()
+
+PROFILE_INTERVAL_MS = env_float("PROFILE_INTERVAL_MS", 5.0)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_ON_START_SECONDS = env_float("PROFILE_ON_START_SECONDS", 0.0)
+SLOW_REQUEST_SECONDS = env_float("SLOW_REQUEST_SECONDS", 0.0)
+SLOW_REQUEST_DIR = os.getenv("SLOW_REQUEST_DIR", "data/slow_requests")
+SLOW_REQUEST_KEEP = env_int("SLOW_REQUEST_KEEP", 50)
+# Longest window a single profile may run (the endpoint takes the duration from the caller)
+MAX_PROFILE_SECONDS = 300.0
+
+if SLOW_REQUEST_SECONDS > 0:
+    metrics.set_enabled(True)
+
+_ROOT = str(Path(__file__).resolve().parents[1]) + os.sep
+# A stack whose innermost Python frame is in one of these is waiting, not working
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "socketserver.py")
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = path[len(_ROOT):]
+    elif "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def collapse(frame, thread_name: str) -> str:
+    """
+    One stack as `thread;outermost;...;innermost` (the collapsed-stack format).
+    """
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join([thread_name.replace(";", ":").replace(" ", "_"), *reversed(labels)])
+
+
+class StackSampler:
+    """
+    Counts the stacks of every other thread, sampled every `interval` seconds between start() and stop().
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000, idle: bool = False):
+        self.interval = interval
+        self.idle = idle
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (not self.idle and frame.f_code.co_filename.endswith(_IDLE_FILES)):
+                    continue
+                self.counts[collapse(frame, names.get(ident, str(ident)))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.counts
+
+
+def write_collapsed(counts: Counter[str], path: str | os.PathLike) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in counts.most_common():
+            f.write(f"{stack} {n}\n")
+    return path
+
+
+_profile_lock = threading.Lock()
+
+
+def _profile_path(out_dir: str | os.PathLike | None) -> Path:
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+    return Path(out_dir or PROFILE_DIR) / f"profile-{stamp}-{os.getpid()}.collapsed"
+
+
+def profile(seconds: float, out_dir: str | os.PathLike | None = None, interval: float | None = None) -> Path:
+    """
+    Sample all threads for `seconds` (blocking) and write PROFILE_DIR/profile-<time>.collapsed.
+    Raises ValueError for a duration that isn't a finite number and RuntimeError if another
+    window is already running.
+    """
+    seconds = float(seconds)
+    if not math.isfinite(seconds):
+        raise ValueError(f"seconds must be finite, got {seconds}")
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        sampler = StackSampler(interval or PROFILE_INTERVAL_MS / 1000).start()
+        try:
+            time.sleep(min(max(seconds, 0.0), MAX_PROFILE_SECONDS))
+        finally:
+            counts = sampler.stop()
+    finally:
+        _profile_lock.release()
+    return write_collapsed(counts, _profile_path(out_dir))
+
+
+def profile_in_background(seconds: float, out_dir: str | os.PathLike | None = None) -> threading.Thread:
+    thread = threading.Thread(target=profile, args=(seconds, out_dir), name="profile-window", daemon=True)
+    thread.start()
+    return thread
+
+
+_started_from_env = False
+
+
+def start_from_env() -> None:
+    """
+    Start the PROFILE_ON_START_SECONDS window, once per process.
+    """
+    global _started_from_env
+    if PROFILE_ON_START_SECONDS > 0 and not _started_from_env:
+        _started_from_env = True
+        profile_in_background(PROFILE_ON_START_SECONDS)
+
+
+class SlowRequestLog:
+    """
+    The last `keep` slow requests, one JSON file each (slow-000.json ...), overwritten in a ring.
+    """
+
+    def __init__(self, directory: str | os.PathLike, keep: int = SLOW_REQUEST_KEEP):
+        self.directory = Path(directory)
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+
+    def _files(self) -> list[Path]:
+        return sorted(self.directory.glob("slow-*.json")) if self.directory.exists() else []
+
+    def record(self, entry: dict[str, Any]) -> Path:
+        # The first free slot, else the oldest file: works for several processes sharing the directory
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            names = [f"slow-{i:03d}.json" for i in range(self.keep)]
+            present = {p.name: p for p in self._files()}
+            free = [n for n in names if n not in present]
+            name = free[0] if free else min(names, key=lambda n: present[n].stat().st_mtime_ns)
+            path = self.directory / name
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+            os.replace(tmp, path)
+            # Exact write order even where the filesystem clock is coarse
+            now = time.time_ns()
+            os.utime(path, ns=(now, now))
+        return path
+
+    def entries(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """
+        Recorded requests, newest first.
+        """
+        files = sorted(self._files(), key=lambda p: p.stat().st_mtime_ns, reverse=True)[:limit]
+        return [json.loads(p.read_text(encoding="utf-8")) for p in files]
+
+
+_slow_log: SlowRequestLog | None = None
+
+
+def slow_log() -> SlowRequestLog:
+    global _slow_log
+    if _slow_log is None or _slow_log.directory != Path(SLOW_REQUEST_DIR):
+        _slow_log = SlowRequestLog(SLOW_REQUEST_DIR, SLOW_REQUEST_KEEP)
+    return _slow_log
+
+
+def capture_slow_request(output: dict[str, Any], state: dict[str, Any], seconds: float) -> Path | None:
+    """
+    Record a finished request (run_agent output plus the final graph state) if it took at least
+    SLOW_REQUEST_SECONDS. Returns the file written, if any.
+    """
+    if SLOW_REQUEST_SECONDS <= 0 or seconds < SLOW_REQUEST_SECONDS:
+        return None
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "pid": os.getpid(),
+        "seconds": round(seconds, 4),
+        "threshold_seconds": SLOW_REQUEST_SECONDS,
+        "query": output.get("query"),
+        "route": output.get("route"),
+        "timings": output.get("timings") or {},
+        "output": {k: v for k, v in output.items() if k != "timings"},
+        "state": {k: v for k, v in state.items() if k != "result"},
+    }
+    return slow_log().record(entry)
+
+
+def main(argv: list[str] | None = None) -> Path:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--query", action="append", default=[], help="Question to run (repeatable)")
+    parser.add_argument("--log", default=None, help="Query log (JSONL or plain text) to run instead")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of each question")
+    parser.add_argument("--fake", action="store_true", help="Use the offline stand-ins from benchmarks.fakes")
+    parser.add_argument("--interval-ms", type=float, default=PROFILE_INTERVAL_MS)
+    parser.add_argument("--idle", action="store_true", help="Also count threads that are only waiting")
+    parser.add_argument("--out", default=None, help="Output file (default: PROFILE_DIR/profile-<time>.collapsed)")
+    args = parser.parse_args(argv)
+
+    from contextlib import nullcontext
+
+    from langgraph_pipeline.graph import run_agent
+
+    if args.log:
+        from benchmarks.loadgen import load_query_log
+
+        queries = load_query_log(args.log)
+    else:
+        from langgraph_pipeline.prewarm import quick_questions
+
+        queries = args.query or quick_questions()
+
+    if args.fake:
+        from benchmarks.fakes import FakeProfile, install_fakes
+
+        context = install_fakes(FakeProfile.zero())
+    else:
+        context = nullcontext()
+    with context:
+        sampler = StackSampler(args.interval_ms / 1000, idle=args.idle).start()
+        for _ in range(args.repeat):
+            for q in queries:
+                run_agent(q, deadline_seconds=0)
+        counts = sampler.stop()
+
+    path = write_collapsed(counts, args.out or _profile_path(None))
+    print(f"{sampler.samples} samples, {len(counts)} distinct stacks -> {path}")
+    print("Render: flamegraph.pl", path, "> profile.svg  (or open it in https://www.speedscope.app)")
+    return path
+
+
+if __name__ == "__main__":
+    main()
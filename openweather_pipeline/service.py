@@ -18,15 +18,19 @@ import re
 import json
 from typing import Any
 
-from dotenv import load_dotenv
 from pyowm.commons.exceptions import NotFoundError
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 
+from common.config import load_env
+from common.deadline import DeadlineExceeded, call, client_timeout
+from common.lazy import lazy
+from observability.metrics import record_tokens, timed
 from openweather_pipeline.weather import WeatherTool
 
-load_dotenv()
+load_env()
+
+ChatOpenAI = lazy("langchain_openai", "ChatOpenAI")
 
 
 _CITY_RE = re.compile(
@@ -132,7 +136,7 @@ def _llm_extract_location(query: str) -> str | None:
     Returns None if no location is present.
     """
     model = os.getenv("OPENAI_LOCATION_MODEL", os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini"))
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = ChatOpenAI(model=model, temperature=0, timeout=client_timeout())
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -149,7 +153,13 @@ def _llm_extract_location(query: str) -> str | None:
         ]
     )
 
-    raw = (prompt | llm | StrOutputParser()).invoke({"query": query}).strip()
+    try:
+        with timed("llm.location"):
+            response = call("llm.location", (prompt | llm).invoke, {"query": query})
+    except DeadlineExceeded:
+        return None
+    record_tokens("location_extraction", response)
+    raw = StrOutputParser().invoke(response).strip()
     try:
         data = json.loads(raw)
     except Exception:
@@ -162,13 +172,23 @@ def _llm_extract_location(query: str) -> str | None:
     return loc or None
 
 
-def answer_from_weather(query: str) -> dict[str, Any]:
+def _degraded(result: dict[str, Any]) -> dict[str, Any]:
+    # WeatherTool answers with the raw report when the deadline cut the LLM summary short
+    return {"degraded": result["degraded"]} if result.get("degraded") else {}
+
+
+def answer_from_weather(query: str, session=None) -> dict[str, Any]:
     """
     Answer a weather query using OpenWeatherMap + LLM summarization.
     Returns structured output for callers.
+
+    With a conversation `session`, a follow-up without a location ("and tomorrow?",
+    "is it windy there?") uses the location of the previous weather answer.
     """
     tool = WeatherTool()
     candidates = _location_candidates(query)
+    if not candidates and session is not None and session.last_location and session.is_follow_up(query):
+        candidates = [session.last_location]
     if not candidates:
         # Weather intent is clear but we couldn't parse a location deterministically.
         # Use LLM extraction before asking the user to rephrase.
@@ -185,41 +205,53 @@ def answer_from_weather(query: str) -> dict[str, Any]:
             }
 
     last_err: Exception | None = None
-    for location in candidates:
-        try:
-            result = tool.run(location)
-            break
-        except NotFoundError as e:
-            last_err = e
-    else:
-        # All rule-derived candidates failed; try LLM extraction as a fallback.
-        llm_loc = _llm_extract_location(query)
-        if llm_loc:
+    try:
+        for location in candidates:
             try:
-                result = tool.run(llm_loc)
+                result = tool.run(location)
+                break
             except NotFoundError as e:
                 last_err = e
-            else:
-                return {
-                    "route": "weather",
-                    "query": query,
-                    "location": llm_loc,
-                    "answer": result.get("answer"),
-                    "raw_weather": result.get("raw_weather"),
-                    "route_reason": "llm_location_fallback",
-                }
-
-        # Still failed
+        else:
+            # All rule-derived candidates failed; try LLM extraction as a fallback.
+            llm_loc = _llm_extract_location(query)
+            if llm_loc:
+                try:
+                    result = tool.run(llm_loc)
+                except NotFoundError as e:
+                    last_err = e
+                else:
+                    return {
+                        "route": "weather",
+                        "query": query,
+                        "location": llm_loc,
+                        "answer": result.get("answer"),
+                        "raw_weather": result.get("raw_weather"),
+                        "route_reason": "llm_location_fallback",
+                        **_degraded(result),
+                    }
+
+            # Still failed
+            return {
+                "route": "weather",
+                "query": query,
+                "location": candidates[0],
+                "answer": (
+                    "I couldn't find that location in OpenWeatherMap. "
+                    "Try a city name like 'Amritsar' or 'Amritsar, IN'."
+                ),
+                "raw_weather": None,
+                "error": str(last_err) if last_err else "NotFoundError",
+            }
+    except DeadlineExceeded:
+        # OpenWeatherMap itself didn't answer before the request deadline
         return {
             "route": "weather",
             "query": query,
             "location": candidates[0],
-            "answer": (
-                "I couldn't find that location in OpenWeatherMap. "
-                "Try a city name like 'Amritsar' or 'Amritsar, IN'."
-            ),
+            "answer": "The weather service didn't answer in time. Please try again.",
             "raw_weather": None,
-            "error": str(last_err) if last_err else "NotFoundError",
+            "degraded": "deadline",
         }
 
     # Normalize output shape for LangGraph/Streamlit
@@ -229,6 +261,7 @@ def answer_from_weather(query: str) -> dict[str, Any]:
         "location": result.get("location", candidates[0]),
         "answer": result.get("answer"),
         "raw_weather": result.get("raw_weather"),
+        **_degraded(result),
     }
 
 
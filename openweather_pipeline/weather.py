@@ -1,12 +1,18 @@
 import os
-from dotenv import load_dotenv
 from typing import Dict, Any
 
-from langchain_community.utilities import OpenWeatherMapAPIWrapper
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
-load_dotenv()
+from common.config import load_env
+from common.deadline import DeadlineExceeded, call, client_timeout
+from common.lazy import lazy
+from observability.metrics import record_tokens, timed
+
+load_env()
+
+# langchain_community / langchain_openai load on first use of the weather route
+OpenWeatherMapAPIWrapper = lazy("langchain_community.utilities", "OpenWeatherMapAPIWrapper")
+ChatOpenAI = lazy("langchain_openai", "ChatOpenAI")
 
 CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 
@@ -30,7 +36,8 @@ class WeatherService:
         """
         Returns raw weather text from OpenWeatherMap.
         """
-        return self.client.run(location)
+        with timed("owm.fetch"):
+            return call("owm.fetch", self.client.run, location)
 
 
 class WeatherAnswerGenerator:
@@ -42,6 +49,7 @@ class WeatherAnswerGenerator:
         self.llm = ChatOpenAI(
             model=CHAT_MODEL,
             temperature=0,
+            timeout=client_timeout(),
         )
 
     def generate_answer(self, location: str, weather_text: str) -> str:
@@ -62,13 +70,17 @@ class WeatherAnswerGenerator:
         ]
 
         # Tag weather generation runs for easy filtering in LangSmith (even if we don't evaluate them).
-        response = self.llm.invoke(
-            messages,
-            config={
-                "tags": ["weather"],
-                "metadata": {"route": "weather", "component": "weather_answer_generation"},
-            },
-        )
+        with timed("llm.weather"):
+            response = call(
+                "llm.weather",
+                self.llm.invoke,
+                messages,
+                config={
+                    "tags": ["weather"],
+                    "metadata": {"route": "weather", "component": "weather_answer_generation"},
+                },
+            )
+        record_tokens("weather_answer_generation", response)
         return response.content
 
 
@@ -83,10 +95,20 @@ class WeatherTool:
 
     def run(self, location: str) -> Dict[str, Any]:
         """
-        End-to-end weather flow.
+        End-to-end weather flow. If the request deadline runs out during summarization,
+        the raw OpenWeatherMap report is the answer.
         """
         raw_weather = self.weather_service.get_weather(location)
-        answer = self.answer_generator.generate_answer(location, raw_weather)
+        try:
+            answer = self.answer_generator.generate_answer(location, raw_weather)
+        except DeadlineExceeded:
+            return {
+                "route": "weather",
+                "location": location,
+                "raw_weather": raw_weather,
+                "answer": raw_weather,
+                "degraded": "deadline",
+            }
 
         return {
             "route": "weather",
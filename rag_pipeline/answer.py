@@ -16,17 +16,19 @@ Optional env vars:
 
 import os
 
-from dotenv import load_dotenv
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 
+from common.config import env_int, env_str, load_env
+from common.lazy import lazy
 from rag_pipeline.retriever import QdrantRetriever
 
-load_dotenv()
+load_env()
 
-CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL")
-TOP_K = int(os.getenv("RAG_TOP_K"))
+ChatOpenAI = lazy("langchain_openai", "ChatOpenAI")
+
+CHAT_MODEL = env_str("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+TOP_K = env_int("RAG_TOP_K", 4)
 
 
 def _format_context(retrieved: list[dict]) -> str:
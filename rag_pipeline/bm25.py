@@ -0,0 +1,204 @@
+# sparse (BM25) index built at ingest, fused with dense retrieval
+
+# rag_pipeline/bm25.py
+
+"""
+Compact BM25 inverted index for exact-term queries (model names, years, acronyms) that
+dense embeddings tend to miss.
+
+On-disk layout (one directory, BM25_INDEX_DIR):
+  postings.npz     CSR postings: offsets int64[n_terms + 1], doc_ids int32[nnz], tfs uint16[nnz],
+                   doc_len int32[n_docs]
+  vocab.json       {"term": term_id, ...}
+  payloads.jsonl   one JSON object per doc: {"id": ..., "payload": {...}}
+
+Postings for term t are doc_ids[offsets[t]:offsets[t + 1]], so a query touches only the
+arrays of its own terms and scoring is a handful of vectorised numpy ops.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+POSTINGS_FILE = "postings.npz"
+VOCAB_FILE = "vocab.json"
+PAYLOADS_FILE = "payloads.jsonl"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Deliberately short: years, single letters in acronyms etc. must survive.
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were what when "
+    "where which who why with how does do did".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(
+        self,
+        vocab: dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        ids: list[str],
+        payloads: list[dict[str, Any]],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.ids = ids
+        self.payloads = payloads
+        self.k1 = k1
+        self.b = b
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "BM25Index":
+        path = Path(path)
+        with np.load(path / POSTINGS_FILE) as z:
+            arrays = {k: z[k] for k in ("offsets", "doc_ids", "tfs", "doc_len")}
+        with open(path / VOCAB_FILE, encoding="utf-8") as f:
+            vocab = json.load(f)
+        ids: list[str] = []
+        payloads: list[dict[str, Any]] = []
+        with open(path / PAYLOADS_FILE, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row["id"])
+                payloads.append(row["payload"])
+        return cls(vocab, ids=ids, payloads=payloads, **arrays)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def search(self, query: str, top_k: int) -> list[tuple[float, dict[str, Any]]]:
+        """
+        BM25 top-k, best first, as (score, payload) pairs. Docs sharing no term are never returned.
+        """
+        n = len(self.payloads)
+        if n == 0 or top_k <= 0:
+            return []
+        scores = np.zeros(n, dtype=np.float32)
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / self.avgdl)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            docs = self.doc_ids[lo:hi]
+            tf = self.tfs[lo:hi].astype(np.float32)
+            df = hi - lo
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm[docs])
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(scores[hits], len(hits) - top_k)[len(hits) - top_k :]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(float(scores[i]), self.payloads[i]) for i in hits]
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path: str, mtime_ns: int) -> BM25Index:
+    return BM25Index.load(path)
+
+
+def open_bm25(path: str | os.PathLike) -> BM25Index:
+    """
+    Load once per process; reloads automatically after a re-ingest rewrites the index.
+    """
+    path = str(path)
+    return _load_cached(path, os.stat(Path(path) / POSTINGS_FILE).st_mtime_ns)
+
+
+class BM25Writer:
+    """
+    Same interface as `LocalIndexWriter` (upsert / set_payload / close), fed from ingest.
+    Tokenizes payload["text"]; postings are built on `close()`.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self._rows: dict[str, int] = {}
+        self._ids: list[str] = []
+        self._payloads: list[dict[str, Any]] = []
+
+    def upsert(self, ids: Sequence[str], payloads: Sequence[dict[str, Any]]) -> None:
+        for point_id, payload in zip(ids, payloads):
+            point_id = str(point_id)
+            row = self._rows.get(point_id)
+            if row is None:
+                self._rows[point_id] = len(self._ids)
+                self._ids.append(point_id)
+                self._payloads.append(dict(payload))
+            else:
+                self._payloads[row] = dict(payload)
+
+    def set_payload(self, point_id: str, payload: dict[str, Any]) -> None:
+        self._payloads[self._rows[str(point_id)]].update(payload)
+
+    def close(self) -> int:
+        vocab: dict[str, int] = {}
+        per_term: list[list[tuple[int, int]]] = []
+        doc_len = np.zeros(len(self._payloads), dtype=np.int32)
+        for doc, payload in enumerate(self._payloads):
+            tokens = tokenize(payload.get("text") or "")
+            doc_len[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                t = vocab.setdefault(term, len(vocab))
+                if t == len(per_term):
+                    per_term.append([])
+                per_term[t].append((doc, min(tf, 65535)))
+
+        offsets = np.zeros(len(per_term) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in per_term])
+        doc_ids = np.fromiter((d for p in per_term for d, _ in p), dtype=np.int32, count=int(offsets[-1]))
+        tfs = np.fromiter((tf for p in per_term for _, tf in p), dtype=np.uint16, count=int(offsets[-1]))
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = {name: self.path / (name + ".tmp") for name in (POSTINGS_FILE, VOCAB_FILE, PAYLOADS_FILE)}
+        with open(tmp[POSTINGS_FILE], "wb") as f:
+            np.savez(f, offsets=offsets, doc_ids=doc_ids, tfs=tfs, doc_len=doc_len)
+        with open(tmp[VOCAB_FILE], "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(tmp[PAYLOADS_FILE], "w", encoding="utf-8") as f:
+            for point_id, payload in zip(self._ids, self._payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+        # postings last: open_bm25 keys its cache on the postings mtime
+        os.replace(tmp[VOCAB_FILE], self.path / VOCAB_FILE)
+        os.replace(tmp[PAYLOADS_FILE], self.path / PAYLOADS_FILE)
+        os.replace(tmp[POSTINGS_FILE], self.path / POSTINGS_FILE)
+        return len(self._ids)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[dict]], k: int = 60) -> list[dict]:
+    """
+    Fuse ranked result lists (retriever dicts) by sum of 1 / (k + rank), keyed on (page, chunk_ref).
+    The first list's dict wins for hits present in several lists (keeps the dense cosine score).
+    """
+    fused: dict[tuple, float] = {}
+    first: dict[tuple, dict] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = (hit.get("page"), hit.get("chunk_ref"))
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            first.setdefault(key, hit)
+    order = sorted(fused, key=lambda key: fused[key], reverse=True)
+    return [first[key] for key in order]
@@ -0,0 +1,166 @@
+# durable ingest checkpoints + progress / eta reporting
+
+# rag_pipeline/checkpoint.py
+
+"""
+Makes `ingest_pdf()` resumable. Each embedded batch is spilled to disk before it is written
+to the index, and a cursor records how many batches are fully written:
+
+  INGEST_CHECKPOINT_DIR/
+    state.json          {"fingerprint": ..., "written": <batches fully upserted>}
+    batch-000042.npz    ids + float32 vectors of batch 42
+
+On restart (same PDF, embedding and chunking settings -> same fingerprint) the chunk stream is
+rebuilt, which is cheap and deterministic. Batches with a spill file are not embedded again.
+Batches below the cursor are only replayed into the in-memory state (registry, page centroids,
+BM25 / local index writers) and are not upserted a second time. A successful run deletes the
+directory. A changed fingerprint discards the stale checkpoint.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+STATE_FILE = "state.json"
+
+
+def run_fingerprint(**parts: Any) -> str:
+    """
+    Stable hash of everything that decides the chunk stream and its vectors.
+    """
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()
+
+
+def file_fingerprint(path: str | os.PathLike) -> dict[str, Any]:
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class IngestCheckpoint:
+    def __init__(self, path: str | os.PathLike, fingerprint: str, resume: bool = True):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.written = 0
+        state = self._read_state() if resume else None
+        if state and state.get("fingerprint") == fingerprint:
+            self.written = int(state.get("written", 0))
+        else:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._write_state()
+        # Batches already written when this run started (they are replayed, not re-sent)
+        self.resumed_from = self.written
+
+    def _read_state(self) -> dict[str, Any] | None:
+        try:
+            return json.loads((self.path / STATE_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self) -> None:
+        tmp = self.path / (STATE_FILE + ".tmp")
+        tmp.write_text(json.dumps({"fingerprint": self.fingerprint, "written": self.written}), encoding="utf-8")
+        os.replace(tmp, self.path / STATE_FILE)
+
+    def _spill_path(self, batch: int) -> Path:
+        return self.path / f"batch-{batch:06d}.npz"
+
+    def load_vectors(self, batch: int, ids: Sequence[str]) -> list[list[float]] | None:
+        """
+        Spilled vectors for `batch`, or None if it was never embedded (or holds other chunks).
+        """
+        spill = self._spill_path(batch)
+        if not spill.exists():
+            return None
+        try:
+            with np.load(spill) as data:
+                if data["ids"].tolist() != list(ids):
+                    return None
+                return data["vectors"].tolist()
+        except (OSError, ValueError, KeyError):
+            return None  # torn write from a crash: embed again
+
+    def spill(self, batch: int, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        tmp = self.path / f"batch-{batch:06d}.tmp.npz"
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.array(list(ids)), vectors=np.asarray(vectors, dtype=np.float32))
+        os.replace(tmp, self._spill_path(batch))
+
+    def is_written(self, batch: int) -> bool:
+        return batch < self.written
+
+    def mark_written(self, batch: int) -> None:
+        self.written = max(self.written, batch + 1)
+        self._write_state()
+
+    def finish(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class IngestProgress:
+    """
+    Periodic "pages done / total, chunks, rate, ETA" line. The rate only counts pages processed
+    live in this run, so replayed batches after a resume don't make the ETA look optimistic.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        out: Callable[[str], None] = print,
+    ):
+        self.interval = interval_seconds
+        self.clock = clock
+        self.out = out
+        self.started = clock()
+        self._last_report = self.started
+        self._live_start: tuple[float, int] | None = None  # (time, pages done) at first live batch
+        self.pages_done = 0
+        self.total_pages = 0
+        self.chunks = 0
+
+    def update(self, pages_done: int, total_pages: int, chunks: int, live: bool = True) -> None:
+        self.pages_done, self.total_pages = pages_done, total_pages
+        self.chunks += chunks
+        now = self.clock()
+        if live and self._live_start is None:
+            self._live_start = (now, pages_done)
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.out(self.line(now))
+
+    def eta_seconds(self, now: float | None = None) -> float | None:
+        if self._live_start is None:
+            return None
+        now = self.clock() if now is None else now
+        t0, p0 = self._live_start
+        done = self.pages_done - p0
+        if done <= 0 or now <= t0:
+            return None
+        return (self.total_pages - self.pages_done) * (now - t0) / done
+
+    def line(self, now: float | None = None) -> str:
+        now = self.clock() if now is None else now
+        pct = 100.0 * self.pages_done / self.total_pages if self.total_pages else 0.0
+        eta = self.eta_seconds(now)
+        eta_txt = f"ETA {_fmt_duration(eta)}" if eta is not None else "ETA --"
+        return (
+            f"Ingest: page {self.pages_done}/{self.total_pages} ({pct:.1f}%), {self.chunks} chunks, "
+            f"{_fmt_duration(now - self.started)} elapsed, {eta_txt}"
+        )
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h{m:02d}m{s:02d}s" if h else f"{m}m{s:02d}s"
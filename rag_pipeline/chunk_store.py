@@ -0,0 +1,125 @@
+# chunk text kept next to the app instead of in qdrant payloads
+
+# rag_pipeline/chunk_store.py
+
+"""
+Content-addressed chunk store: chunk text keyed by `point_id` (a UUID derived from the
+chunk_ref, which itself hashes the text), so Qdrant only has to hold vectors and the small
+filter / citation fields.
+
+On-disk layout (CHUNK_STORE_DIR):
+  chunks.bin       append-only UTF-8 blob, memory-mapped by readers
+  chunks.idx.npy   structured array (id: 16-byte UUID, offset: int64, length: int32), sorted by id
+
+A batch of hits is hydrated with one `np.searchsorted` over the index and slices of the mmap.
+Re-ingesting identical chunks adds nothing (same id -> already stored).
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+BLOB_FILE = "chunks.bin"
+INDEX_FILE = "chunks.idx.npy"
+INDEX_DTYPE = np.dtype([("id", "S16"), ("offset", "<i8"), ("length", "<i4")])
+
+
+def _key(point_id: str) -> bytes:
+    return uuid.UUID(str(point_id)).bytes
+
+
+def _load_index(path: Path) -> np.ndarray:
+    index_path = path / INDEX_FILE
+    if not index_path.exists():
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    return np.load(index_path)
+
+
+class ChunkStore:
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.index = _load_index(self.path)
+        self._file = open(self.path / BLOB_FILE, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get_many(self, point_ids: Iterable[str]) -> dict[str, str]:
+        """
+        Texts for the ids that are stored (missing ids are simply absent from the result).
+        """
+        point_ids = [str(p) for p in point_ids]
+        if not point_ids or not len(self.index):
+            return {}
+        keys = np.array([_key(p) for p in point_ids], dtype="S16")
+        pos = np.searchsorted(self.index["id"], keys)
+        pos = np.minimum(pos, len(self.index) - 1)
+        rows = self.index[pos]
+        out: dict[str, str] = {}
+        for point_id, key, row in zip(point_ids, keys, rows):
+            if row["id"] == key:
+                start = int(row["offset"])
+                out[point_id] = self._blob[start : start + int(row["length"])].decode("utf-8")
+        return out
+
+
+@lru_cache(maxsize=4)
+def _open_cached(path: str, mtime_ns: int) -> ChunkStore:
+    return ChunkStore(path)
+
+
+def open_chunk_store(path: str | os.PathLike) -> ChunkStore:
+    """
+    Open once per process; reopens after an ingest rewrites the index.
+    """
+    path = str(path)
+    return _open_cached(path, os.stat(Path(path) / INDEX_FILE).st_mtime_ns)
+
+
+class ChunkStoreWriter:
+    """
+    Appends new chunk texts to the blob during ingest; `close()` publishes the merged index.
+    Readers keep using the previous index (whose offsets stay valid) until then.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._existing = _load_index(self.path)
+        self._known = set(self._existing["id"].tolist())
+        self._blob = open(self.path / BLOB_FILE, "ab")
+        self._offset = self._blob.seek(0, os.SEEK_END)
+        self._new: list[tuple[bytes, int, int]] = []
+        self.added = 0
+
+    def add(self, point_id: str, text: str) -> None:
+        key = _key(point_id)
+        # numpy "S" values drop trailing NUL bytes, so compare in that form
+        if key.rstrip(b"\0") in self._known:
+            return
+        data = text.encode("utf-8")
+        self._blob.write(data)
+        self._new.append((key, self._offset, len(data)))
+        self._known.add(key.rstrip(b"\0"))
+        self._offset += len(data)
+        self.added += 1
+
+    def close(self) -> int:
+        self._blob.close()
+        new = np.array(self._new, dtype=INDEX_DTYPE)
+        merged = np.concatenate([self._existing, new])
+        merged = merged[np.argsort(merged["id"], kind="stable")]
+        tmp = self.path / (INDEX_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, merged)
+        os.replace(tmp, self.path / INDEX_FILE)
+        return len(merged)
@@ -0,0 +1,223 @@
+# single-pass, span-based text chunker
+
+# rag_pipeline/chunker.py
+
+"""
+Drop-in replacement for LangChain's `RecursiveCharacterTextSplitter` (as configured in loader.py).
+
+Separator offsets are computed once per text (one scan per separator), and splitting /
+merging works on (start, end) spans over the original string, so the only strings
+allocated are the final chunks.
+
+Modes:
+  - "compat" (default): byte-identical chunks to RecursiveCharacterTextSplitter with
+    keep_separator=True, strip_whitespace=True. Keeps chunk_ref / point_id stable.
+  - "fast": one greedy left-to-right pass that cuts each window at the last occurrence of the
+    highest-priority separator. Similar chunk shapes, different boundaries (re-ingest needed).
+
+Sizing is in characters by default; `SpanChunker.from_tiktoken(...)` measures embedding tokens instead.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Callable, Iterable, Literal, Sequence
+
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS: tuple[str, ...] = ("\n\n", "\n", " ", "")
+
+ChunkerMode = Literal["compat", "fast"]
+
+
+class _Offsets:
+    """
+    Start offsets of every (non-overlapping, leftmost) occurrence of each separator in one text.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._cache: dict[str, list[int]] = {}
+
+    def of(self, sep: str) -> list[int]:
+        starts = self._cache.get(sep)
+        if starts is None:
+            starts = [m.start() for m in re.finditer(re.escape(sep), self.text)]
+            self._cache[sep] = starts
+        return starts
+
+    def within(self, sep: str, a: int, b: int) -> list[int]:
+        """
+        Occurrence starts inside text[a:b], exactly as a fresh scan of that substring would find them.
+        """
+        starts = self.of(sep)
+        n = len(sep)
+        lo = bisect_left(starts, a)
+        hi = bisect_right(starts, b - n)
+        if n > 1 and lo > 0 and starts[lo - 1] + n > a:
+            # A global match straddles `a`, so a local scan could pair the characters differently.
+            out: list[int] = []
+            i = self.text.find(sep, a, b)
+            while i != -1:
+                out.append(i)
+                i = self.text.find(sep, i + n, b)
+            return out
+        return starts[lo:hi]
+
+    def any_within(self, sep: str, a: int, b: int) -> bool:
+        starts = self.of(sep)
+        n = len(sep)
+        lo = bisect_left(starts, a)
+        if lo < len(starts) and starts[lo] + n <= b:
+            return True
+        # Straddling match at `a` can hide a valid local match (only possible for multi-char separators).
+        return n > 1 and self.text.find(sep, a, b) != -1
+
+
+class SpanChunker:
+    def __init__(
+        self,
+        chunk_size: int = 800,
+        chunk_overlap: int = 100,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+        length_function: Callable[[str], int] | None = None,
+        mode: ChunkerMode = "compat",
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must not exceed chunk_size ({chunk_size})")
+        if mode == "fast" and length_function is not None:
+            raise ValueError("fast mode sizes chunks in characters; use mode='compat' with a length_function")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators)
+        self.length_function = length_function
+        self.mode = mode
+
+    @classmethod
+    def from_tiktoken(cls, encoding_name: str = "cl100k_base", **kwargs) -> "SpanChunker":
+        """
+        Size chunks in embedding tokens (cl100k_base is the text-embedding-3-* tokenizer).
+        """
+        import tiktoken
+
+        enc = tiktoken.get_encoding(encoding_name)
+        return cls(length_function=lambda s: len(enc.encode(s, disallowed_special=())), **kwargs)
+
+    # -- public API (mirrors TextSplitter) --------------------------------------------------
+
+    def split_text(self, text: str) -> list[str]:
+        if self.mode == "fast":
+            return self._split_fast(text)
+        out: list[str] = []
+        self._split(text, _Offsets(text), 0, len(text), 0, out)
+        return out
+
+    def split_documents(self, documents: Iterable[Document]) -> list[Document]:
+        chunks: list[Document] = []
+        for doc in documents:
+            for piece in self.split_text(doc.page_content):
+                chunks.append(Document(page_content=piece, metadata=dict(doc.metadata)))
+        return chunks
+
+    # -- compat mode ------------------------------------------------------------------------
+
+    def _len(self, text: str, a: int, b: int) -> int:
+        return (b - a) if self.length_function is None else self.length_function(text[a:b])
+
+    def _split(self, text: str, offsets: _Offsets, a: int, b: int, sep_idx: int, out: list[str]) -> None:
+        # Pick the first separator (from sep_idx on) that occurs in text[a:b].
+        separators = self.separators
+        separator = separators[-1]
+        next_idx = len(separators)
+        for i in range(sep_idx, len(separators)):
+            s = separators[i]
+            if not s:
+                separator = s
+                break
+            if offsets.any_within(s, a, b):
+                separator = s
+                next_idx = i + 1
+                break
+
+        # Split into contiguous pieces; each piece starts with its separator ("keep_separator=start").
+        if separator:
+            bounds = [a, *offsets.within(separator, a, b), b]
+        else:
+            bounds = list(range(a, b + 1))
+        has_more = next_idx < len(separators)
+
+        good: list[tuple[int, int, int]] = []
+        for i in range(len(bounds) - 1):
+            s, e = bounds[i], bounds[i + 1]
+            if s == e:
+                continue
+            n = self._len(text, s, e)
+            if n < self.chunk_size:
+                good.append((s, e, n))
+                continue
+            if good:
+                self._merge(text, good, out)
+                good = []
+            if not has_more:
+                out.append(text[s:e])
+            else:
+                self._split(text, offsets, s, e, next_idx, out)
+        if good:
+            self._merge(text, good, out)
+
+    def _merge(self, text: str, spans: list[tuple[int, int, int]], out: list[str]) -> None:
+        # Same windowing as TextSplitter._merge_splits with an empty join separator.
+        size, overlap = self.chunk_size, self.chunk_overlap
+        window: deque[tuple[int, int, int]] = deque()
+        total = 0
+        for span in spans:
+            n = span[2]
+            if total + n > size and window:
+                self._emit(text, window[0][0], window[-1][1], out)
+                while total > overlap or (total + n > size and total > 0):
+                    total -= window.popleft()[2]
+            window.append(span)
+            total += n
+        if window:
+            self._emit(text, window[0][0], window[-1][1], out)
+
+    @staticmethod
+    def _emit(text: str, a: int, b: int, out: list[str]) -> None:
+        chunk = text[a:b].strip()
+        if chunk:
+            out.append(chunk)
+
+    # -- fast mode --------------------------------------------------------------------------
+
+    def _split_fast(self, text: str) -> list[str]:
+        offsets = _Offsets(text)
+        boundary_seps = [s for s in self.separators if s]
+        fine = boundary_seps[-1] if boundary_seps else None
+        out: list[str] = []
+        n = len(text)
+        pos = 0
+        while pos < n:
+            limit = pos + self.chunk_size
+            if limit >= n:
+                self._emit(text, pos, n, out)
+                break
+            cut = limit
+            for sep in boundary_seps:
+                starts = offsets.of(sep)
+                # last occurrence starting in (pos, limit]
+                k = bisect_right(starts, limit) - 1
+                if k >= 0 and starts[k] > pos:
+                    cut = starts[k]
+                    break
+            self._emit(text, pos, cut, out)
+            nxt = cut
+            if self.chunk_overlap and fine is not None:
+                # Start the next window up to `chunk_overlap` chars back, on a fine-grained boundary.
+                starts = offsets.of(fine)
+                k = bisect_left(starts, cut - self.chunk_overlap)
+                if k < len(starts) and pos < starts[k] < cut:
+                    nxt = starts[k]
+            pos = nxt if nxt > pos else cut
+        return out
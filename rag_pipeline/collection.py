@@ -0,0 +1,273 @@
+# create / migrate the qdrant collection from code
+
+# rag_pipeline/collection.py
+
+"""
+Qdrant collection bootstrap.
+
+Creates the collection if it doesn't exist, and otherwise migrates the settings that can be
+changed in place (on-disk vectors, HNSW m / ef_construct, quantization, payload indexes).
+The vector size and distance can't be changed in place; a mismatch is an error.
+The embedding backend / model / dimension that built the collection is kept in the collection
+metadata, and ingesting or querying with a different one is an error too.
+Settings whose env var is unset are left as they are (Qdrant defaults on create).
+
+Run:
+  python -m rag_pipeline.collection          # ensure + print the resulting config
+
+Env vars:
+  QDRANT_COLLECTION / COLLECTION_NAME
+  QDRANT_VECTOR_NAME=text
+  QDRANT_VECTOR_SIZE=1536             (text-embedding-3-small)
+  QDRANT_ON_DISK=true                 (keep original float32 vectors on disk, mmap'd)
+  QDRANT_HNSW_M=16
+  QDRANT_HNSW_EF_CONSTRUCT=100
+  QDRANT_QUANTIZATION=scalar          (none | scalar | binary)
+  QDRANT_QUANTIZATION_ALWAYS_RAM=true (keep the quantized copy in RAM)
+  QDRANT_SEARCH_EF=                   (optional hnsw_ef at query time)
+  QDRANT_OVERSAMPLING=2.0             (quantized search: fetch limit * oversampling candidates ...)
+  QDRANT_RESCORE=true                 (... and rescore them with the original vectors)
+  QDRANT_PREFETCH_DIM=                (e.g. 256: also store a truncated Matryoshka vector "<name>_<dim>"
+                                       and search it first, rescoring candidates with the full vector)
+  QDRANT_PREFETCH_LIMIT_FACTOR=4      (low-dim candidates = top_k * factor)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Sequence
+
+from qdrant_client import QdrantClient
+from qdrant_client import models
+
+from common.config import env_flag, env_float, env_int, env_str, load_env
+from rag_pipeline.embeddings import check_embedding_info
+
+load_env()
+
+# Payload fields we filter on; indexed so filtered searches don't scan payloads.
+PAYLOAD_INDEXES: dict[str, models.PayloadSchemaType] = {
+    "source": models.PayloadSchemaType.KEYWORD,
+    "page": models.PayloadSchemaType.INTEGER,
+}
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    name: str
+    vector_name: str = "text"
+    size: int = 1536
+    distance: models.Distance = models.Distance.COSINE
+    # None = leave the current setting alone
+    on_disk: bool | None = None
+    hnsw_m: int | None = None
+    hnsw_ef_construct: int | None = None
+    quantization: str | None = None  # none | scalar | binary
+    quantization_always_ram: bool = True
+    # Matryoshka prefix vector stored next to the full one (None/0 = off)
+    prefetch_dim: int | None = None
+    # {"backend", "model", "dim"} of the embedding writing to this collection (see embeddings.py)
+    embedding: dict | None = None
+
+    @property
+    def prefetch_vector_name(self) -> str | None:
+        return prefetch_vector_name(self.vector_name, self.prefetch_dim)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        if self.quantization in (None, "none"):
+            return None
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION={self.quantization!r} (expected none, scalar or binary)")
+
+
+def collection_name_from_env() -> str:
+    return os.getenv("QDRANT_COLLECTION") or os.getenv("COLLECTION_NAME") or "neura-dynamics-assignment-v1"
+
+
+def prefetch_vector_name(vector_name: str, dim: int | None) -> str | None:
+    return f"{vector_name}_{dim}" if dim else None
+
+
+def truncate_vector(vector: Sequence[float], dim: int) -> list[float]:
+    """
+    Matryoshka shortening: keep the first `dim` components and re-normalise.
+    text-embedding-3-* is trained so that prefixes remain usable embeddings.
+    """
+    head = [float(x) for x in vector[:dim]]
+    norm = math.sqrt(sum(x * x for x in head)) or 1.0
+    return [x / norm for x in head]
+
+
+def spec_from_env(name: str | None = None, embedding: dict | None = None) -> CollectionSpec:
+    """
+    `embedding` is the backend's `info`; its dim wins over QDRANT_VECTOR_SIZE.
+    """
+    # Unset = leave the setting alone (0 is a valid hnsw m)
+    hnsw_m = env_str("QDRANT_HNSW_M")
+    ef_construct = env_str("QDRANT_HNSW_EF_CONSTRUCT")
+    quantization = env_str("QDRANT_QUANTIZATION")
+    return CollectionSpec(
+        name=name or collection_name_from_env(),
+        vector_name=os.getenv("QDRANT_VECTOR_NAME", "text"),
+        size=int(embedding["dim"]) if embedding else env_int("QDRANT_VECTOR_SIZE", 1536),
+        on_disk=env_flag("QDRANT_ON_DISK") if env_str("QDRANT_ON_DISK") is not None else None,
+        hnsw_m=int(hnsw_m) if hnsw_m is not None else None,
+        hnsw_ef_construct=int(ef_construct) if ef_construct is not None else None,
+        quantization=quantization.strip().lower() if quantization else None,
+        quantization_always_ram=env_flag("QDRANT_QUANTIZATION_ALWAYS_RAM", True),
+        prefetch_dim=env_int("QDRANT_PREFETCH_DIM", 0) or None,
+        embedding=embedding,
+    )
+
+
+def search_params_from_env() -> models.SearchParams | None:
+    """
+    Query-time params matching the collection config: HNSW ef and, when the collection is
+    quantized, oversampled search over the quantized vectors rescored with the originals.
+    """
+    ef = env_int("QDRANT_SEARCH_EF", 0) or None
+    quantization = (env_str("QDRANT_QUANTIZATION") or "none").strip().lower()
+    quant_params = None
+    if quantization != "none":
+        quant_params = models.QuantizationSearchParams(
+            ignore=False,
+            rescore=env_flag("QDRANT_RESCORE", True),
+            oversampling=env_float("QDRANT_OVERSAMPLING", 2.0),
+        )
+    if ef is None and quant_params is None:
+        return None
+    return models.SearchParams(hnsw_ef=ef, quantization=quant_params)
+
+
+def _quantization_kind(config) -> str:
+    if config is None:
+        return "none"
+    if getattr(config, "scalar", None) is not None:
+        return "scalar"
+    if getattr(config, "binary", None) is not None:
+        return "binary"
+    return "other"
+
+
+def collection_embedding(info) -> dict | None:
+    """
+    Embedding record from a `get_collection(...)` result, if the collection has one.
+    """
+    metadata = getattr(info.config, "metadata", None) or {}
+    return metadata.get("embedding")
+
+
+def ensure_collection(client: QdrantClient, spec: CollectionSpec) -> str:
+    """
+    Create or migrate `spec.name`. Returns "created", "updated" or "unchanged".
+    """
+    hnsw = None
+    if spec.hnsw_m is not None or spec.hnsw_ef_construct is not None:
+        hnsw = models.HnswConfigDiff(m=spec.hnsw_m, ef_construct=spec.hnsw_ef_construct)
+
+    vectors_config = {
+        spec.vector_name: models.VectorParams(size=spec.size, distance=spec.distance, on_disk=spec.on_disk)
+    }
+    if spec.prefetch_dim:
+        # Small enough to always stay in RAM; the full vectors can live on disk.
+        vectors_config[spec.prefetch_vector_name] = models.VectorParams(size=spec.prefetch_dim, distance=spec.distance)
+
+    if not client.collection_exists(spec.name):
+        client.create_collection(
+            collection_name=spec.name,
+            vectors_config=vectors_config,
+            hnsw_config=hnsw,
+            quantization_config=spec.quantization_config(),
+            metadata={"embedding": spec.embedding} if spec.embedding else None,
+        )
+        _ensure_payload_indexes(client, spec.name, existing={})
+        return "created"
+
+    info = client.get_collection(spec.name)
+    vectors = info.config.params.vectors
+    current = vectors.get(spec.vector_name) if isinstance(vectors, dict) else None
+    if current is None:
+        raise RuntimeError(
+            f"Collection {spec.name!r} has no named vector {spec.vector_name!r}; "
+            f"recreate it or set QDRANT_VECTOR_NAME."
+        )
+    if current.size != spec.size or current.distance != spec.distance:
+        raise RuntimeError(
+            f"Collection {spec.name!r} vector {spec.vector_name!r} is {current.size}-d {current.distance}, "
+            f"expected {spec.size}-d {spec.distance}. Size/distance can't be migrated in place; re-ingest into a new collection."
+        )
+    if spec.prefetch_dim:
+        low = vectors.get(spec.prefetch_vector_name)
+        if low is None or low.size != spec.prefetch_dim:
+            raise RuntimeError(
+                f"Collection {spec.name!r} has no {spec.prefetch_dim}-d vector {spec.prefetch_vector_name!r}; "
+                f"named vectors can't be added in place. Re-ingest into a new collection or unset QDRANT_PREFETCH_DIM."
+            )
+
+    stored = collection_embedding(info)
+    check_embedding_info(stored, spec.embedding, f"Collection {spec.name!r}")
+
+    changed = False
+    if spec.embedding and not stored:
+        # Collections created before embeddings were recorded adopt the current one.
+        client.update_collection(collection_name=spec.name, metadata={"embedding": spec.embedding})
+        changed = True
+
+    if spec.on_disk is not None and bool(current.on_disk) != spec.on_disk:
+        client.update_collection(
+            collection_name=spec.name,
+            vectors_config={spec.vector_name: models.VectorParamsDiff(on_disk=spec.on_disk)},
+        )
+        changed = True
+
+    cur_hnsw = info.config.hnsw_config
+    if hnsw is not None and (
+        (spec.hnsw_m is not None and cur_hnsw.m != spec.hnsw_m)
+        or (spec.hnsw_ef_construct is not None and cur_hnsw.ef_construct != spec.hnsw_ef_construct)
+    ):
+        client.update_collection(collection_name=spec.name, hnsw_config=hnsw)
+        changed = True
+
+    if spec.quantization is not None and _quantization_kind(info.config.quantization_config) != spec.quantization:
+        client.update_collection(
+            collection_name=spec.name,
+            quantization_config=spec.quantization_config() or models.Disabled.DISABLED,
+        )
+        changed = True
+
+    if _ensure_payload_indexes(client, spec.name, existing=info.payload_schema or {}):
+        changed = True
+    return "updated" if changed else "unchanged"
+
+
+def _ensure_payload_indexes(client: QdrantClient, name: str, existing: dict) -> bool:
+    created = False
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field in existing:
+            continue
+        client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+        created = True
+    return created
+
+
+if __name__ == "__main__":
+    qdrant = QdrantClient(
+        url=os.getenv("QDRANT_URL"),
+        api_key=os.getenv("QDRANT_API_KEY"),
+        timeout=env_float("QDRANT_TIMEOUT_SECONDS", 120.0),
+    )
+    spec = spec_from_env()
+    status = ensure_collection(qdrant, spec)
+    print(f"Collection {spec.name!r}: {status}")
+    print(qdrant.get_collection(spec.name).config)
@@ -0,0 +1,116 @@
+# collapse near-duplicate chunks before embedding
+
+# rag_pipeline/dedupe.py
+
+"""
+SimHash + LSH banding near-duplicate filter for the ingest stream.
+
+Repeated headers/footers, boilerplate disclaimers and overlapping pages produce chunks that
+are (nearly) identical. Embedding and storing each copy costs money, grows the index and
+crowds top-k results with redundant hits.
+
+The first chunk of each near-duplicate group is kept (the "representative"); later copies are
+dropped and recorded as aliases of it, so citations can still point at every original page.
+
+Similarity: 64-bit SimHash over word shingles; two chunks are duplicates when their
+fingerprints differ in at most `max_distance` bits. Candidates are found with LSH banding:
+the fingerprint is cut into `max_distance + 1` bands, and by the pigeonhole principle any
+pair within the distance shares at least one identical band.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from langchain_core.documents import Document
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i : i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * 64
+    for sh in shingles:
+        h = _hash64(sh)
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fp = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            fp |= 1 << bit
+    return fp & _MASK64
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateFilter:
+    """
+    Streaming filter: `filter(chunks)` yields representatives only.
+    After the stream is consumed, `aliases[point_id]` lists the dropped copies as
+    {"page", "chunk_ref"} dicts, and `dropped` counts them.
+    """
+
+    def __init__(self, max_distance: int = 3, shingle_size: int = 3):
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._buckets: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self._fingerprints: list[int] = []
+        self._rep_ids: list[str] = []
+        self._rep_refs: list[tuple] = []
+        self.aliases: dict[str, list[dict]] = defaultdict(list)
+        self.kept = 0
+        self.dropped = 0
+
+    def _band_keys(self, fp: int) -> list[tuple[int, int]]:
+        mask = (1 << self._band_bits) - 1
+        return [(b, (fp >> (b * self._band_bits)) & mask) for b in range(self._bands)]
+
+    def _find(self, fp: int, keys: list[tuple[int, int]]) -> int | None:
+        checked: set[int] = set()
+        for key in keys:
+            for idx in self._buckets.get(key, ()):
+                if idx in checked:
+                    continue
+                checked.add(idx)
+                if hamming(fp, self._fingerprints[idx]) <= self.max_distance:
+                    return idx
+        return None
+
+    def filter(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        for chunk in chunks:
+            fp = simhash(chunk.page_content, self.shingle_size)
+            keys = self._band_keys(fp)
+            match = self._find(fp, keys)
+            if match is not None:
+                self.dropped += 1
+                alias = {"page": chunk.metadata.get("page"), "chunk_ref": chunk.metadata.get("chunk_ref")}
+                known = self.aliases[self._rep_ids[match]]
+                if (alias["page"], alias["chunk_ref"]) != self._rep_refs[match] and alias not in known:
+                    known.append(alias)
+                continue
+
+            idx = len(self._fingerprints)
+            self._fingerprints.append(fp)
+            self._rep_ids.append(str(chunk.metadata.get("point_id")))
+            self._rep_refs.append((chunk.metadata.get("page"), chunk.metadata.get("chunk_ref")))
+            for key in keys:
+                self._buckets[key].append(idx)
+            self.kept += 1
+            yield chunk
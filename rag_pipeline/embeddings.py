@@ -0,0 +1,220 @@
+# embedding backends (openai / local cpu / hashing), selected by config
+
+# rag_pipeline/embeddings.py
+
+"""
+One place that decides how text becomes vectors, for both ingestion and retrieval.
+
+Backends (EMBEDDING_BACKEND):
+  - openai   (default) OpenAI embeddings API. Large batches are split into EMBED_REQUEST_SIZE
+             requests sent EMBED_CONCURRENCY at a time.
+  - local    sentence-transformers model on CPU (optional dependency:
+             `pip install sentence-transformers`), no network hop per query.
+  - hashing  deterministic feature hashing; no model, no network. For tests / offline runs.
+
+Every backend exposes `embed_query`, `embed_documents`, `dim` and `info`
+({"backend", "model", "dim"}). `info` is stored as collection metadata at ingest and
+checked at query time, so an index built with one model is never searched with another.
+
+Query-time callers go through `embed_query(embeddings, text)`, which serves repeated questions
+from the shared query-embedding cache (common.cache) and bounds the call by the request deadline.
+
+Env vars:
+  EMBEDDING_BACKEND=openai
+  EMBEDDING_MODEL=                (default: text-embedding-3-small / all-MiniLM-L6-v2 / hashing-v1)
+  EMBEDDING_DIM=                  (openai text-embedding-3-*: shortened output; hashing: vector size)
+  EMBED_REQUEST_SIZE=32
+  EMBED_CONCURRENCY=4
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any
+
+from common.cache import EMBEDDINGS, SHARED_EMBEDDINGS
+from common.config import env_int, load_env
+from common.deadline import call
+from common.lazy import lazy
+
+load_env()
+
+OpenAIEmbeddings = lazy("langchain_openai", "OpenAIEmbeddings")
+
+EMBED_REQUEST_SIZE = env_int("EMBED_REQUEST_SIZE", 32)
+EMBED_CONCURRENCY = env_int("EMBED_CONCURRENCY", 4)
+
+OPENAI_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "local": "sentence-transformers/all-MiniLM-L6-v2",
+    "hashing": "hashing-v1",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingMismatchError(RuntimeError):
+    """
+    The index was built with a different embedding model / dimension than the one configured.
+    """
+
+
+def hashed_vector(text: str, dim: int) -> list[float]:
+    """
+    L2-normalised signed feature hashing of lowercase word tokens.
+    Texts sharing words get positive cosine similarity, which is enough for retrieval tests.
+    """
+    vec = [0.0] * dim
+    for tok in _TOKEN_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % dim] += 1.0 if (h >> 63) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        return vec
+    return [v / norm for v in vec]
+
+
+class _Backend:
+    backend = ""
+    model = ""
+    dim = 0
+
+    @property
+    def info(self) -> dict[str, Any]:
+        return {"backend": self.backend, "model": self.model, "dim": self.dim}
+
+
+class OpenAIBackend(_Backend):
+    backend = "openai"
+
+    def __init__(self, model: str = DEFAULT_MODELS["openai"], dim: int | None = None):
+        self.model = model
+        self.dim = dim or OPENAI_DIMS.get(model, 1536)
+        kwargs: dict[str, Any] = {"model": model}
+        if dim:
+            kwargs["dimensions"] = dim  # text-embedding-3-* can return shortened vectors
+        self.client = OpenAIEmbeddings(**kwargs)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.client.embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        batches = [texts[i : i + EMBED_REQUEST_SIZE] for i in range(0, len(texts), EMBED_REQUEST_SIZE)]
+        if len(batches) <= 1 or EMBED_CONCURRENCY <= 1:
+            return self.client.embed_documents(texts)
+        # Requests are I/O bound: keep several in flight, results stay in input order.
+        with ThreadPoolExecutor(max_workers=min(EMBED_CONCURRENCY, len(batches))) as pool:
+            results = pool.map(self.client.embed_documents, batches)
+            return [vec for batch in results for vec in batch]
+
+
+class SentenceTransformerBackend(_Backend):
+    backend = "local"
+
+    def __init__(self, model: str = DEFAULT_MODELS["local"]):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local needs sentence-transformers: `pip install sentence-transformers`"
+            ) from e
+        self.model = model
+        self.encoder = SentenceTransformer(model, device="cpu")
+        self.dim = int(self.encoder.get_sentence_embedding_dimension())
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.encoder.encode(
+            texts, batch_size=EMBED_REQUEST_SIZE, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+
+class HashingBackend(_Backend):
+    backend = "hashing"
+
+    def __init__(self, model: str = DEFAULT_MODELS["hashing"], dim: int | None = None):
+        self.model = model
+        self.dim = dim or 1536
+
+    def embed_query(self, text: str) -> list[float]:
+        return hashed_vector(text, self.dim)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [hashed_vector(t, self.dim) for t in texts]
+
+
+@lru_cache(maxsize=4)
+def _build(backend: str, model: str, dim: int | None) -> _Backend:
+    if backend == "openai":
+        return OpenAIBackend(model, dim)
+    if backend == "local":
+        return SentenceTransformerBackend(model)
+    if backend == "hashing":
+        return HashingBackend(model, dim)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND={backend!r} (expected openai, local or hashing)")
+
+
+def embedding_settings() -> tuple[str, str, int | None]:
+    """
+    (backend, model, dim) from EMBEDDING_BACKEND / EMBEDDING_MODEL / EMBEDDING_DIM.
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").strip().lower()
+    model = os.getenv("EMBEDDING_MODEL") or DEFAULT_MODELS.get(backend, "")
+    dim = int(os.getenv("EMBEDDING_DIM") or 0) or None
+    return backend, model, dim
+
+
+def get_embeddings() -> _Backend:
+    """
+    The configured backend, built once per process (local models load weights only once).
+    """
+    return _build(*embedding_settings())
+
+
+def embed_query(embeddings, text: str) -> list[float]:
+    """
+    `embeddings.embed_query(text)` through the query-embedding caches (the shared, memory-mapped
+    table of a worker pool first, then the per-process LRU). The key includes the backend's
+    `info`, so switching models never serves a vector from another model.
+    """
+    info = getattr(embeddings, "info", None)
+    key = f"{info['backend']}:{info['model']}:{info['dim']}|{text}" if info and EMBEDDINGS.enabled else None
+    if key is not None:
+        cached = SHARED_EMBEDDINGS.get(key)
+        if cached is None:
+            cached = EMBEDDINGS.get(key)
+        if cached is not None:
+            return cached
+    vector = call("embed.query", embeddings.embed_query, text)
+    if key is not None:
+        EMBEDDINGS.put(key, [float(x) for x in vector])
+    return vector
+
+
+def check_embedding_info(stored: dict[str, Any] | None, current: dict[str, Any] | None, where: str) -> None:
+    """
+    Raise EmbeddingMismatchError when an index's recorded embedding differs from the configured one.
+    Indexes without a record (built before this check existed) are accepted.
+    """
+    if not stored or not current:
+        return
+    diff = {k: (stored.get(k), current.get(k)) for k in ("backend", "model", "dim") if stored.get(k) != current.get(k)}
+    if diff:
+        detail = ", ".join(f"{k}: index={a!r} configured={b!r}" for k, (a, b) in diff.items())
+        raise EmbeddingMismatchError(
+            f"{where} was built with a different embedding ({detail}). "
+            f"Re-ingest, or set EMBEDDING_BACKEND / EMBEDDING_MODEL / EMBEDDING_DIM to match."
+        )
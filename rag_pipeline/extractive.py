@@ -0,0 +1,173 @@
+# extractive answers: the best sentence(s) of the top chunks, without an LLM call
+
+# rag_pipeline/extractive.py
+
+"""
+Fast path for factoid PDF questions ("When was chain-of-thought prompting demonstrated?").
+When the top hit scores far above QDRANT_MIN_SCORE, the answer is usually one sentence of
+that chunk. Generation would only restate it, and costs ~0.5-2 s plus tokens.
+
+Each sentence of the top EXTRACTIVE_TOP_CHUNKS chunks gets a score:
+  confidence = w * lexical + (1 - w) * semantic
+  lexical  = share of the question's content terms found in the sentence (BM25 tokenizer)
+  semantic = cosine(question vector, sentence vector), one batched embedding call + one matmul
+with w = EXTRACTIVE_LEXICAL_WEIGHT. If the best sentence reaches EXTRACTIVE_MIN_CONFIDENCE,
+it is the answer (plus a close runner-up, up to EXTRACTIVE_MAX_SENTENCES), each with its
+exact (page, chunk_ref). Otherwise `extractive_answer` returns None and the caller generates.
+
+Open-ended questions (explain / compare / why / summarize ...) never take this path.
+
+Env vars:
+  EXTRACTIVE_ANSWERS=false
+  EXTRACTIVE_SCORE_MARGIN=0.25      (top hit must score >= QDRANT_MIN_SCORE + margin)
+  EXTRACTIVE_MIN_CONFIDENCE=0.6
+  EXTRACTIVE_LEXICAL_WEIGHT=0.4
+  EXTRACTIVE_TOP_CHUNKS=2
+  EXTRACTIVE_MAX_SENTENCES=2
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import numpy as np
+
+from common.config import env_flag, env_float, env_int, load_env
+from common.deadline import DeadlineExceeded, call
+from observability.metrics import record_cache, timed
+from rag_pipeline.bm25 import tokenize
+
+load_env()
+
+EXTRACTIVE_ANSWERS = env_flag("EXTRACTIVE_ANSWERS")
+EXTRACTIVE_SCORE_MARGIN = env_float("EXTRACTIVE_SCORE_MARGIN", 0.25)
+EXTRACTIVE_MIN_CONFIDENCE = env_float("EXTRACTIVE_MIN_CONFIDENCE", 0.6)
+EXTRACTIVE_LEXICAL_WEIGHT = env_float("EXTRACTIVE_LEXICAL_WEIGHT", 0.4)
+EXTRACTIVE_TOP_CHUNKS = env_int("EXTRACTIVE_TOP_CHUNKS", 2)
+EXTRACTIVE_MAX_SENTENCES = env_int("EXTRACTIVE_MAX_SENTENCES", 2)
+# A runner-up sentence is only added if it scores this close to the best one
+RUNNER_UP_RATIO = 0.9
+FACTOID_MAX_WORDS = 16
+MIN_SENTENCE_WORDS = 4
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)")
+_FACTOID_RE = re.compile(
+    r"^\s*(what|who|whom|when|where|which|how (?:many|much|long|old|big)|in (?:which|what)|name|list|define)\b",
+    re.IGNORECASE,
+)
+_OPEN_ENDED_RE = re.compile(
+    r"\b(explain|describe|why|compare|comparison|contrast|summari[sz]e|summary|discuss|elaborate|overview|"
+    r"difference|differences|pros|cons|advantages|disadvantages|how (?:does|do|can|should|would|to))\b",
+    re.IGNORECASE,
+)
+
+
+def is_factoid(query: str) -> bool:
+    """
+    Short lookup question (what / who / when / which / how many ...), not an open-ended one.
+    """
+    return (
+        bool(_FACTOID_RE.search(query))
+        and not _OPEN_ENDED_RE.search(query)
+        and len(query.split()) <= FACTOID_MAX_WORDS
+    )
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = (" ".join(s.split()) for s in _SENTENCE_RE.split(text or ""))
+    return [s for s in sentences if len(s.split()) >= MIN_SENTENCE_WORDS]
+
+
+@dataclass
+class Extract:
+    text: str
+    page: Any
+    chunk_ref: Any
+    confidence: float
+    lexical: float
+    semantic: float
+
+
+def score_sentences(
+    query: str,
+    query_vector: Sequence[float],
+    hits: Sequence[dict[str, Any]],
+    embedder,
+) -> list[Extract]:
+    """
+    Every sentence of `hits`, scored against the question, best first.
+    """
+    rows: list[tuple[str, dict[str, Any]]] = [(s, hit) for hit in hits for s in split_sentences(hit.get("text") or "")]
+    if not rows:
+        return []
+
+    terms = set(tokenize(query))
+    lexical = np.array(
+        [len(terms & set(tokenize(s))) / len(terms) if terms else 0.0 for s, _ in rows], dtype=np.float32
+    )
+    with timed("extractive.embed"):
+        vectors = call("embed.documents", embedder.embed_documents, [s for s, _ in rows])
+    matrix = np.asarray(vectors, dtype=np.float32)
+    q = np.asarray(query_vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(q) or 1.0)
+    semantic = np.divide(matrix @ q, norms, out=np.zeros(len(rows), dtype=np.float32), where=norms > 0)
+
+    w = EXTRACTIVE_LEXICAL_WEIGHT
+    confidence = w * lexical + (1.0 - w) * semantic
+    return [
+        Extract(
+            text=rows[i][0],
+            page=rows[i][1].get("page"),
+            chunk_ref=rows[i][1].get("chunk_ref"),
+            confidence=float(confidence[i]),
+            lexical=float(lexical[i]),
+            semantic=float(semantic[i]),
+        )
+        for i in np.argsort(-confidence, kind="stable")
+    ]
+
+
+def extractive_answer(
+    query: str,
+    query_vector: Sequence[float] | None,
+    retrieved: Sequence[dict[str, Any]],
+    embedder,
+    min_score: float,
+) -> dict[str, Any] | None:
+    """
+    {"answer", "citations", "confidence"} from the retrieved chunks, or None when the question
+    or the evidence isn't clear-cut enough to skip generation.
+    """
+    if query_vector is None or embedder is None or not is_factoid(query):
+        return None
+    scores = [r["score"] for r in retrieved if isinstance(r.get("score"), (int, float))]
+    if not scores or max(scores) < min_score + EXTRACTIVE_SCORE_MARGIN:
+        record_cache("extractive", hit=False)
+        return None
+
+    try:
+        ranked = score_sentences(query, query_vector, list(retrieved)[:EXTRACTIVE_TOP_CHUNKS], embedder)
+    except DeadlineExceeded:
+        return None
+    if not ranked or ranked[0].confidence < EXTRACTIVE_MIN_CONFIDENCE:
+        record_cache("extractive", hit=False)
+        return None
+
+    best = ranked[0]
+    picks = [best] + [
+        e for e in ranked[1:EXTRACTIVE_MAX_SENTENCES]
+        if e.confidence >= max(EXTRACTIVE_MIN_CONFIDENCE, RUNNER_UP_RATIO * best.confidence)
+    ]
+    citations: list[dict[str, Any]] = []
+    for e in picks:
+        citation = {"page": e.page, "chunk_ref": e.chunk_ref}
+        if citation not in citations:
+            citations.append(citation)
+    record_cache("extractive", hit=True)
+    return {
+        "answer": " ".join(f"{e.text} (page={e.page}, chunk_ref={e.chunk_ref})" for e in picks),
+        "citations": citations,
+        "confidence": round(best.confidence, 3),
+    }
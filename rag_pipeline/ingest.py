@@ -1,69 +1,293 @@
-# generate embeddings and store in qdrant vector db
+# generate embeddings and store in qdrant vector db (or the embedded local index)
 
 # rag_pipeline/ingest.py
 
 import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
 
 from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct
-from langchain_openai import OpenAIEmbeddings
 
-from rag_pipeline.loader import load_and_chunk_pdf
+from common.config import env_flag, env_float, env_int, load_env
+from observability.metrics import timed
+from rag_pipeline.bm25 import BM25Writer
+from rag_pipeline.checkpoint import IngestCheckpoint, IngestProgress, file_fingerprint, run_fingerprint
+from rag_pipeline.chunk_store import ChunkStoreWriter
+from rag_pipeline.collection import (
+    CollectionSpec,
+    collection_name_from_env,
+    ensure_collection,
+    spec_from_env,
+    truncate_vector,
+)
+from rag_pipeline.dedupe import NearDuplicateFilter
+from rag_pipeline.embeddings import get_embeddings
+from rag_pipeline.loader import CHUNK_UNIT, CHUNKER_MODE, iter_chunks_from_pdf
+from rag_pipeline.local_index import LocalIndexWriter
+from rag_pipeline.pages import PAGE_FANOUT, PageCentroids, pages_collection_name
+from rag_pipeline.shards import ShardRegistry, registry_from_env
 
-load_dotenv()
+load_env()
 
-COLLECTION_NAME = os.getenv("COLLECTION_NAME")
+# Same resolution as the retriever (QDRANT_COLLECTION, then COLLECTION_NAME)
+COLLECTION_NAME = collection_name_from_env()
 PDF_PATH = os.getenv("PDF_PATH", "data/test-rag-assignment.pdf")
 VECTOR_NAME = os.getenv("QDRANT_VECTOR_NAME", "text")  # you configured this in Qdrant Cloud
-UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "16"))
-QDRANT_TIMEOUT_SECONDS = float(os.getenv("QDRANT_TIMEOUT_SECONDS", "120"))
+UPSERT_BATCH_SIZE = env_int("QDRANT_UPSERT_BATCH_SIZE", 16)
+QDRANT_TIMEOUT_SECONDS = env_float("QDRANT_TIMEOUT_SECONDS", 120)
+# Chunks embedded per API call; also the unit of work held in memory while streaming the PDF.
+EMBED_BATCH_SIZE = env_int("EMBED_BATCH_SIZE", 128)
+# Near-duplicate collapsing (SimHash); distance is in bits out of 64.
+INGEST_DEDUP = env_flag("INGEST_DEDUP", True)
+DEDUP_MAX_DISTANCE = env_int("DEDUP_MAX_DISTANCE", 3)
+# "qdrant" (default) or "local": write a memory-mapped NumPy index to LOCAL_INDEX_DIR instead
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "qdrant").strip().lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/index")
+# Also build the BM25 index used by hybrid retrieval
+HYBRID_SEARCH = env_flag("HYBRID_SEARCH")
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "data/bm25")
+# Keep chunk text in the local chunk store instead of Qdrant payloads
+CHUNK_STORE = env_flag("CHUNK_STORE")
+CHUNK_STORE_DIR = os.getenv("CHUNK_STORE_DIR", "data/chunks")
+# Tenant recorded on every chunk (used by QDRANT_SHARD_STRATEGY=tenant)
+INGEST_TENANT = os.getenv("INGEST_TENANT") or None
+# Durable per-batch checkpoints; a failed run resumes from the last written batch
+INGEST_CHECKPOINT = env_flag("INGEST_CHECKPOINT", True)
+INGEST_CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "data/ingest_checkpoint")
+INGEST_RESUME = env_flag("INGEST_RESUME", True)
+INGEST_PROGRESS_SECONDS = env_float("INGEST_PROGRESS_SECONDS", 10)
+
+T = TypeVar("T")
+
+
+def _batched(items: Iterable[T], n: int) -> Iterator[list[T]]:
+    it = iter(items)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+class QdrantSink:
+    """
+    Qdrant side of ingestion, with the same upsert / set_payload / close interface as
+    LocalIndexWriter. Routes each chunk to its shard (see rag_pipeline.shards), creates
+    shard collections on first use and streams page centroids per shard.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        spec: CollectionSpec,
+        registry: ShardRegistry,
+        chunk_store: ChunkStoreWriter | None = None,
+        batch_size: int = UPSERT_BATCH_SIZE,
+        workers: int = 1,
+    ):
+        self.client = client
+        self.spec = spec
+        self.registry = registry
+        # Points per upsert request, and how many requests are in flight at once
+        self.batch_size = batch_size
+        self.workers = workers
+        # When set, chunk text goes here and Qdrant payloads keep only filter / citation fields
+        self.chunk_store = chunk_store
+        self.total = 0
+        self.collections: set[str] = set()  # created / migrated this run
+        self._pages: dict[str, PageCentroids] = {}
+        self._point_shard: dict[str, str] = {}
+
+    def _ensure(self, collection: str) -> None:
+        if collection in self.collections:
+            return
+        # Create the collection (or migrate quantization / HNSW / payload indexes) before writing
+        spec = replace(self.spec, name=collection)
+        print(f"Qdrant collection {collection}: {ensure_collection(self.client, spec)}")
+        if PAGE_FANOUT:
+            # Page centroids for hierarchical (page -> chunk) retrieval
+            pages_name = pages_collection_name(collection, self.registry.base)
+            status = ensure_collection(self.client, replace(spec, name=pages_name, prefetch_dim=None))
+            print(f"Qdrant page collection {pages_name}: {status}")
+            self._pages[collection] = PageCentroids()
+        self.collections.add(collection)
+
+    def _upsert(self, collection: str, batch: list[PointStruct]) -> None:
+        with timed("qdrant.upsert"):
+            self.client.upsert(collection_name=collection, points=batch)
+
+    def _write(self, collection: str, points: list[PointStruct]) -> None:
+        batches = list(_batched(points, self.batch_size))
+        if self.workers <= 1 or len(batches) <= 1:
+            for batch in batches:
+                self._upsert(collection, batch)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            list(pool.map(lambda batch: self._upsert(collection, batch), batches))
+
+    def _write_pages(self, collection: str, done: Iterable[dict]) -> None:
+        points = [PointStruct(id=p["id"], vector={VECTOR_NAME: p["vector"]}, payload=p["payload"]) for p in done]
+        self._write(pages_collection_name(collection, self.registry.base), points)
+
+    def upsert(self, ids: list[str], vectors: list[list[float]], payloads: list[dict], write: bool = True) -> None:
+        """
+        `write=False` replays a batch that a resumed run already upserted: shard routes, page
+        centroids and the chunk store are rebuilt without sending the points again.
+        """
+        by_shard: dict[str, list[int]] = {}
+        for i, payload in enumerate(payloads):
+            by_shard.setdefault(self.registry.shard_for(payload), []).append(i)
+
+        for collection, rows in by_shard.items():
+            self._ensure(collection)
+            points: list[PointStruct] = []
+            for i in rows:
+                named = {VECTOR_NAME: vectors[i]}
+                if self.spec.prefetch_dim:
+                    # Matryoshka prefix for the low-dim prefetch stage
+                    named[self.spec.prefetch_vector_name] = truncate_vector(vectors[i], self.spec.prefetch_dim)
+                payload = payloads[i]
+                if self.chunk_store is not None:
+                    self.chunk_store.add(ids[i], payload["text"])
+                    payload = {k: v for k, v in payload.items() if k != "text"}
+                points.append(PointStruct(id=ids[i], vector=named, payload=payload))
+                self._point_shard[ids[i]] = collection
+            if write:
+                self._write(collection, points)
+            self.total += len(points)
+
+            pages = self._pages.get(collection)
+            if pages is not None:
+                done = pages.add([payloads[i] for i in rows], [vectors[i] for i in rows])
+                if write:
+                    self._write_pages(collection, done)
+                else:
+                    list(done)  # already written before the restart
+
+    def set_payload(self, point_id: str, payload: dict) -> None:
+        collection = self._point_shard.get(point_id, self.spec.name)
+        self.client.set_payload(collection_name=collection, payload=payload, points=[point_id])
+
+    def close(self) -> int:
+        for collection, pages in self._pages.items():
+            self._write_pages(collection, pages.flush())
+        if self.registry.strategy != "none":
+            self.registry.save()
+        if self.chunk_store is not None:
+            stored = self.chunk_store.close()
+            print(f"Chunk store {CHUNK_STORE_DIR}: {self.chunk_store.added} new texts, {stored} total")
+        return self.total
 
 
 def ingest_pdf():
-    # Load + chunk PDF
-    chunks = load_and_chunk_pdf(PDF_PATH)
-
-    # Embedding model (LOCKED)
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small"  # 1536 dims
-    )
-
-    # Qdrant client
-    qdrant = QdrantClient(
-        url=os.getenv("QDRANT_URL"),
-        api_key=os.getenv("QDRANT_API_KEY"),
-        timeout=QDRANT_TIMEOUT_SECONDS,
-    )
-
-    texts = [c.page_content for c in chunks]
-    vectors = embeddings.embed_documents(texts)
-
-    points: list[PointStruct] = []
-    for chunk, vector in zip(chunks, vectors):
-        point_id = chunk.metadata.get("point_id")
-        chunk_ref = chunk.metadata.get("chunk_ref")
-        point = PointStruct(
-            # Use deterministic UUID so re-ingestion overwrites cleanly (and Qdrant accepts the ID)
-            id=str(point_id),
-            vector={VECTOR_NAME: vector},
-            payload={
+    # Load + chunk PDF lazily, page by page
+    chunks = iter_chunks_from_pdf(PDF_PATH)
+
+    # Drop near-duplicate chunks before paying for their embeddings
+    dedup = NearDuplicateFilter(max_distance=DEDUP_MAX_DISTANCE) if INGEST_DEDUP else None
+    if dedup is not None:
+        chunks = dedup.filter(chunks)
+
+    # Embedding backend from EMBEDDING_BACKEND / EMBEDDING_MODEL (recorded with the index)
+    embeddings = get_embeddings()
+    embedding_info = getattr(embeddings, "info", None)
+
+    sparse = BM25Writer(BM25_INDEX_DIR) if HYBRID_SEARCH else None
+    local = RETRIEVER_BACKEND == "local"
+    if local:
+        writer = LocalIndexWriter(LOCAL_INDEX_DIR, embedding=embedding_info)
+    else:
+        qdrant = QdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+            timeout=QDRANT_TIMEOUT_SECONDS,
+        )
+        writer = QdrantSink(
+            qdrant,
+            spec_from_env(COLLECTION_NAME, embedding=embedding_info),
+            registry_from_env(COLLECTION_NAME),
+            chunk_store=ChunkStoreWriter(CHUNK_STORE_DIR) if CHUNK_STORE else None,
+        )
+
+    checkpoint = None
+    if INGEST_CHECKPOINT:
+        fingerprint = run_fingerprint(
+            pdf=file_fingerprint(PDF_PATH),
+            embedding=embedding_info,
+            batch_size=EMBED_BATCH_SIZE,
+            chunker=(CHUNKER_MODE, CHUNK_UNIT),
+            dedup=(INGEST_DEDUP, DEDUP_MAX_DISTANCE),
+            target=LOCAL_INDEX_DIR if local else COLLECTION_NAME,
+            tenant=INGEST_TENANT,
+        )
+        checkpoint = IngestCheckpoint(INGEST_CHECKPOINT_DIR, fingerprint, resume=INGEST_RESUME)
+        if checkpoint.resumed_from:
+            print(f"Resuming ingestion: {checkpoint.resumed_from} batch(es) already written ({INGEST_CHECKPOINT_DIR})")
+    progress = IngestProgress(INGEST_PROGRESS_SECONDS)
+
+    for batch_no, chunk_batch in enumerate(_batched(chunks, EMBED_BATCH_SIZE)):
+        # Deterministic UUIDs so re-ingestion overwrites cleanly (and Qdrant accepts the ID)
+        ids = [str(c.metadata.get("point_id")) for c in chunk_batch]
+        vectors = checkpoint.load_vectors(batch_no, ids) if checkpoint is not None else None
+        if vectors is None:
+            texts = [c.page_content for c in chunk_batch]
+            with timed("embed.documents"):
+                vectors = embeddings.embed_documents(texts)
+            if checkpoint is not None:
+                checkpoint.spill(batch_no, ids, vectors)
+
+        payloads = [
+            {
                 "text": chunk.page_content,
                 "page": chunk.metadata.get("page"),
                 "source": chunk.metadata.get("source"),
                 # human-readable ref for citations
-                "chunk_ref": chunk_ref,
-            },
-        )
-        points.append(point)
+                "chunk_ref": chunk.metadata.get("chunk_ref"),
+            }
+            for chunk in chunk_batch
+        ]
+        if INGEST_TENANT:
+            for payload in payloads:
+                payload["tenant"] = INGEST_TENANT
+        if sparse is not None:
+            sparse.upsert(ids, payloads)
+        replay = checkpoint is not None and checkpoint.is_written(batch_no)
+        if replay and not local:
+            writer.upsert(ids, vectors, payloads, write=False)
+        else:
+            writer.upsert(ids, vectors, payloads)
+        if checkpoint is not None and not replay:
+            checkpoint.mark_written(batch_no)
+
+        last = chunk_batch[-1].metadata
+        progress.update(int(last.get("page") or 0) + 1, int(last.get("total_pages") or 0), len(chunk_batch), live=not replay)
+
+    if dedup is not None:
+        # Representatives were upserted before their copies showed up; attach the copies'
+        # (page, chunk_ref) so citations resolve to every original page.
+        for point_id, aliases in dedup.aliases.items():
+            if not aliases:
+                continue
+            if sparse is not None:
+                sparse.set_payload(point_id, {"aliases": aliases})
+            writer.set_payload(point_id, {"aliases": aliases})
+        seen = dedup.kept + dedup.dropped
+        pct = (100.0 * dedup.dropped / seen) if seen else 0.0
+        print(f"Deduplicated {dedup.dropped}/{seen} near-duplicate chunks ({pct:.1f}%): saved {dedup.dropped} embeddings/vectors")
 
-    total = 0
-    for i in range(0, len(points), UPSERT_BATCH_SIZE):
-        batch = points[i : i + UPSERT_BATCH_SIZE]
-        qdrant.upsert(collection_name=COLLECTION_NAME, points=batch)
-        total += len(batch)
+    if sparse is not None:
+        print(f"Built BM25 index over {sparse.close()} chunks: {BM25_INDEX_DIR}")
 
-    print(f"Ingested {total} chunks into Qdrant collection: {COLLECTION_NAME}")
+    total = writer.close()
+    if checkpoint is not None:
+        checkpoint.finish()
+    print(progress.line())
+    if local:
+        print(f"Ingested {total} chunks into local index: {LOCAL_INDEX_DIR}")
+    elif writer.registry.strategy == "none":
+        print(f"Ingested {total} chunks into Qdrant collection: {COLLECTION_NAME}")
+    else:
+        print(f"Ingested {total} chunks into {len(writer.collections)} shard(s): {', '.join(sorted(writer.collections))}")
 
 
 if __name__ == "__main__":
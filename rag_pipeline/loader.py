@@ -3,12 +3,30 @@
 # rag_pipeline/loader.py
 
 import hashlib
+import mmap
+import os
 import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator
 
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+from common.config import env_int, load_env
+from rag_pipeline.chunker import SpanChunker
+
+load_env()
+
+# Parallel page extraction. Below PDF_PARALLEL_MIN_PAGES pages the process pool isn't worth its startup cost.
+PDF_LOADER_WORKERS = env_int("PDF_LOADER_WORKERS", min(4, os.cpu_count() or 1))
+PDF_PAGE_WINDOW = env_int("PDF_PAGE_WINDOW", 16)
+PDF_PARALLEL_MIN_PAGES = env_int("PDF_PARALLEL_MIN_PAGES", 32)
+# "compat" reproduces RecursiveCharacterTextSplitter exactly (stable chunk_refs); "fast" is a greedy single pass.
+CHUNKER_MODE = os.getenv("CHUNKER_MODE", "compat")
+# "chars" (default) or "tokens" (chunk_size / chunk_overlap measured in embedding tokens).
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+
 
 def _stable_chunk_id(source: str | None, page: int | None, text: str) -> str:
     """
@@ -27,6 +45,126 @@ def _stable_point_uuid(chunk_ref: str) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_URL, chunk_ref))
 
 
+def make_chunker(chunk_size: int = 800, chunk_overlap: int = 100) -> SpanChunker:
+    separators = ["\n\n", "\n", " ", ""]
+    if CHUNK_UNIT == "tokens":
+        return SpanChunker.from_tiktoken(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators, mode="compat"
+        )
+    return SpanChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators, mode=CHUNKER_MODE)
+
+
+class _MappedPdf:
+    """
+    PdfReader over a read-only memory map: page content is paged in by the OS on demand
+    instead of being read into the Python heap.
+    """
+
+    def __init__(self, pdf_path: str):
+        from pypdf import PdfReader
+
+        self._file = open(pdf_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.reader = PdfReader(self._map)
+
+    def page(self, index: int) -> tuple[str, str]:
+        # Same extraction as PyPDFLoader (plain mode, stripped), so chunk_refs are unchanged.
+        text = self.reader.pages[index].extract_text(extraction_mode="plain").strip()
+        return text, self.reader.page_labels[index]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+_worker_pdf: _MappedPdf | None = None
+
+
+def _init_page_worker(pdf_path: str) -> None:
+    global _worker_pdf
+    _worker_pdf = _MappedPdf(pdf_path)
+
+
+def _extract_page_in_worker(index: int) -> tuple[str, str]:
+    assert _worker_pdf is not None
+    return _worker_pdf.page(index)
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    workers: int | None = None,
+    window: int | None = None,
+) -> Iterator[Document]:
+    """
+    Yield one Document per page, in page order, with PyPDFLoader-compatible
+    `source` / `page` / `page_label` / `total_pages` metadata.
+
+    Pages are extracted in `workers` processes (each memory-maps the file), with at most
+    `window` pages in flight, so memory is bounded by the window rather than the document.
+    """
+    workers = PDF_LOADER_WORKERS if workers is None else workers
+    window = max(1, PDF_PAGE_WINDOW if window is None else window)
+
+    pdf = _MappedPdf(pdf_path)
+    try:
+        total_pages = len(pdf.reader.pages)
+
+        def _doc(index: int, text: str, label: str) -> Document:
+            return Document(
+                page_content=text,
+                metadata={"source": pdf_path, "total_pages": total_pages, "page": index, "page_label": label},
+            )
+
+        if workers <= 1 or total_pages < PDF_PARALLEL_MIN_PAGES:
+            for i in range(total_pages):
+                yield _doc(i, *pdf.page(i))
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_page_worker, initargs=(pdf_path,)
+        ) as pool:
+            in_flight: deque[tuple[int, Future]] = deque()
+            next_page = 0
+            while next_page < total_pages or in_flight:
+                while next_page < total_pages and len(in_flight) < window:
+                    in_flight.append((next_page, pool.submit(_extract_page_in_worker, next_page)))
+                    next_page += 1
+                index, fut = in_flight.popleft()
+                yield _doc(index, *fut.result())
+    finally:
+        pdf.close()
+
+
+def _with_stable_ids(chunk: Document) -> Document:
+    # - chunk_ref: readable, stable citation reference
+    # - point_id: deterministic UUID to satisfy Qdrant point ID requirements
+    chunk_ref = _stable_chunk_id(
+        source=chunk.metadata.get("source"),
+        page=chunk.metadata.get("page"),
+        text=chunk.page_content,
+    )
+    chunk.metadata["chunk_ref"] = chunk_ref
+    chunk.metadata["point_id"] = _stable_point_uuid(chunk_ref)
+    return chunk
+
+
+def iter_chunks_from_pdf(
+    pdf_path: str,
+    chunk_size: int = 800,
+    chunk_overlap: int = 100,
+    workers: int | None = None,
+    window: int | None = None,
+) -> Iterator[Document]:
+    """
+    Streaming version of `load_and_chunk_pdf`: yields chunks page by page with the same
+    text, `chunk_ref` and `point_id` as the eager loader.
+    """
+    text_splitter = make_chunker(chunk_size, chunk_overlap)
+    for page in iter_pdf_pages(pdf_path, workers=workers, window=window):
+        for chunk in text_splitter.split_documents([page]):
+            yield _with_stable_ids(chunk)
+
+
 def load_and_chunk_pdf(
     pdf_path: str,
     chunk_size: int = 800,
@@ -40,27 +178,12 @@ def load_and_chunk_pdf(
     loader = PyPDFLoader(pdf_path)
     documents = loader.load()
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", " ", ""],
-    )
+    text_splitter = make_chunker(chunk_size, chunk_overlap)
 
     chunks = text_splitter.split_documents(documents)
 
-    # Add stable ids:
-    # - chunk_ref: readable, stable citation reference
-    # - point_id: deterministic UUID to satisfy Qdrant point ID requirements
-    for chunk in chunks:
-        chunk_ref = _stable_chunk_id(
-            source=chunk.metadata.get("source"),
-            page=chunk.metadata.get("page"),
-            text=chunk.page_content,
-        )
-        chunk.metadata["chunk_ref"] = chunk_ref
-        chunk.metadata["point_id"] = _stable_point_uuid(chunk_ref)
-
-    return chunks
+    # Add stable ids (see `_with_stable_ids`)
+    return [_with_stable_ids(chunk) for chunk in chunks]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+# embedded vector index: float32 .npy matrix + payload sidecar
+
+# rag_pipeline/local_index.py
+
+"""
+Exact top-k search over a memory-mapped NumPy matrix, for single-document / small-corpus
+deployments where a round trip to Qdrant Cloud costs more than the search itself.
+
+On-disk layout (one directory per index):
+  vectors.npy      float32 [n, dim], rows L2-normalised (dot product == cosine, like Qdrant COSINE)
+  payloads.jsonl   one JSON object per row: {"id": ..., "payload": {...}}
+  meta.json        {"embedding": {"backend", "model", "dim"}} of the model that built it
+
+The matrix is opened with `mmap_mode="r"`, so the OS page cache holds it and several
+processes share one copy. Search is one matrix-vector product plus `argpartition`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
+META_FILE = "meta.json"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: list[str],
+        payloads: list[dict[str, Any]],
+        meta: dict[str, Any] | None = None,
+    ):
+        if len(vectors) != len(payloads):
+            raise ValueError(f"{len(vectors)} vectors but {len(payloads)} payloads")
+        self.vectors = vectors
+        self.ids = ids
+        self.payloads = payloads
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "LocalVectorIndex":
+        path = Path(path)
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r")
+        ids: list[str] = []
+        payloads: list[dict[str, Any]] = []
+        with open(path / PAYLOADS_FILE, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                ids.append(row["id"])
+                payloads.append(row["payload"])
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8")) if (path / META_FILE).exists() else {}
+        return cls(vectors, ids, payloads, meta)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def search(self, query_vector: Sequence[float], top_k: int) -> list[tuple[float, dict[str, Any]]]:
+        """
+        Exact cosine top-k, best first, as (score, payload) pairs.
+        """
+        n = len(self.payloads)
+        if n == 0 or top_k <= 0:
+            return []
+        q = _normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = self.vectors @ q
+        k = min(top_k, n)
+        if k < n:
+            idx = np.argpartition(scores, n - k)[n - k :]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(float(scores[i]), self.payloads[i]) for i in idx]
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path: str, mtime_ns: int) -> LocalVectorIndex:
+    return LocalVectorIndex.load(path)
+
+
+def open_index(path: str | os.PathLike) -> LocalVectorIndex:
+    """
+    Load once per process; reloads automatically after a re-ingest rewrites the index.
+    """
+    path = str(path)
+    return _load_cached(path, os.stat(Path(path) / VECTORS_FILE).st_mtime_ns)
+
+
+class LocalIndexWriter:
+    """
+    Collects (id, vector, payload) rows during ingest and writes the index atomically on `close()`.
+    Re-adding an id replaces the earlier row, like a Qdrant upsert with deterministic ids.
+    """
+
+    def __init__(self, path: str | os.PathLike, embedding: dict[str, Any] | None = None):
+        self.path = Path(path)
+        self.embedding = embedding
+        self._rows: dict[str, int] = {}
+        self._vectors: list[np.ndarray] = []
+        self._payloads: list[dict[str, Any]] = []
+        self._ids: list[str] = []
+
+    def upsert(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], payloads: Sequence[dict[str, Any]]) -> None:
+        batch = _normalize(np.asarray(vectors, dtype=np.float32))
+        for point_id, vec, payload in zip(ids, batch, payloads):
+            point_id = str(point_id)
+            row = self._rows.get(point_id)
+            if row is None:
+                self._rows[point_id] = len(self._ids)
+                self._ids.append(point_id)
+                self._vectors.append(vec)
+                self._payloads.append(dict(payload))
+            else:
+                self._vectors[row] = vec
+                self._payloads[row] = dict(payload)
+
+    def set_payload(self, point_id: str, payload: dict[str, Any]) -> None:
+        self._payloads[self._rows[str(point_id)]].update(payload)
+
+    def close(self) -> int:
+        self.path.mkdir(parents=True, exist_ok=True)
+        dim = len(self._vectors[0]) if self._vectors else 0
+        matrix = np.stack(self._vectors) if self._vectors else np.zeros((0, dim), dtype=np.float32)
+
+        # Write to temp names then rename, so a serving process never maps a half-written file.
+        tmp_vectors = self.path / (VECTORS_FILE + ".tmp")
+        tmp_payloads = self.path / (PAYLOADS_FILE + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, matrix.astype(np.float32, copy=False))
+        with open(tmp_payloads, "w", encoding="utf-8") as f:
+            for point_id, payload in zip(self._ids, self._payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+        os.replace(tmp_payloads, self.path / PAYLOADS_FILE)
+        (self.path / META_FILE).write_text(json.dumps({"embedding": self.embedding}), encoding="utf-8")
+        os.replace(tmp_vectors, self.path / VECTORS_FILE)
+        return len(self._ids)
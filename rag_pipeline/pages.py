@@ -0,0 +1,105 @@
+# page-level vectors for coarse-to-fine retrieval
+
+# rag_pipeline/pages.py
+
+"""
+Page index for hierarchical retrieval.
+
+Ingest writes one vector per (source, page) into a second collection (`<collection>_pages`):
+the normalised mean of that page's chunk embeddings. No extra embedding / LLM calls are needed,
+and the centroid ranks pages by how much of their content is about the query.
+
+Retrieval is then coarse-to-fine: search the (much smaller) page collection for the best
+QDRANT_PAGE_FANOUT pages, and search chunks only within those pages using the `source` / `page`
+payload indexes created by rag_pipeline.collection.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import uuid
+from typing import Any, Iterable, Iterator, Sequence
+
+from qdrant_client import models
+
+from common.config import env_int, load_env
+
+load_env()
+
+# 0 = flat chunk search (default); N = search chunks within the best N pages
+PAGE_FANOUT = env_int("QDRANT_PAGE_FANOUT", 0)
+
+
+def pages_collection_name(collection_name: str, base: str | None = None) -> str:
+    """
+    `<collection>_pages`. QDRANT_PAGES_COLLECTION overrides the name for the base collection;
+    a shard `<base>_<shard>` then gets `<override>_<shard>`, so shards never share page points.
+    """
+    override = os.getenv("QDRANT_PAGES_COLLECTION")
+    if not override:
+        return f"{collection_name}_pages"
+    if base is None or collection_name == base:
+        return override
+    shard = collection_name[len(base) + 1 :] if collection_name.startswith(base + "_") else collection_name
+    return f"{override}_{shard}"
+
+
+def page_point_id(source: str | None, page: int | None) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source or 'unknown_source'}::page::{page}"))
+
+
+class PageCentroids:
+    """
+    Streaming accumulator fed (payload, vector) pairs in page order.
+    `add` yields a finished page whenever the (source, page) key changes; `flush` yields the last one.
+    Memory holds a single running sum, not the whole corpus.
+    """
+
+    def __init__(self) -> None:
+        self._key: tuple[Any, Any] | None = None
+        self._sum: list[float] = []
+        self._count = 0
+
+    def _finish(self) -> dict[str, Any] | None:
+        if self._key is None or not self._count:
+            return None
+        norm = math.sqrt(sum(x * x for x in self._sum)) or 1.0
+        source, page = self._key
+        return {
+            "id": page_point_id(source, page),
+            "vector": [x / norm for x in self._sum],
+            "payload": {"source": source, "page": page, "n_chunks": self._count},
+        }
+
+    def add(self, payloads: Sequence[dict[str, Any]], vectors: Sequence[Sequence[float]]) -> Iterator[dict[str, Any]]:
+        for payload, vector in zip(payloads, vectors):
+            key = (payload.get("source"), payload.get("page"))
+            if key != self._key:
+                done = self._finish()
+                if done is not None:
+                    yield done
+                self._key, self._sum, self._count = key, [0.0] * len(vector), 0
+            for i, x in enumerate(vector):
+                self._sum[i] += x
+            self._count += 1
+
+    def flush(self) -> Iterator[dict[str, Any]]:
+        done = self._finish()
+        self._key, self._sum, self._count = None, [], 0
+        if done is not None:
+            yield done
+
+
+def pages_filter(pages: Iterable[Any]) -> models.Filter | None:
+    """
+    Chunk filter matching any of the selected pages (scored points with a source/page payload).
+    """
+    should = []
+    for p in pages:
+        payload = getattr(p, "payload", None) or {}
+        must = [models.FieldCondition(key="page", match=models.MatchValue(value=payload.get("page")))]
+        if payload.get("source") is not None:
+            must.append(models.FieldCondition(key="source", match=models.MatchValue(value=payload["source"])))
+        should.append(models.Filter(must=must))
+    return models.Filter(should=should) if should else None
@@ -1,53 +1,211 @@
-# embed query and retrieve chunks from qdrant vector db
+# embed query and retrieve chunks from qdrant vector db (or the embedded local index)
 
 # rag_pipeline/retriever.py
 
+import heapq
+import math
 import os
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from langchain_openai import OpenAIEmbeddings
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 
-load_dotenv()
+from qdrant_client import QdrantClient, models
 
-COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "neura-dynamics-assignment-v1")
+from common.config import env_flag, env_float, env_int, load_env
+from common.deadline import call, client_timeout
+from observability.metrics import timed
+from rag_pipeline.bm25 import open_bm25, reciprocal_rank_fusion
+from rag_pipeline.chunk_store import open_chunk_store
+from rag_pipeline.collection import (
+    collection_embedding,
+    collection_name_from_env,
+    prefetch_vector_name,
+    search_params_from_env,
+    truncate_vector,
+)
+from rag_pipeline.embeddings import check_embedding_info, embed_query, get_embeddings
+from rag_pipeline.local_index import open_index
+from rag_pipeline.pages import PAGE_FANOUT, pages_collection_name, pages_filter
+from rag_pipeline.shards import registry_from_env
+
+load_env()
+
+# Same resolution as ingest (QDRANT_COLLECTION, then COLLECTION_NAME); the shard base name when sharded
+COLLECTION_NAME = collection_name_from_env()
 VECTOR_NAME = os.getenv("QDRANT_VECTOR_NAME", "text")  # you configured this in Qdrant Cloud
-MIN_SCORE = float(os.getenv("QDRANT_MIN_SCORE", "0.25"))
+MIN_SCORE = env_float("QDRANT_MIN_SCORE", 0.25)
+# Two-stage search: low-dim Matryoshka prefetch of top_k * factor candidates, rescored with the full vector
+PREFETCH_DIM = env_int("QDRANT_PREFETCH_DIM", 0)
+PREFETCH_LIMIT_FACTOR = env_int("QDRANT_PREFETCH_LIMIT_FACTOR", 4)
+# "qdrant" (default) or "local" (memory-mapped NumPy index written by ingest, see local_index.py)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "qdrant").strip().lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/index")
+# Hybrid search: BM25 index (built by ingest) queried alongside the dense backend, fused with RRF
+HYBRID_SEARCH = env_flag("HYBRID_SEARCH")
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "data/bm25")
+HYBRID_CANDIDATES = env_int("HYBRID_CANDIDATES", 3)  # each side fetches top_k * this
+RRF_K = env_int("RRF_K", 60)
+# Chunk text lives in the local chunk store (written by ingest); Qdrant returns payloads without it
+CHUNK_STORE = env_flag("CHUNK_STORE")
+CHUNK_STORE_DIR = os.getenv("CHUNK_STORE_DIR", "data/chunks")
+# Threads for concurrent lookups (BM25 next to dense search, one search per shard)
+RETRIEVAL_WORKERS = env_int("RETRIEVAL_WORKERS", 8)
+
+_pool: ThreadPoolExecutor | None = None
+# Collections whose recorded embedding already matched the configured one (checked once per process)
+_verified: set[str] = set()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+    return _pool
+
+
+def _reset_after_fork() -> None:
+    # The parent's threads don't exist in a forked worker (langgraph_pipeline.workers)
+    global _pool
+    _pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def filter_by_min_score(formatted: list[dict], min_score: float = MIN_SCORE) -> list[dict]:
+    """
+    Drop weak hits. If even the best match is below `min_score`, treat the question as
+    "not found in this document" and return nothing.
+    """
+    scores = [x["score"] for x in formatted if isinstance(x.get("score"), (int, float))]
+    if scores and max(scores) < min_score:
+        return []
+    return [x for x in formatted if (x.get("score") is None or x["score"] >= min_score)]
+
+
+def format_hit(payload: dict | None, score: float | None) -> dict:
+    payload = payload or {}
+    return {
+        "score": score,
+        "text": payload.get("text", ""),
+        "page": payload.get("page"),
+        "chunk_ref": payload.get("chunk_ref"),
+        "source": payload.get("source"),
+        # other (page, chunk_ref) locations of near-duplicate text collapsed at ingest
+        "aliases": payload.get("aliases") or [],
+    }
 
 
 class QdrantRetriever:
-    def __init__(self, top_k: int = 4):
+    def __init__(self, top_k: int = 4, tenant: str | None = None):
         self.top_k = top_k
-
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small"
+        # Collections to search (one unless QDRANT_SHARD_STRATEGY / the shard registry say otherwise)
+        self.collections = registry_from_env(COLLECTION_NAME).shards_for_query(
+            tenant=tenant or os.getenv("RAG_TENANT") or None
         )
 
+        self.embeddings = get_embeddings()
+
+        # Built per request: the HTTP timeout is what is left of the request deadline
+        timeout = client_timeout()
         self.qdrant = QdrantClient(
             url=os.getenv("QDRANT_URL"),
             api_key=os.getenv("QDRANT_API_KEY"),
+            timeout=math.ceil(timeout) if timeout else None,
         )
+        # HNSW ef + quantized search (oversampling / rescoring), if configured
+        self.search_params = search_params_from_env()
+        # Never fetch vectors; skip the text when it is hydrated from the local chunk store
+        self.chunk_store = open_chunk_store(CHUNK_STORE_DIR) if CHUNK_STORE else None
+        self.with_payload = models.PayloadSelectorExclude(exclude=["text"]) if self.chunk_store else True
+        self._verify_embedding()
 
-    def _query(self, query_vector: list[float]):
+    def _verify_embedding(self) -> None:
+        """
+        Fail fast (first retriever in the process) if a collection was built with another embedding.
+        """
+        current = getattr(self.embeddings, "info", None)
+        if not current:
+            return
+        for collection in self.collections:
+            if collection in _verified:
+                continue
+            stored = collection_embedding(self.qdrant.get_collection(collection))
+            check_embedding_info(stored, current, f"Collection {collection!r}")
+            _verified.add(collection)
+
+    def _select_pages(self, query_vector: list[float], collection: str) -> models.Filter | None:
+        """
+        Coarse stage of hierarchical retrieval: the best PAGE_FANOUT pages as a chunk filter.
+        """
+        with timed("qdrant.pages"):
+            pages = call(
+                "qdrant.pages",
+                self.qdrant.query_points,
+                collection_name=pages_collection_name(collection, COLLECTION_NAME),
+                query=query_vector,
+                using=VECTOR_NAME,
+                limit=PAGE_FANOUT,
+                with_payload=["source", "page"],
+            ).points
+        return pages_filter(pages)
+
+    def _query(
+        self,
+        query_vector: list[float],
+        query_filter: models.Filter | None = None,
+        collection: str | None = None,
+    ):
         """
         Support multiple qdrant-client versions.
 
         Newer versions expose `client.search(...)`.
         Some versions expose `client.query_points(...)`.
+
+        With QDRANT_PREFETCH_DIM set, `query_points` runs two stages in one call: a prefetch over
+        the truncated vector, then exact rescoring of those candidates with the full vector.
+        `query_filter` restricts the search to the pages chosen by `_select_pages`.
         """
+        collection = collection or COLLECTION_NAME
+        if PREFETCH_DIM and hasattr(self.qdrant, "query_points"):
+            return self.qdrant.query_points(
+                collection_name=collection,
+                prefetch=models.Prefetch(
+                    query=truncate_vector(query_vector, PREFETCH_DIM),
+                    using=prefetch_vector_name(VECTOR_NAME, PREFETCH_DIM),
+                    limit=self.top_k * PREFETCH_LIMIT_FACTOR,
+                    params=self.search_params,
+                    filter=query_filter,
+                ),
+                query=query_vector,
+                using=VECTOR_NAME,
+                limit=self.top_k,
+                with_payload=self.with_payload,
+                with_vectors=False,
+            ).points
+
         if hasattr(self.qdrant, "search"):
             return self.qdrant.search(
-                collection_name=COLLECTION_NAME,
+                collection_name=collection,
                 query_vector=(VECTOR_NAME, query_vector),
+                query_filter=query_filter,
                 limit=self.top_k,
+                search_params=self.search_params,
+                with_payload=self.with_payload,
+                with_vectors=False,
             )
 
         if hasattr(self.qdrant, "query_points"):
             # query_points returns a response object containing `.points`
             return self.qdrant.query_points(
-                collection_name=COLLECTION_NAME,
+                collection_name=collection,
                 query=query_vector,
                 using=VECTOR_NAME,
+                query_filter=query_filter,
                 limit=self.top_k,
+                search_params=self.search_params,
+                with_payload=self.with_payload,
+                with_vectors=False,
             ).points
 
         raise AttributeError(
@@ -55,33 +213,102 @@ class QdrantRetriever:
             "Upgrade it with: `pip install -U qdrant-client`."
         )
 
-    def retrieve(self, query: str) -> list[dict]:
-        query_vector = self.embeddings.embed_query(query)
-
-        results = self._query(query_vector)
-
-        formatted: list[dict] = []
-        for r in results:
-            payload = getattr(r, "payload", None) or {}
-            score = getattr(r, "score", None)
-            formatted.append(
-                {
-                    "score": score,
-                    "text": payload.get("text", ""),
-                    "page": payload.get("page"),
-                    "chunk_ref": payload.get("chunk_ref"),
-                    "source": payload.get("source"),
-                }
-            )
-        # If the best match is still weak, treat as "not found in this document"
-        scores = [x["score"] for x in formatted if isinstance(x.get("score"), (int, float))]
-        if scores and max(scores) < MIN_SCORE:
+    def _search_shard(self, collection: str, query_vector: list[float]) -> list:
+        query_filter = self._select_pages(query_vector, collection) if PAGE_FANOUT else None
+        with timed("qdrant.search"):
+            return list(call("qdrant.search", self._query, query_vector, query_filter, collection))
+
+    def _search(self, query_vector: list[float]) -> list:
+        if len(self.collections) == 1:
+            return self._search_shard(self.collections[0], query_vector)
+
+        # Fan out to every shard concurrently, then k-way merge the per-shard rankings on score.
+        futures = [
+            _executor().submit(copy_context().run, self._search_shard, collection, query_vector)
+            for collection in self.collections
+        ]
+        per_shard = [f.result() for f in futures]
+        merged = heapq.merge(*per_shard, key=lambda r: -(getattr(r, "score", None) or 0.0))
+        return [r for _, r in zip(range(self.top_k), merged)]
+
+    def retrieve(self, query: str, query_vector: list[float] | None = None) -> list[dict]:
+        if query_vector is None:
+            with timed("embed.query"):
+                query_vector = embed_query(self.embeddings, query)
+
+        results = self._search(query_vector)
+
+        formatted = [format_hit(getattr(r, "payload", None), getattr(r, "score", None)) for r in results]
+        if self.chunk_store is not None:
+            # One batched lookup for every hit's text
+            with timed("chunk_store.get"):
+                texts = self.chunk_store.get_many(str(r.id) for r in results)
+            for r, hit in zip(results, formatted):
+                hit["text"] = texts.get(str(r.id), hit["text"])
+        return filter_by_min_score(formatted)
+
+
+class LocalRetriever:
+    """
+    Same interface and result shape as QdrantRetriever, backed by the local NumPy index
+    (exact cosine top-k, no network hop for the search).
+    """
+
+    def __init__(self, top_k: int = 4, index_dir: str = LOCAL_INDEX_DIR):
+        self.top_k = top_k
+        self.embeddings = get_embeddings()
+        self.index = open_index(index_dir)
+        check_embedding_info(
+            self.index.meta.get("embedding"), getattr(self.embeddings, "info", None), f"Local index {index_dir!r}"
+        )
+
+    def retrieve(self, query: str, query_vector: list[float] | None = None) -> list[dict]:
+        if query_vector is None:
+            with timed("embed.query"):
+                query_vector = embed_query(self.embeddings, query)
+
+        with timed("local.search"):
+            results = self.index.search(query_vector, self.top_k)
+
+        return filter_by_min_score([format_hit(payload, score) for score, payload in results])
+
+
+class HybridRetriever:
+    """
+    Dense + BM25 in one call. The sparse lookup runs on a worker thread while the dense
+    retriever embeds and searches, so latency is max(dense, sparse) rather than the sum.
+
+    `dense` is a QdrantRetriever / LocalRetriever created with the candidate depth
+    (top_k * HYBRID_CANDIDATES). Its MIN_SCORE gate still decides "not in this document";
+    otherwise both rankings are fused with reciprocal rank fusion and cut to `top_k`.
+    Sparse-only hits carry score=None (BM25 scores aren't comparable to cosine).
+    """
+
+    def __init__(self, dense, top_k: int = 4, index_dir: str = BM25_INDEX_DIR):
+        self.dense = dense
+        self.top_k = top_k
+        self.bm25 = open_bm25(index_dir)
+
+    def _sparse(self, query: str) -> list[dict]:
+        with timed("bm25.search"):
+            results = self.bm25.search(query, self.dense.top_k)
+        return [format_hit(payload, None) for _, payload in results]
+
+    def retrieve(self, query: str, query_vector: list[float] | None = None) -> list[dict]:
+        # copy_context so the worker's timings land in the current request's metrics
+        sparse_future = _executor().submit(copy_context().run, self._sparse, query)
+        dense = self.dense.retrieve(query) if query_vector is None else self.dense.retrieve(query, query_vector)
+        sparse = sparse_future.result()
+        if not dense:
             return []
-        return [x for x in formatted if (x.get("score") is None or x["score"] >= MIN_SCORE)]
+        return reciprocal_rank_fusion([dense, sparse], k=RRF_K)[: self.top_k]
 
 
 if __name__ == "__main__":
-    retriever = QdrantRetriever()
+    retriever = LocalRetriever() if RETRIEVER_BACKEND == "local" else QdrantRetriever()
+    if HYBRID_SEARCH:
+        retriever.top_k *= HYBRID_CANDIDATES
+        retriever = HybridRetriever(retriever)
 
     query = "What is architecture of LLMS?"
     results = retriever.retrieve(query)
@@ -8,35 +8,232 @@ Expose a clean, side-effect-free function that LangGraph + Streamlit can call.
 import os
 from typing import Any
 
-from dotenv import load_dotenv
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-from rag_pipeline.retriever import QdrantRetriever
+from common.cache import ANSWERS, normalize_query
+from common.config import env_float, env_int, env_str, load_env
+from common.deadline import DeadlineExceeded, call, client_timeout, remaining
+from common.lazy import lazy
+from observability.metrics import record_cache, record_tokens, timed
+from rag_pipeline import extractive
+from rag_pipeline.embeddings import embed_query, embedding_settings
+from rag_pipeline.retriever import (
+    COLLECTION_NAME,
+    HYBRID_CANDIDATES,
+    HYBRID_SEARCH,
+    LOCAL_INDEX_DIR,
+    MIN_SCORE,
+    RETRIEVER_BACKEND,
+    HybridRetriever,
+    LocalRetriever,
+    QdrantRetriever,
+)
 
-load_dotenv()
+load_env()
 
+ChatOpenAI = lazy("langchain_openai", "ChatOpenAI")
 
-def answer_from_pdf(query: str) -> dict[str, Any]:
+CHAT_MODEL = env_str("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+RAG_TOP_K = env_int("RAG_TOP_K", 4)
+
+# Below this much time left on the request deadline, skip generation and answer with the citations
+DEADLINE_GENERATION_MIN_SECONDS = env_float("DEADLINE_GENERATION_MIN_SECONDS", 2.0)
+# Characters of each passage shown in a degraded (no generation) answer
+DEGRADED_SNIPPET_CHARS = 240
+
+
+def build_context(retrieved: list[dict[str, Any]]) -> str:
+    """
+    Numbered context blocks with (page, chunk_ref) headers, as sent to the LLM.
+    """
+    context_blocks: list[str] = []
+    for i, r in enumerate(retrieved, start=1):
+        context_blocks.append(
+            f"[{i}] page={r.get('page')} chunk_ref={r.get('chunk_ref')}\n{(r.get('text') or '').strip()}"
+        )
+    return "\n\n".join(context_blocks)
+
+
+def _make_retriever(top_k: int):
+    """
+    Dense backend from RETRIEVER_BACKEND (qdrant | local), wrapped in BM25 fusion when HYBRID_SEARCH is on.
+    """
+    dense_k = top_k * HYBRID_CANDIDATES if HYBRID_SEARCH else top_k
+
+    dense = LocalRetriever(top_k=dense_k) if RETRIEVER_BACKEND == "local" else QdrantRetriever(top_k=dense_k)
+    return HybridRetriever(dense, top_k=top_k) if HYBRID_SEARCH else dense
+
+
+def _query_embedder(retriever):
+    dense = getattr(retriever, "dense", retriever)
+    return getattr(dense, "embeddings", None)
+
+
+def _session_retrieve(retriever, query: str, session) -> tuple[list[dict[str, Any]], str]:
+    """
+    Retrieval for a query inside a conversation (see langgraph_pipeline.session).
+    Returns (chunks, mode): "reuse" answers a follow-up from the cached chunks without a search,
+    "extend" searches again and keeps some cached chunks, "search" is a fresh retrieval.
+    """
+    from langgraph_pipeline.session import SESSION_CARRY_CHUNKS, SESSION_REUSE_MIN_SIM
+
+    follow_up = session.is_follow_up(query)
+    text = session.contextualize(query)
+    embedder = _query_embedder(retriever)
+    if embedder is None:
+        return retriever.retrieve(text), "search"
+
+    with timed("embed.query"):
+        query_vector = embed_query(embedder, text)
+    if follow_up and session.chunks and session.similarity(query_vector) >= SESSION_REUSE_MIN_SIM:
+        record_cache("session_context", hit=True)
+        return [dict(c) for c in session.chunks], "reuse"
+
+    record_cache("session_context", hit=False)
+    retrieved = retriever.retrieve(text, query_vector=query_vector)
+    mode = "search"
+    if follow_up and session.chunks:
+        seen = {(r.get("page"), r.get("chunk_ref")) for r in retrieved}
+        carry = [c for c in session.chunks if (c.get("page"), c.get("chunk_ref")) not in seen]
+        retrieved = retrieved + carry[:SESSION_CARRY_CHUNKS]
+        mode = "extend"
+    if retrieved:
+        session.remember_retrieval(query_vector, retrieved)
+    return retrieved, mode
+
+
+def _history_messages(session) -> list:
+    if session is None:
+        return []
+    return [
+        HumanMessage(content=t.content) if t.role == "user" else AIMessage(content=t.content)
+        for t in session.history()
+    ]
+
+
+def degraded_answer(
+    query: str,
+    retrieved: list[dict[str, Any]],
+    citations: list[dict[str, Any]],
+    context_mode: str | None = None,
+) -> dict[str, Any]:
+    """
+    What the PDF route returns when the deadline leaves no time for the LLM: the retrieved
+    passages themselves, with their citations.
+    """
+    if not retrieved:
+        answer = "I couldn't search the document in time. Please try again."
+    else:
+        lines = ["I ran out of time to write an answer. The most relevant passages are:"]
+        for r in retrieved:
+            text = " ".join((r.get("text") or "").split())
+            if len(text) > DEGRADED_SNIPPET_CHARS:
+                text = text[:DEGRADED_SNIPPET_CHARS].rsplit(" ", 1)[0] + " ..."
+            lines.append(f"- {text} (page={r.get('page')}, chunk_ref={r.get('chunk_ref')})")
+        answer = "\n".join(lines)
+    return {
+        "route": "pdf",
+        "query": query,
+        "answer": answer,
+        "citations": citations,
+        "degraded": "deadline",
+        **({"context_reuse": context_mode} if context_mode else {}),
+    }
+
+
+def _answer_cache_key(query: str) -> str:
+    # Everything that changes which chunks are retrieved or how they are turned into an answer.
+    # CACHE_DIR/answer.jsonl is shared by every process that points at it, whatever it serves:
+    # the tenant, shard layout and embedding model keep their answers apart.
+    parts = [
+        RETRIEVER_BACKEND,
+        COLLECTION_NAME,
+        LOCAL_INDEX_DIR,
+        os.getenv("RAG_TENANT") or "",
+        os.getenv("QDRANT_SHARD_STRATEGY", "none").strip().lower(),
+        os.getenv("QDRANT_SHARDS", "1"),
+        ":".join(str(s or "") for s in embedding_settings()),
+        str(HYBRID_SEARCH),
+        str(RAG_TOP_K),
+        CHAT_MODEL,
+        str(extractive.EXTRACTIVE_ANSWERS),
+    ]
+    return "|".join(parts + [normalize_query(query)])
+
+
+def answer_from_pdf(query: str, session=None) -> dict[str, Any]:
     """
     Answer a question using RAG over the ingested PDF collection in Qdrant.
 
+    With the answer cache on (ANSWER_CACHE_SIZE, see common.cache), a self-contained question
+    asked before (or pre-warmed) is answered from the cache (`"answer_cache": "hit"`); follow-ups
+    in a session depend on the conversation and are never cached. Degraded answers and answers
+    without citations aren't stored.
+
+    `session` (langgraph_pipeline.session.Session) makes it conversation-aware: follow-ups
+    reuse or extend the previous turn's chunks and the prompt includes recent history.
+
+    With EXTRACTIVE_ANSWERS on, a factoid question whose top hit is a clear match is answered
+    with the best sentence(s) of the top chunks instead of a generation (rag_pipeline.extractive;
+    `"answer_mode": "extractive"`). Follow-ups in a session always generate.
+
+    Under a request deadline (common.deadline) that leaves less than DEADLINE_GENERATION_MIN_SECONDS
+    for generation, or that expires during a call, it returns `degraded_answer(...)` instead.
+
     Returns a structured dict so callers (LangGraph/Streamlit/tests) can easily consume it.
     """
-    chat_model = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
-    top_k = int(os.getenv("RAG_TOP_K", "4"))
+    key = None
+    if ANSWERS.enabled and (session is None or not session.is_follow_up(query)):
+        key = _answer_cache_key(query)
+        cached = ANSWERS.get(key)
+        if cached is not None:
+            if session is not None:
+                with session.lock:
+                    # Nothing was retrieved for this turn: a follow-up searches again
+                    session.query_vector, session.chunks = None, []
+            return {**cached, "query": query, "answer_cache": "hit"}
+
+    result = _answer_from_pdf(query, session)
+    if key is not None and result.get("citations") and not result.get("degraded"):
+        ANSWERS.put(key, {k: v for k, v in result.items() if k not in ("query", "context_reuse")})
+    return result
+
+
+def _answer_from_pdf(query: str, session=None) -> dict[str, Any]:
+    chat_model = CHAT_MODEL
+    top_k = RAG_TOP_K
 
-    retriever = QdrantRetriever(top_k=top_k)
-    retrieved = retriever.retrieve(query)
+    retriever = _make_retriever(top_k)
+    embedder = _query_embedder(retriever)
+    context_mode = None
+    query_vector = None
+    try:
+        if session is None and extractive.EXTRACTIVE_ANSWERS and embedder is not None:
+            # Embed here so the extractive scorer can reuse the vector
+            with timed("embed.query"):
+                query_vector = embed_query(embedder, query)
+            retrieved = retriever.retrieve(query, query_vector=query_vector)
+        elif session is None:
+            retrieved = retriever.retrieve(query)
+        else:
+            with session.lock:
+                retrieved, context_mode = _session_retrieve(retriever, query, session)
+                if context_mode == "search":
+                    query_vector = session.query_vector
+    except DeadlineExceeded:
+        return degraded_answer(query, [], [])
 
     citations: list[dict[str, Any]] = []
     seen: set[tuple[Any, Any]] = set()
     for r in retrieved:
-        key = (r.get("page"), r.get("chunk_ref"))
-        if key in seen:
-            continue
-        seen.add(key)
-        citations.append({"page": r.get("page"), "chunk_ref": r.get("chunk_ref")})
+        # A chunk collapsed at ingest also cites the pages its duplicates came from.
+        for c in [r, *(r.get("aliases") or [])]:
+            key = (c.get("page"), c.get("chunk_ref"))
+            if key in seen:
+                continue
+            seen.add(key)
+            citations.append({"page": c.get("page"), "chunk_ref": c.get("chunk_ref")})
 
     if not retrieved:
         return {
@@ -47,14 +244,25 @@ def answer_from_pdf(query: str) -> dict[str, Any]:
                 "Try asking something covered by the document."
             ),
             "citations": [],
+            **({"context_reuse": context_mode} if context_mode else {}),
         }
 
-    context_blocks: list[str] = []
-    for i, r in enumerate(retrieved, start=1):
-        context_blocks.append(
-            f"[{i}] page={r.get('page')} chunk_ref={r.get('chunk_ref')}\n{(r.get('text') or '').strip()}"
-        )
-    context = "\n\n".join(context_blocks)
+    if extractive.EXTRACTIVE_ANSWERS:
+        fast = extractive.extractive_answer(query, query_vector, retrieved, embedder, MIN_SCORE)
+        if fast is not None:
+            return {
+                "route": "pdf",
+                "query": query,
+                **fast,
+                "answer_mode": "extractive",
+                **({"context_reuse": context_mode} if context_mode else {}),
+            }
+
+    left = remaining()
+    if left is not None and left < DEADLINE_GENERATION_MIN_SECONDS:
+        return degraded_answer(query, retrieved, citations, context_mode)
+
+    context = build_context(retrieved)
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -65,6 +273,8 @@ def answer_from_pdf(query: str) -> dict[str, Any]:
                 "If the answer is not in the context, say you don't know.\n"
                 "You MUST include citations in the final answer using (page, chunk_ref) from the context items.\n",
             ),
+            # Earlier turns of the conversation (empty for one-shot queries)
+            MessagesPlaceholder("history", optional=True),
             (
                 "human",
                 "Question:\n{query}\n\n"
@@ -75,20 +285,27 @@ def answer_from_pdf(query: str) -> dict[str, Any]:
     )
 
     # Use direct llm.invoke so it's easy to unit-test and we still get full prompt/context in traces.
-    messages = prompt.format_messages(query=query, context=context)
-    llm = ChatOpenAI(model=chat_model, temperature=0)
-    response = llm.invoke(
-        messages,
-        config={
-            "tags": ["rag", "eval_target"],
-            "metadata": {
-                "route": "pdf",
-                "component": "rag_answer_generation",
-                "top_k": top_k,
-                "model": chat_model,
-            },
-        },
-    )
+    messages = prompt.format_messages(query=query, context=context, history=_history_messages(session))
+    llm = ChatOpenAI(model=chat_model, temperature=0, timeout=client_timeout())
+    try:
+        with timed("llm.rag"):
+            response = call(
+                "llm.rag",
+                llm.invoke,
+                messages,
+                config={
+                    "tags": ["rag", "eval_target"],
+                    "metadata": {
+                        "route": "pdf",
+                        "component": "rag_answer_generation",
+                        "top_k": top_k,
+                        "model": chat_model,
+                    },
+                },
+            )
+    except DeadlineExceeded:
+        return degraded_answer(query, retrieved, citations, context_mode)
+    record_tokens("rag_answer_generation", response)
     answer = getattr(response, "content", None) or str(response)
 
     return {
@@ -96,6 +313,7 @@ def answer_from_pdf(query: str) -> dict[str, Any]:
         "query": query,
         "answer": answer,
         "citations": citations,
+        **({"context_reuse": context_mode} if context_mode else {}),
     }
 
 
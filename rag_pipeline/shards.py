@@ -0,0 +1,142 @@
+# partition documents across several qdrant collections
+
+# rag_pipeline/shards.py
+
+"""
+Shard registry: which Qdrant collection a chunk is written to, and which collections a
+query has to search.
+
+Strategies (QDRANT_SHARD_STRATEGY):
+  - none   (default) everything in the base collection
+  - hash   QDRANT_SHARDS collections `<base>_s<i>`, chosen by a stable hash of the source file
+           (a document's pages always land in the same shard)
+  - source one collection per source document
+  - tenant one collection per tenant (INGEST_TENANT at ingest, RAG_TENANT at query time;
+           chunks and queries without a tenant use the `default` tenant, never every tenant)
+
+`source` / `tenant` shards are created on first ingest and recorded in the registry file
+(QDRANT_SHARD_REGISTRY, JSON), which the retriever reads to know the full shard list.
+Once the file exists its strategy is the one in use: a different QDRANT_SHARD_STRATEGY (or
+QDRANT_SHARDS for `hash`) is an error, not silently ignored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from common.config import env_str, load_env
+
+load_env()
+
+SHARD_REGISTRY_PATH = os.getenv("QDRANT_SHARD_REGISTRY", "data/shards.json")
+STRATEGIES = ("none", "hash", "source", "tenant")
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(key: str) -> str:
+    stem = Path(key).stem if ("/" in key or "." in key) else key
+    return _SLUG_RE.sub("-", stem.lower()).strip("-") or "default"
+
+
+def _stable_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass
+class ShardRegistry:
+    base: str
+    strategy: str = "none"
+    n_shards: int = 1
+    # source / tenant key -> collection
+    routes: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown QDRANT_SHARD_STRATEGY={self.strategy!r} (expected one of {STRATEGIES})")
+
+    def _key(self, payload: dict[str, Any]) -> str:
+        if self.strategy == "tenant":
+            return str(payload.get("tenant") or "default")
+        return str(payload.get("source") or "unknown_source")
+
+    def shard_for(self, payload: dict[str, Any]) -> str:
+        """
+        Collection for a chunk payload (registers new source / tenant shards).
+        """
+        if self.strategy == "none":
+            return self.base
+        key = self._key(payload)
+        if self.strategy == "hash":
+            return f"{self.base}_s{_stable_hash(key) % self.n_shards}"
+        shard = self.routes.get(key)
+        if shard is None:
+            shard = self.routes[key] = f"{self.base}_{_slug(key)}"
+        return shard
+
+    def shards(self) -> list[str]:
+        if self.strategy == "none":
+            return [self.base]
+        if self.strategy == "hash":
+            return [f"{self.base}_s{i}" for i in range(self.n_shards)]
+        return sorted(set(self.routes.values()))
+
+    def shards_for_query(self, tenant: str | None = None, sources: Iterable[str] | None = None) -> list[str]:
+        """
+        Collections a query must search: the tenant's shard, the shards holding `sources`, or all of them.
+        Tenant shards are never searched together: no tenant means the `default` one.
+        """
+        if self.strategy == "tenant":
+            shard = self.routes.get(tenant or "default")
+            return [shard] if shard else []
+        if sources and self.strategy == "hash":
+            return sorted({self.shard_for({"source": s}) for s in sources})
+        if sources and self.strategy == "source":
+            return sorted({self.routes[s] for s in sources if s in self.routes})
+        return self.shards()
+
+    def save(self, path: str | os.PathLike | None = None) -> None:
+        path = Path(path or SHARD_REGISTRY_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path: str, mtime_ns: int) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def registry_from_env(base: str, path: str | os.PathLike | None = None) -> ShardRegistry:
+    """
+    Registry file if it exists (routes recorded by earlier ingests), else env vars.
+    Raises ValueError if the env vars ask for a different layout than the file records.
+    """
+    path = str(path or SHARD_REGISTRY_PATH)
+    strategy = env_str("QDRANT_SHARD_STRATEGY")
+    n_shards = env_str("QDRANT_SHARDS")
+    if os.path.exists(path):
+        data = dict(_load_cached(path, os.stat(path).st_mtime_ns))
+        data["routes"] = dict(data.get("routes") or {})
+        registry = ShardRegistry(**data)
+        if strategy is not None and strategy.strip().lower() != registry.strategy:
+            raise ValueError(
+                f"QDRANT_SHARD_STRATEGY={strategy!r} but {path} records strategy {registry.strategy!r}: "
+                "re-ingest into a new registry (QDRANT_SHARD_REGISTRY) to change it"
+            )
+        if registry.strategy == "hash" and n_shards is not None and int(n_shards) != registry.n_shards:
+            raise ValueError(f"QDRANT_SHARDS={n_shards} but {path} records {registry.n_shards} hash shards")
+        return registry
+    return ShardRegistry(
+        base=base,
+        strategy=(strategy or "none").strip().lower(),
+        n_shards=int(n_shards or 1),
+    )
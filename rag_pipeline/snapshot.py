@@ -0,0 +1,419 @@
+# export / import a collection's chunks + vectors without re-embedding
+
+# rag_pipeline/snapshot.py
+
+"""
+Portable snapshots of an index: point ids, vectors and payloads. A collection can be rebuilt
+(disaster recovery, cloning an environment, offline test fixtures) without re-parsing the PDF
+or paying for embeddings again.
+
+Layout (one directory per snapshot, `<out>/<name>-<UTC timestamp>/`):
+  manifest.json     format version, source, count, dim, vector name, dtype, embedding record
+  vectors.npy       float32 [n, dim]              (--dtype float32, default)
+                    int8 [n, dim] + scales.npy    (--dtype int8: per-row symmetric scale, 4x smaller)
+  payloads.jsonl    {"id": ..., "payload": {...}} per row (same format as the local index)
+  payloads.arrow    Arrow IPC table (id, payload JSON) instead of JSONL (--payloads arrow, needs pyarrow)
+
+Payloads always carry the chunk text. With CHUNK_STORE on, export hydrates it from the chunk store
+and import moves it back there. With HYBRID_SEARCH on, import also rebuilds the BM25 index.
+
+Run:
+  python -m rag_pipeline.snapshot export --out data/snapshots                       # Qdrant (all shards)
+  python -m rag_pipeline.snapshot export --source local --dtype int8 --payloads arrow
+  python -m rag_pipeline.snapshot import data/snapshots/<name>-<ts>                  # into Qdrant
+  python -m rag_pipeline.snapshot import data/snapshots/<name>-<ts> --target local --index-dir data/index
+
+Import into Qdrant goes through the ingest sink. Shard routing, the Matryoshka prefetch vector, the
+chunk store and page centroids follow the current settings. Batches of SNAPSHOT_BATCH_SIZE points are
+sent SNAPSHOT_WORKERS at a time. Importing into a collection built with another embedding fails
+(EmbeddingMismatchError).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from common.config import env_int, load_env
+
+load_env()
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+PAYLOADS_JSONL = "payloads.jsonl"
+PAYLOADS_ARROW = "payloads.arrow"
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+SNAPSHOT_BATCH_SIZE = env_int("SNAPSHOT_BATCH_SIZE", 256)
+SNAPSHOT_WORKERS = env_int("SNAPSHOT_WORKERS", 4)
+# Points per scroll request when exporting from Qdrant
+SCROLL_LIMIT = env_int("SNAPSHOT_SCROLL_LIMIT", 1000)
+
+
+# ---------------------------------------------------------------------------
+# encoding
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8: q = round(v / scale * 127), scale = max |v| of the row.
+    """
+    scales = np.abs(vectors).max(axis=1).astype(np.float32)
+    safe = np.where(scales == 0, 1.0, scales)
+    q = np.clip(np.rint(vectors / safe[:, None] * 127.0), -127, 127).astype(np.int8)
+    return q, scales
+
+
+def dequantize_int8(q: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return q.astype(np.float32) * (scales[:, None] / 127.0)
+
+
+def _write_payloads(path: Path, ids: list[str], payloads: list[dict[str, Any]], fmt: str) -> str:
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("--payloads arrow needs pyarrow: `pip install pyarrow`") from e
+        table = pa.table(
+            {"id": ids, "payload": [json.dumps(p, ensure_ascii=False) for p in payloads]}
+        )
+        with pa.OSFile(str(path / PAYLOADS_ARROW), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return PAYLOADS_ARROW
+    with open(path / PAYLOADS_JSONL, "w", encoding="utf-8") as f:
+        for point_id, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+    return PAYLOADS_JSONL
+
+
+def _read_payloads(path: Path, manifest: dict[str, Any]) -> tuple[list[str], list[dict[str, Any]]]:
+    if manifest["payloads"] == PAYLOADS_ARROW:
+        import pyarrow as pa
+
+        with pa.memory_map(str(path / PAYLOADS_ARROW), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.column("id").to_pylist(), [json.loads(p) for p in table.column("payload").to_pylist()]
+    ids: list[str] = []
+    payloads: list[dict[str, Any]] = []
+    with open(path / PAYLOADS_JSONL, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            ids.append(row["id"])
+            payloads.append(row["payload"])
+    return ids, payloads
+
+
+# ---------------------------------------------------------------------------
+# snapshot directory
+
+
+def write_snapshot(
+    out_dir: str | os.PathLike,
+    name: str,
+    ids: list[str],
+    vectors: np.ndarray,
+    payloads: list[dict[str, Any]],
+    source: dict[str, Any],
+    vector_name: str = "text",
+    embedding: dict[str, Any] | None = None,
+    dtype: str = "float32",
+    payload_format: str = "jsonl",
+) -> Path:
+    """
+    Write a new versioned snapshot directory and return its path. It is built under a temporary
+    name and renamed, so a half-written snapshot is never picked up.
+    """
+    if dtype not in ("float32", "int8"):
+        raise ValueError(f"Unknown snapshot dtype {dtype!r} (expected float32 or int8)")
+    if len(ids) != len(payloads) or len(ids) != len(vectors):
+        raise ValueError(f"{len(ids)} ids, {len(vectors)} vectors, {len(payloads)} payloads")
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    final = Path(out_dir) / f"{name}-{stamp}"
+    tmp = Path(out_dir) / f".{name}-{stamp}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+    if dtype == "int8":
+        q, scales = quantize_int8(matrix)
+        np.save(tmp / VECTORS_FILE, q)
+        np.save(tmp / SCALES_FILE, scales)
+    else:
+        np.save(tmp / VECTORS_FILE, matrix)
+    payloads_file = _write_payloads(tmp, ids, payloads, payload_format)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created": stamp,
+        "source": source,
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if len(ids) else 0,
+        "vector_name": vector_name,
+        "dtype": dtype,
+        "payloads": payloads_file,
+        "embedding": embedding,
+    }
+    (tmp / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, final)
+    return final
+
+
+class Snapshot:
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        version = self.manifest.get("format_version")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format_version={version!r} in {self.path}")
+        self.ids, self.payloads = _read_payloads(self.path, self.manifest)
+        self._vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        self._scales = np.load(self.path / SCALES_FILE) if self.manifest["dtype"] == "int8" else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def embedding(self) -> dict[str, Any] | None:
+        return self.manifest.get("embedding")
+
+    def vectors(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """
+        float32 rows [start, stop), dequantized if the snapshot is int8.
+        """
+        rows = np.asarray(self._vectors[start:stop])
+        if self._scales is not None:
+            return dequantize_int8(rows, self._scales[start:stop])
+        return rows.astype(np.float32, copy=False)
+
+    def batches(
+        self, size: int, order: list[int] | None = None
+    ) -> Iterator[tuple[list[str], list[list[float]], list[dict[str, Any]]]]:
+        """
+        Rows in batches of `size`, in file order or in the row `order` given.
+        """
+        if order is None:
+            for start in range(0, len(self.ids), size):
+                stop = start + size
+                yield self.ids[start:stop], self.vectors(start, stop).tolist(), self.payloads[start:stop]
+            return
+        for start in range(0, len(order), size):
+            rows = order[start : start + size]
+            vectors = np.asarray(self._vectors[rows])
+            if self._scales is not None:
+                vectors = dequantize_int8(vectors, self._scales[rows])
+            yield (
+                [self.ids[i] for i in rows],
+                vectors.astype(np.float32, copy=False).tolist(),
+                [self.payloads[i] for i in rows],
+            )
+
+
+def page_order(payloads: list[dict[str, Any]]) -> list[int]:
+    """
+    Row indices sorted by (source, page), the order PageCentroids needs (stable within a page).
+    """
+
+    def key(i: int) -> tuple[str, int]:
+        page = payloads[i].get("page")
+        return str(payloads[i].get("source") or ""), page if isinstance(page, int) else -1
+
+    return sorted(range(len(payloads)), key=key)
+
+
+def latest_snapshot(out_dir: str | os.PathLike, name: str) -> Path | None:
+    candidates = sorted(p for p in Path(out_dir).glob(f"{name}-*") if (p / MANIFEST_FILE).exists())
+    return candidates[-1] if candidates else None
+
+
+# ---------------------------------------------------------------------------
+# export
+
+
+def export_qdrant(client, collections: list[str], vector_name: str, chunk_store=None):
+    """
+    Scroll every point (id, named vector, payload) out of `collections`.
+    Returns (ids, vectors, payloads, embedding record of the first collection).
+    """
+    from rag_pipeline.collection import collection_embedding
+
+    ids: list[str] = []
+    vectors: list[list[float]] = []
+    payloads: list[dict[str, Any]] = []
+    embedding = None
+    for collection in collections:
+        if not client.collection_exists(collection):
+            continue
+        embedding = embedding or collection_embedding(client.get_collection(collection))
+        offset = None
+        while True:
+            records, offset = client.scroll(
+                collection_name=collection,
+                limit=SCROLL_LIMIT,
+                offset=offset,
+                with_payload=True,
+                with_vectors=[vector_name],
+            )
+            for r in records:
+                vector = r.vector[vector_name] if isinstance(r.vector, dict) else r.vector
+                ids.append(str(r.id))
+                vectors.append(vector)
+                payloads.append(dict(r.payload or {}))
+            if offset is None:
+                break
+
+    if chunk_store is not None:
+        missing = [point_id for point_id, p in zip(ids, payloads) if "text" not in p]
+        texts = chunk_store.get_many(missing)
+        for point_id, payload in zip(ids, payloads):
+            if "text" not in payload and point_id in texts:
+                payload["text"] = texts[point_id]
+    # Scroll returns point-id order; keep the pages of a document together in the snapshot
+    order = page_order(payloads)
+    return [ids[i] for i in order], [vectors[i] for i in order], [payloads[i] for i in order], embedding
+
+
+def export_local(index_dir: str):
+    from rag_pipeline.local_index import LocalVectorIndex
+
+    index = LocalVectorIndex.load(index_dir)
+    return list(index.ids), np.asarray(index.vectors), list(index.payloads), index.meta.get("embedding")
+
+
+# ---------------------------------------------------------------------------
+# import
+
+
+def import_local(snapshot: Snapshot, index_dir: str, sparse=None) -> int:
+    from rag_pipeline.local_index import LocalIndexWriter
+
+    writer = LocalIndexWriter(index_dir, embedding=snapshot.embedding)
+    for ids, vectors, payloads in snapshot.batches(SNAPSHOT_BATCH_SIZE * SNAPSHOT_WORKERS):
+        writer.upsert(ids, vectors, payloads)
+        if sparse is not None:
+            sparse.upsert(ids, payloads)
+    return writer.close()
+
+
+def import_qdrant(snapshot: Snapshot, client, collection: str, chunk_store=None, sparse=None) -> int:
+    from dataclasses import replace
+
+    from rag_pipeline.collection import spec_from_env
+    from rag_pipeline.ingest import QdrantSink
+    from rag_pipeline.shards import registry_from_env
+
+    spec = spec_from_env(collection, embedding=snapshot.embedding)
+    if snapshot.manifest.get("dim"):
+        spec = replace(spec, size=int(snapshot.manifest["dim"]))
+    sink = QdrantSink(
+        client,
+        spec,
+        registry_from_env(collection),
+        chunk_store=chunk_store,
+        batch_size=SNAPSHOT_BATCH_SIZE,
+        workers=SNAPSHOT_WORKERS,
+    )
+    # Enough rows per sink call that every worker gets a full batch. Page order, so each page
+    # centroid (PAGE_FANOUT) is built from all of its chunks, also for snapshots written unsorted.
+    order = page_order(snapshot.payloads)
+    for ids, vectors, payloads in snapshot.batches(SNAPSHOT_BATCH_SIZE * SNAPSHOT_WORKERS, order):
+        sink.upsert(ids, vectors, payloads)
+        if sparse is not None:
+            sparse.upsert(ids, payloads)
+    return sink.close()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+
+
+def main(argv: list[str] | None = None) -> Path | int:
+    # Same settings (collection, index dirs, chunk store, BM25) as ingestion
+    from rag_pipeline import ingest
+    from rag_pipeline.bm25 import BM25Writer
+    from rag_pipeline.chunk_store import ChunkStoreWriter, open_chunk_store
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Dump an index into a new snapshot directory")
+    exp.add_argument("--source", choices=["qdrant", "local"], default=ingest.RETRIEVER_BACKEND)
+    exp.add_argument("--dtype", choices=["float32", "int8"], default="float32")
+    exp.add_argument("--payloads", choices=["jsonl", "arrow"], default="jsonl")
+
+    imp = sub.add_parser("import", help="Bulk-load a snapshot into Qdrant or a local index")
+    imp.add_argument("snapshot", nargs="?", help="Snapshot directory (default: the latest one for --collection)")
+    imp.add_argument("--target", choices=["qdrant", "local"], default=ingest.RETRIEVER_BACKEND)
+
+    for p in (exp, imp):
+        p.add_argument("--collection", default=ingest.COLLECTION_NAME)
+        p.add_argument("--index-dir", default=ingest.LOCAL_INDEX_DIR)
+        p.add_argument("--out", default=SNAPSHOT_DIR, help="Directory holding the snapshots")
+    args = parser.parse_args(argv)
+
+    def qdrant():
+        from qdrant_client import QdrantClient
+
+        return QdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+            timeout=ingest.QDRANT_TIMEOUT_SECONDS,
+        )
+
+    start = time.perf_counter()
+    if args.command == "export":
+        if args.source == "local":
+            ids, vectors, payloads, embedding = export_local(args.index_dir)
+            name, source = args.collection, {"backend": "local", "index_dir": args.index_dir}
+        else:
+            from rag_pipeline.shards import registry_from_env
+
+            collections = registry_from_env(args.collection).shards()
+            store = open_chunk_store(ingest.CHUNK_STORE_DIR) if ingest.CHUNK_STORE else None
+            ids, vectors, payloads, embedding = export_qdrant(qdrant(), collections, ingest.VECTOR_NAME, store)
+            name, source = args.collection, {"backend": "qdrant", "collections": collections}
+        path = write_snapshot(
+            args.out,
+            name,
+            ids,
+            np.asarray(vectors, dtype=np.float32),
+            payloads,
+            source,
+            vector_name=ingest.VECTOR_NAME,
+            embedding=embedding,
+            dtype=args.dtype,
+            payload_format=args.payloads,
+        )
+        print(f"Exported {len(ids)} points to {path} ({time.perf_counter() - start:.1f}s)")
+        return path
+
+    path = args.snapshot or latest_snapshot(args.out, args.collection)
+    if path is None:
+        parser.error(f"No snapshot for {args.collection!r} in {args.out}")
+    snapshot = Snapshot(path)
+    sparse = BM25Writer(ingest.BM25_INDEX_DIR) if ingest.HYBRID_SEARCH else None
+    if args.target == "local":
+        total = import_local(snapshot, args.index_dir, sparse=sparse)
+        where = f"local index {args.index_dir}"
+    else:
+        store = ChunkStoreWriter(ingest.CHUNK_STORE_DIR) if ingest.CHUNK_STORE else None
+        total = import_qdrant(snapshot, qdrant(), args.collection, chunk_store=store, sparse=sparse)
+        where = f"Qdrant collection {args.collection}"
+    if sparse is not None:
+        sparse.close()
+    print(f"Imported {total} points from {path} into {where} ({time.perf_counter() - start:.1f}s)")
+    return total
+
+
+if __name__ == "__main__":
+    main()
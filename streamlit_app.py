@@ -1,48 +1,86 @@
 import os
+import queue
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
 
 import streamlit as st
-from dotenv import load_dotenv
 
-from langgraph_pipeline.graph import run_agent
+from common.config import load_env
+from langgraph_pipeline.graph import get_app, stream_agent
+from langgraph_pipeline.prewarm import QUICK_QUESTIONS
+from langgraph_pipeline.session import SESSIONS
+from observability.metrics import start_metrics_server
 
-load_dotenv()
+load_env()
+
+
+@st.cache_resource
+def _metrics_server():
+    # One /metrics endpoint per Streamlit process (not per rerun).
+    port = os.getenv("METRICS_PORT")
+    return start_metrics_server(int(port)) if port else None
+
+
+_metrics_server()
+
+# Older messages are only rendered on demand, so reruns stay O(N) in the visible window.
+HISTORY_WINDOW = int(os.getenv("STREAMLIT_HISTORY_WINDOW", "20"))
+AGENT_WORKERS = int(os.getenv("STREAMLIT_AGENT_WORKERS", "4"))
+
+
+@dataclass
+class AgentJob:
+    query: str
+    future: Future
+    events: "queue.Queue[tuple[str, dict[str, Any]]]" = field(default_factory=queue.Queue)
+
+
+class AgentRuntime:
+    """
+    Process-wide agent runtime (shared across sessions and reruns): the compiled graph
+    plus a background executor, so generation never blocks the script run.
+    """
+
+    def __init__(self, workers: int):
+        self.app = get_app()  # compile once, not per interaction
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent")
+
+    def submit(self, query: str, session_id: str | None = None) -> AgentJob:
+        events: "queue.Queue[tuple[str, dict[str, Any]]]" = queue.Queue()
+
+        def _run() -> dict[str, Any]:
+            final: dict[str, Any] = {}
+            for node, state in stream_agent(query, session_id=session_id):
+                events.put((node, state))
+                if node == "done":
+                    final = state
+            return final
+
+        return AgentJob(query=query, future=self.executor.submit(_run), events=events)
+
+
+@st.cache_resource
+def _runtime() -> AgentRuntime:
+    return AgentRuntime(AGENT_WORKERS)
 
 st.set_page_config(page_title="Neura Dynamics Assignment Demo", page_icon="🤖", layout="centered")
 
 st.title("Neura Dynamics Assignment Demo")
 st.caption("Weather (OpenWeatherMap) + PDF Q&A (RAG on Qdrant) via LangGraph")
 
-QUICK_QUESTIONS = [
-    # Weather
-    "Weather — What's the weather in Mumbai right now?",
-    "Weather — Should I carry an umbrella in Pune today?",
-    "Weather — Temperature of Darjeeling?",
-    "Weather — Is it raining in Delhi right now?",
-    "Weather — What's the humidity in Bengaluru?",
-    "Weather — What's the wind speed in Chennai today?",
-    "Weather — Forecast for Hyderabad today?",
-    "Weather — What's the weather in Amritsar, IN today?",
-    "Weather — What's the temperature in Nerul?",
-    "Weather — What's the temperature in sector 23 of Nerul?",
-    # PDF
-    "PDF — What is the main topic of the document?",
-    "PDF — Explain retrieval-augmented generation (RAG).",
-    "PDF — In which year was chain-of-thought prompting demonstrated?",
-    "PDF — What does the document say about system prompts?",
-    "PDF — Summarize the section about transformers.",
-    "PDF — What does the document say about RLHF?",
-    "PDF — What are the key limitations discussed in the document?",
-    "PDF — What examples of extensibility techniques are mentioned?",
-    "PDF — Does the document mention GPT-4o? If yes, what does it say?",
-    "PDF — Who is Shah Rukh Khan? (should say not in the document)",
-]
-
 
 def _init_state():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     if "pending_query" not in st.session_state:
         st.session_state.pending_query = None
+    if "job" not in st.session_state:
+        st.session_state.job = None
+    if "session_id" not in st.session_state:
+        # Server-side conversation state (history + retrieved chunks) for follow-up questions
+        st.session_state.session_id = uuid.uuid4().hex
 
 
 def _render_message(msg: dict):
@@ -61,6 +99,10 @@ def _render_message(msg: dict):
             with cols[1]:
                 if route_reason:
                     st.caption(f"Reason: `{route_reason}`")
+            if meta.get("answer_mode") == "extractive":
+                st.caption("Quoted from the document (no generation).")
+            if meta.get("degraded"):
+                st.caption("Partial answer: the request hit its deadline.")
 
             citations = meta.get("citations") or []
             if route == "pdf" and citations:
@@ -71,6 +113,50 @@ def _render_message(msg: dict):
             st.markdown(msg.get("content", ""))
 
 
+def _render_history(messages: list[dict]):
+    older = messages[:-HISTORY_WINDOW] if len(messages) > HISTORY_WINDOW else []
+    if older and st.toggle(f"Show {len(older)} earlier messages", value=False):
+        for m in older:
+            _render_message(m)
+    for m in messages[len(older):]:
+        _render_message(m)
+
+
+_STAGE_LABELS = {
+    "route": lambda s: f"Routed to **{s.get('route')}** — {'fetching weather' if s.get('route') == 'weather' else 'retrieving from the PDF'}…",
+    "weather": lambda s: "Weather answer ready.",
+    "pdf": lambda s: "PDF answer ready.",
+}
+
+
+def _await_job(job: AgentJob):
+    """
+    Stream node updates into a status box while the job runs in the background executor.
+    A rerun (e.g. a sidebar click) simply re-attaches to the same job.
+    """
+    with st.chat_message("assistant"):
+        with st.status("Routing…", expanded=False) as status:
+            while True:
+                try:
+                    node, state = job.events.get(timeout=0.1)
+                except queue.Empty:
+                    if job.future.done() and job.events.empty():
+                        break
+                    continue
+                if node in _STAGE_LABELS:
+                    status.update(label=_STAGE_LABELS[node](state))
+                if node == "done":
+                    break
+            try:
+                result = job.future.result()
+                status.update(label="Done", state="complete")
+            except Exception as e:  # surface failures instead of a silent spinner
+                result = {"answer": f"Sorry—the request failed: {e}"}
+                status.update(label="Failed", state="error")
+
+    return result
+
+
 _init_state()
 
 with st.sidebar:
@@ -89,48 +175,37 @@ with st.sidebar:
         if st.button("Clear chat", use_container_width=True):
             st.session_state.messages = []
             st.session_state.pending_query = None
+            st.session_state.job = None
+            SESSIONS.drop(st.session_state.session_id)
+            st.session_state.session_id = uuid.uuid4().hex
             st.rerun()
 
-for m in st.session_state.messages:
-    _render_message(m)
+_render_history(st.session_state.messages)
 
-user_query = st.chat_input("Ask about weather or ask from the PDF…")
-if st.session_state.pending_query and not user_query:
+user_query = st.chat_input("Ask about weather or ask from the PDF…", disabled=st.session_state.job is not None)
+if st.session_state.pending_query and not user_query and st.session_state.job is None:
     user_query = st.session_state.pending_query
     st.session_state.pending_query = None
-if user_query:
+if user_query and st.session_state.job is None:
     st.session_state.messages.append({"role": "user", "content": user_query})
     _render_message(st.session_state.messages[-1])
+    st.session_state.job = _runtime().submit(user_query, session_id=st.session_state.session_id)
 
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            result = run_agent(user_query)
-
-        answer = result.get("answer") or "Sorry—no answer was generated."
-        st.markdown(answer)
-
-        cols = st.columns(2)
-        with cols[0]:
-            st.caption(f"Route: **{result.get('route') or 'unknown'}**")
-        with cols[1]:
-            if result.get("route_reason"):
-                st.caption(f"Reason: `{result.get('route_reason')}`")
-
-        citations = result.get("citations") or []
-        if result.get("route") == "pdf" and citations:
-            with st.expander("Citations"):
-                for c in citations:
-                    st.write(f"- page={c.get('page')} | chunk_ref={c.get('chunk_ref')}")
-
+job: AgentJob | None = st.session_state.job
+if job is not None:
+    result = _await_job(job)
+    st.session_state.job = None
     st.session_state.messages.append(
         {
             "role": "assistant",
-            "content": answer,
+            "content": result.get("answer") or "Sorry—no answer was generated.",
             "meta": {
                 "route": result.get("route"),
                 "route_reason": result.get("route_reason"),
                 "citations": result.get("citations") or [],
+                "degraded": result.get("degraded"),
+                "answer_mode": result.get("answer_mode"),
             },
         }
     )
-
+    st.rerun()
@@ -0,0 +1,70 @@
+import sys
+
+import pytest
+
+
+def _pdf_bytes(pages: list[str]) -> bytes:
+    """
+    Minimal valid PDF (Helvetica text, one content stream per page) for offline loader tests.
+    """
+    objects: list[bytes] = []
+    n = len(pages)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages):
+        lines = []
+        for j, line in enumerate(text.split("\n")):
+            esc = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            lines.append(f"BT /F1 10 Tf 40 {780 - 14 * j} Td ({esc}) Tj ET")
+        stream = "\n".join(lines).encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    def _make(pages: list[str], name: str = "doc.pdf") -> str:
+        path = tmp_path / name
+        path.write_bytes(_pdf_bytes(pages))
+        return str(path)
+
+    return _make
+
+
+@pytest.fixture(autouse=True)
+def _ingest_checkpoint_dir(tmp_path, monkeypatch):
+    # Keep ingest checkpoints out of the working tree, without importing ingest (and its SDKs)
+    # into tests that never use it: the env var covers a first import, the attribute a later test
+    path = str(tmp_path / "ingest_checkpoint")
+    monkeypatch.setenv("INGEST_CHECKPOINT_DIR", path)
+    ingest = sys.modules.get("rag_pipeline.ingest")
+    if ingest is not None:
+        monkeypatch.setattr(ingest, "INGEST_CHECKPOINT_DIR", path)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_caches(tmp_path, monkeypatch):
+    # Every test starts cold and never reads or writes the real CACHE_DIR
+    from common import cache
+
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    cache.clear_all()
+    yield
+    cache.clear_all()
@@ -0,0 +1,137 @@
+def test_latency_model_is_repeatable():
+    from benchmarks.fakes import LatencyModel
+
+    a = LatencyModel.parse("lognormal:100:400@0.1", seed=3)
+    b = LatencyModel.parse("lognormal:100:400@0.1", seed=3)
+    assert [a.sample_ms() for _ in range(5)] == [b.sample_ms() for _ in range(5)]
+    assert a.failure_rate == 0.1
+
+
+def test_percentile_interpolates():
+    from benchmarks.stats import percentile
+
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_run_agent_end_to_end_with_fakes():
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from langgraph_pipeline.graph import run_agent
+
+    with install_fakes(FakeProfile.zero()):
+        weather = run_agent("What's the weather in Mumbai?")
+        pdf = run_agent("Explain retrieval-augmented generation (RAG).")
+
+    assert weather["route"] == "weather"
+    assert "Fake answer" in weather["answer"]
+    assert pdf["route"] == "pdf"
+    assert pdf["citations"]
+
+
+def test_benchmark_reports_all_modes():
+    from benchmarks.fakes import FakeProfile
+    from benchmarks.run_agent_bench import run_benchmark
+
+    rows = run_benchmark(FakeProfile.zero(), ["sequential", "threaded", "async"], n_requests=8, concurrency=4)
+    assert [r["mode"] for r in rows] == ["sequential", "threaded", "async"]
+    for r in rows:
+        assert r["requests"] == 8 and r["errors"] == 0
+        assert r["p99_ms"] >= r["p50_ms"] >= 0
+        assert "node.route" in r["stages_ms"]
+
+
+def test_retrieval_sweep_reports_recall_and_mrr():
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from benchmarks.fakes import SAMPLE_CORPUS, HashingEmbeddings
+    from benchmarks.retrieval_sweep import Label, SweepGrid, run_sweep
+
+    pages = [Document(page_content=text, metadata={"page": page, "source": "sample.pdf"}) for page, text in SAMPLE_CORPUS]
+
+    def chunk_fn(size: int, overlap: int):
+        splitter = RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=overlap)
+        return splitter.split_documents(pages)
+
+    labels = [
+        Label("When was chain-of-thought prompting demonstrated?", page=4, evidence="2022"),
+        Label("What is reinforcement learning from human feedback?", page=6),
+    ]
+    grid = SweepGrid(chunk_sizes=(60, 200), chunk_overlaps=(0,), top_ks=(1, 4), min_scores=(0.0, 0.99), hnsw_efs=(16,))
+
+    rows = run_sweep(chunk_fn, labels, grid, HashingEmbeddings(dim=256))
+    assert len(rows) == 2 * 2 * 2
+    best = max(rows, key=lambda r: r["recall_at_k"])
+    assert best["recall_at_k"] == 1.0 and best["mrr"] > 0
+    strict = [r for r in rows if r["min_score"] == 0.99]
+    assert all(r["recall_at_k"] == 0 and r["prompt_tokens"] == 0 for r in strict)
+
+
+def test_loadgen_stage_parsing_and_poisson_schedule():
+    from benchmarks.loadgen import Stage, parse_stage, poisson_schedule
+
+    assert parse_stage("60s@5") == Stage(60.0, 5.0)
+    assert parse_stage("2m@0.5") == Stage(120.0, 0.5)
+    assert parse_stage("500ms@100") == Stage(0.5, 100.0)
+
+    stages = [Stage(100.0, 2.0), Stage(100.0, 8.0)]
+    schedule = poisson_schedule(stages, seed=1)
+    assert schedule == poisson_schedule(stages, seed=1)
+    first = sum(1 for _, s in schedule if s == 0)
+    second = sum(1 for _, s in schedule if s == 1)
+    assert 150 < first < 250 and 650 < second < 950
+    assert all(0 <= t < 200 for t, _ in schedule)
+
+
+def test_loadgen_open_loop_counts_errors_and_routes():
+    from benchmarks.loadgen import Stage, report_stages, run_load
+
+    calls = []
+
+    def target(query: str):
+        calls.append(query)
+        if query == "boom":
+            raise RuntimeError("down")
+        return {"route": "pdf"}
+
+    result = run_load(target, ["a", "boom"], [Stage(0.5, 40.0)], seed=3)
+    row = report_stages(result)[0]
+    assert row["requests"] == len(calls) > 0
+    assert 0 < row["error_rate"] < 1
+    assert row["routes"].startswith("pdf=")
+
+
+def test_matryoshka_bench_recall_improves_with_dim():
+    from benchmarks.matryoshka_bench import make_queries, run, synthetic_corpus
+
+    corpus = synthetic_corpus(2000, dim=256)
+    rows = run(corpus, make_queries(corpus, 30), dims=[32, 128], factors=[4], top_k=4)
+
+    assert rows[0]["dim"] == 256 and rows[0]["recall_at_k"] == 1.0
+    assert rows[1]["recall_at_k"] < rows[2]["recall_at_k"] <= 1.0
+
+
+def test_latency_qdrant_client_delays_every_read_method():
+    import time
+
+    from benchmarks.fakes import LatencyModel, LatencyQdrantClient, build_memory_qdrant, hashed_vector
+    from rag_pipeline import retriever as retriever_mod
+
+    client = LatencyQdrantClient(build_memory_qdrant(), LatencyModel(median_ms=30))
+    name, vector = retriever_mod.COLLECTION_NAME, hashed_vector("transformer", 1536)
+    reads = {
+        "query_points": lambda: client.query_points(name, query=vector, using=retriever_mod.VECTOR_NAME, limit=2),
+        "scroll": lambda: client.scroll(name, limit=2),
+        "count": lambda: client.count(name),
+    }
+    if hasattr(client._client, "search"):
+        reads["search"] = lambda: client.search(name, query_vector=(retriever_mod.VECTOR_NAME, vector), limit=2)
+    for method, read in reads.items():
+        start = time.perf_counter()
+        read()
+        assert time.perf_counter() - start >= 0.03, method
+
+    start = time.perf_counter()
+    assert client.collection_exists(name)  # not a search: no injected latency
+    assert time.perf_counter() - start < 0.03
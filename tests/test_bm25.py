@@ -0,0 +1,100 @@
+import time
+
+
+def _write(tmp_path, texts):
+    from rag_pipeline.bm25 import BM25Writer, open_bm25
+
+    writer = BM25Writer(tmp_path)
+    writer.upsert(
+        [f"id-{i}" for i in range(len(texts))],
+        [{"text": t, "page": i, "chunk_ref": f"c{i}"} for i, t in enumerate(texts)],
+    )
+    writer.close()
+    return open_bm25(tmp_path)
+
+
+def test_bm25_ranks_exact_terms(tmp_path):
+    index = _write(
+        tmp_path,
+        [
+            "Prompting techniques help large language models reason step by step.",
+            "Chain-of-thought prompting was demonstrated in 2022 by Wei et al.",
+            "Transformers were introduced in 2017 with the attention mechanism.",
+            "Reasoning benchmarks measure multi step arithmetic.",
+        ],
+    )
+    hits = index.search("In which year was chain-of-thought prompting demonstrated?", top_k=2)
+    assert [p["chunk_ref"] for _, p in hits] == ["c1", "c0"]
+    assert index.search("2017", top_k=5)[0][1]["chunk_ref"] == "c2"
+    assert index.search("quantum chromodynamics", top_k=5) == []
+
+
+def test_reciprocal_rank_fusion_prefers_hits_in_both_lists():
+    from rag_pipeline.bm25 import reciprocal_rank_fusion
+
+    dense = [{"page": 1, "chunk_ref": "a", "score": 0.8}, {"page": 2, "chunk_ref": "b", "score": 0.7}]
+    sparse = [{"page": 3, "chunk_ref": "c", "score": None}, {"page": 2, "chunk_ref": "b", "score": None}]
+    fused = reciprocal_rank_fusion([dense, sparse])
+    assert [h["chunk_ref"] for h in fused] == ["b", "a", "c"]
+    assert fused[0]["score"] == 0.7  # dense dict kept
+
+
+def test_hybrid_runs_dense_and_sparse_concurrently(tmp_path, monkeypatch):
+    from rag_pipeline.retriever import HybridRetriever
+
+    index = _write(tmp_path, ["alpha beta", "gamma delta", "epsilon 2022"])
+    slow_search = index.search
+
+    def sparse_search(query, top_k):
+        time.sleep(0.2)
+        return slow_search(query, top_k)
+
+    monkeypatch.setattr(index, "search", sparse_search)
+
+    class SlowDense:
+        top_k = 6
+
+        def retrieve(self, query):
+            time.sleep(0.2)
+            return [{"page": 0, "chunk_ref": "c0", "score": 0.5, "text": "alpha beta"}]
+
+    hybrid = HybridRetriever(SlowDense(), top_k=2, index_dir=str(tmp_path))
+    start = time.perf_counter()
+    hits = hybrid.retrieve("epsilon 2022")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert {h["chunk_ref"] for h in hits} == {"c0", "c2"}
+
+
+def test_hybrid_keeps_dense_not_found_gate(tmp_path):
+    from rag_pipeline.retriever import HybridRetriever
+
+    _write(tmp_path, ["the weather in paris is not in this pdf"])
+
+    class NothingDense:
+        top_k = 4
+
+        def retrieve(self, query):
+            return []
+
+    assert HybridRetriever(NothingDense(), index_dir=str(tmp_path)).retrieve("weather in paris") == []
+
+
+def test_ingest_builds_bm25_index_when_hybrid(monkeypatch, make_pdf, tmp_path):
+    import rag_pipeline.ingest as ingest
+    from benchmarks.fakes import HashingEmbeddings
+    from rag_pipeline.bm25 import open_bm25
+
+    pdf = make_pdf(["Attention is all you need (2017).", "Chain-of-thought prompting, 2022."])
+    monkeypatch.setattr(ingest, "PDF_PATH", pdf)
+    monkeypatch.setattr(ingest, "RETRIEVER_BACKEND", "local")
+    monkeypatch.setattr(ingest, "LOCAL_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(ingest, "HYBRID_SEARCH", True)
+    monkeypatch.setattr(ingest, "BM25_INDEX_DIR", str(tmp_path / "bm25"))
+    monkeypatch.setattr(ingest, "get_embeddings", HashingEmbeddings)
+    ingest.ingest_pdf()
+
+    index = open_bm25(tmp_path / "bm25")
+    assert len(index) == 2
+    assert index.search("2022", top_k=1)[0][1]["page"] == 1
@@ -0,0 +1,86 @@
+def test_lru_eviction_ttl_and_save_load(tmp_path, monkeypatch):
+    from common.cache import TTLCache, normalize_query
+
+    assert normalize_query("  What is  RAG?? ") == normalize_query("what is rag") == "what is rag"
+
+    lru = TTLCache("t", max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and lru.get("c") == 3
+
+    ttl = TTLCache("t", max_entries=10, ttl_seconds=60)
+    ttl.put("old", "x", created=0.0)
+    ttl.put("new", ["y", 1])
+    assert ttl.get("old") is None and ttl.get("new") == ["y", 1]
+
+    assert ttl.save(tmp_path) == 1
+    fresh = TTLCache("t", max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr("common.cache.CACHE_DIR", str(tmp_path))
+    assert fresh.get("new") == ["y", 1]  # loaded from CACHE_DIR on the first lookup
+
+    assert TTLCache("t", max_entries=0).get("new") is None
+
+
+def test_routing_and_query_embeddings_are_cached(monkeypatch):
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from common import cache
+    from langgraph_pipeline.graph import run_agent
+    from observability import metrics
+
+    metrics.set_enabled(True)
+    try:
+        with install_fakes(FakeProfile.zero()):
+            first = run_agent("Explain retrieval-augmented generation (RAG).", deadline_seconds=0)
+            again = run_agent("explain retrieval-augmented generation (rag)", deadline_seconds=0)
+    finally:
+        metrics.set_enabled(False)
+
+    assert first["route"] == again["route"] == "pdf"
+    assert "llm.router" in first["timings"] and "llm.router" not in again["timings"]
+    assert len(cache.ROUTES) == 1 and len(cache.EMBEDDINGS) == 2  # embedding keys keep the exact text
+    assert again["timings"]["cache_hit.route"] == 1
+
+
+def test_answer_cache_skips_retrieval_and_generation(monkeypatch):
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from common import cache
+    from langgraph_pipeline.graph import run_agent
+    from observability import metrics
+
+    monkeypatch.setattr(cache.ANSWERS, "max_entries", 100)
+    metrics.set_enabled(True)
+    try:
+        with install_fakes(FakeProfile.zero()):
+            first = run_agent("What are the key limitations discussed in the document?", deadline_seconds=0)
+            hit = run_agent("what are the key limitations discussed in the document", deadline_seconds=0)
+            missing = run_agent("What does the document say about RLHF?", deadline_seconds=0)
+            run_agent("What does the document say about RLHF?", deadline_seconds=0)
+    finally:
+        metrics.set_enabled(False)
+
+    assert "answer_cache" not in first and first["citations"]
+    assert hit["answer_cache"] == "hit" and hit["answer"] == first["answer"]
+    assert hit["citations"] == first["citations"]
+    assert "llm.rag" not in hit["timings"] and "qdrant.search" not in hit["timings"]
+    # Nothing found: not cached, every ask searches again
+    assert not missing["citations"] and len(cache.ANSWERS) == 1
+
+
+def test_answer_cache_key_separates_tenants_layouts_and_embeddings(monkeypatch):
+    from rag_pipeline.service import _answer_cache_key
+
+    q = "What is RAG?"
+    base = _answer_cache_key(q)
+    for name, value in [
+        ("RAG_TENANT", "acme"),
+        ("QDRANT_SHARD_STRATEGY", "tenant"),
+        ("EMBEDDING_BACKEND", "hashing"),
+        ("EMBEDDING_MODEL", "text-embedding-3-large"),
+        ("EMBEDDING_DIM", "256"),
+    ]:
+        with monkeypatch.context() as m:
+            m.setenv(name, value)
+            assert _answer_cache_key(q) != base, name
+    assert _answer_cache_key("what is rag") == base
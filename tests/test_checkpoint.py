@@ -0,0 +1,71 @@
+import pytest
+
+
+def test_checkpoint_spills_and_discards_stale_state(tmp_path):
+    from rag_pipeline.checkpoint import IngestCheckpoint
+
+    cp = IngestCheckpoint(tmp_path / "cp", "fp-1")
+    cp.spill(0, ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    cp.mark_written(0)
+
+    resumed = IngestCheckpoint(tmp_path / "cp", "fp-1")
+    assert resumed.resumed_from == 1 and resumed.is_written(0)
+    assert resumed.load_vectors(0, ["a", "b"]) == [[1.0, 0.0], [0.0, 1.0]]
+    assert resumed.load_vectors(0, ["a", "c"]) is None  # different chunks in that batch
+    assert resumed.load_vectors(1, ["x"]) is None
+
+    fresh = IngestCheckpoint(tmp_path / "cp", "fp-2")  # settings changed
+    assert fresh.written == 0 and fresh.load_vectors(0, ["a", "b"]) is None
+
+
+def test_progress_eta_ignores_replayed_pages():
+    from rag_pipeline.checkpoint import IngestProgress
+
+    now = [0.0]
+    lines = []
+    progress = IngestProgress(interval_seconds=5, clock=lambda: now[0], out=lines.append)
+    progress.update(50, 100, 10, live=False)  # replayed after a resume
+    now[0] = 1.0
+    progress.update(51, 100, 1)
+    now[0] = 11.0
+    progress.update(61, 100, 10)
+    assert progress.eta_seconds() == pytest.approx(39 * 10 / 10)
+    assert lines and "page 61/100" in lines[-1] and "ETA 0m39s" in lines[-1]
+
+
+def test_ingest_resumes_after_failure_without_reembedding(monkeypatch, make_pdf, tmp_path):
+    import rag_pipeline.ingest as ingest
+    from benchmarks.fakes import HashingEmbeddings
+    from rag_pipeline.local_index import LocalVectorIndex
+
+    pdf = make_pdf(["Transformers use self-attention.", "RAG grounds answers in documents.", "Limitations include cost."])
+    index_dir = str(tmp_path / "index")
+    monkeypatch.setattr(ingest, "PDF_PATH", pdf)
+    monkeypatch.setattr(ingest, "RETRIEVER_BACKEND", "local")
+    monkeypatch.setattr(ingest, "LOCAL_INDEX_DIR", index_dir)
+    monkeypatch.setattr(ingest, "EMBED_BATCH_SIZE", 1)
+
+    embedded = []
+
+    class FlakyEmbeddings(HashingEmbeddings):
+        fail_on = None
+
+        def embed_documents(self, texts):
+            if texts[0] == self.fail_on:
+                raise TimeoutError("embedding API timed out")
+            embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    FlakyEmbeddings.fail_on = "Limitations include cost."
+    monkeypatch.setattr(ingest, "get_embeddings", FlakyEmbeddings)
+    with pytest.raises(TimeoutError):
+        ingest.ingest_pdf()
+    assert len(embedded) == 2
+
+    FlakyEmbeddings.fail_on = None
+    ingest.ingest_pdf()
+    assert embedded[2:] == ["Limitations include cost."]  # first two batches came from the checkpoint
+
+    index = LocalVectorIndex.load(index_dir)
+    assert sorted(p["page"] for p in index.payloads) == [0, 1, 2]
+    assert not (tmp_path / "ingest_checkpoint").exists()
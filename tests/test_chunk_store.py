@@ -0,0 +1,50 @@
+import uuid
+
+
+def _id(ref: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, ref))
+
+
+def test_chunk_store_roundtrip_and_append(tmp_path):
+    from rag_pipeline.chunk_store import ChunkStoreWriter, open_chunk_store
+
+    writer = ChunkStoreWriter(tmp_path)
+    writer.add(_id("a"), "alpha ünïcode")
+    writer.add(_id("b"), "beta")
+    writer.add(_id("a"), "alpha ünïcode")  # same id: stored once
+    assert writer.close() == 2
+
+    writer = ChunkStoreWriter(tmp_path)
+    writer.add(_id("b"), "beta")
+    writer.add(_id("c"), "gamma")
+    assert writer.close() == 3 and writer.added == 1
+
+    store = open_chunk_store(tmp_path)
+    got = store.get_many([_id("c"), _id("a"), _id("missing")])
+    assert got == {_id("c"): "gamma", _id("a"): "alpha ünïcode"}
+
+
+def test_qdrant_keeps_no_text_and_retriever_hydrates(monkeypatch, make_pdf, tmp_path):
+    from qdrant_client import QdrantClient
+
+    import rag_pipeline.ingest as ingest
+    import rag_pipeline.retriever as retriever
+    from benchmarks.fakes import HashingEmbeddings
+
+    client = QdrantClient(":memory:")
+    for module in (ingest, retriever):
+        monkeypatch.setattr(module, "QdrantClient", lambda **_: client)
+        monkeypatch.setattr(module, "get_embeddings", HashingEmbeddings)
+        monkeypatch.setattr(module, "COLLECTION_NAME", "docs")
+        monkeypatch.setattr(module, "CHUNK_STORE", True)
+        monkeypatch.setattr(module, "CHUNK_STORE_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(ingest, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(ingest, "PDF_PATH", make_pdf(["Attention heads weight tokens.", "HNSW graphs index vectors."]))
+
+    ingest.ingest_pdf()
+    stored, _ = client.scroll("docs", with_payload=True)
+    assert stored and all("text" not in p.payload and p.payload["chunk_ref"] for p in stored)
+
+    hits = retriever.QdrantRetriever(top_k=1).retrieve("Attention heads weight tokens.")
+    assert hits[0]["text"] == "Attention heads weight tokens."
+    assert hits[0]["page"] == 0
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+
+def _random_text(rng: random.Random) -> str:
+    words = ["alpha", "beta", "gamma", "δelta", "x", "\n", "\n\n", "\n\n\n", " ", "  ", "nospaces" * 12]
+    return "".join(rng.choice(words) + ("" if rng.random() < 0.3 else " ") for _ in range(rng.randint(0, 300)))
+
+
+def test_compat_mode_matches_recursive_character_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from rag_pipeline.chunker import SpanChunker
+
+    rng = random.Random(0)
+    for _ in range(500):
+        text = _random_text(rng)
+        size = rng.randint(5, 250)
+        overlap = rng.randint(0, size)
+        separators = rng.choice([["\n\n", "\n", " ", ""], ["\n\n", "\n", " "], ["\n\n\n", "\n\n", " ", ""]])
+        expected = RecursiveCharacterTextSplitter(
+            chunk_size=size, chunk_overlap=overlap, separators=separators
+        ).split_text(text)
+        assert SpanChunker(size, overlap, separators).split_text(text) == expected
+
+
+def test_compat_mode_with_custom_length_function():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from rag_pipeline.chunker import SpanChunker
+
+    def words(s: str) -> int:
+        return len(s.split()) + 1
+
+    text = "Retrieval augmented generation.\n\nIt adds context to prompts. " * 30
+    expected = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=5, length_function=words).split_text(text)
+    assert SpanChunker(20, 5, length_function=words).split_text(text) == expected
+
+
+def test_fast_mode_respects_chunk_size_and_covers_text():
+    from rag_pipeline.chunker import SpanChunker
+
+    text = "Sentence number one is here. " * 200
+    chunks = SpanChunker(120, 20, mode="fast").split_text(text)
+    assert chunks and all(len(c) <= 120 for c in chunks)
+    assert " ".join(chunks).count("Sentence") >= text.count("Sentence")
+
+
+def test_rejects_overlap_larger_than_size():
+    from rag_pipeline.chunker import SpanChunker
+
+    with pytest.raises(ValueError):
+        SpanChunker(chunk_size=10, chunk_overlap=20)
@@ -0,0 +1,151 @@
+from types import SimpleNamespace
+
+
+class RecordingClient:
+    """Minimal stand-in for QdrantClient that records admin calls."""
+
+    def __init__(self, info=None):
+        self.info = info
+        self.calls = []
+
+    def collection_exists(self, name):
+        return self.info is not None
+
+    def get_collection(self, name):
+        return self.info
+
+    def create_collection(self, **kwargs):
+        self.calls.append(("create_collection", kwargs))
+
+    def update_collection(self, **kwargs):
+        self.calls.append(("update_collection", kwargs))
+
+    def create_payload_index(self, **kwargs):
+        self.calls.append(("create_payload_index", kwargs))
+
+
+def _info(size=1536, on_disk=False, m=16, ef=100, quantization=None, payload_schema=None):
+    from qdrant_client import models
+
+    return SimpleNamespace(
+        config=SimpleNamespace(
+            params=SimpleNamespace(
+                vectors={"text": models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=on_disk)}
+            ),
+            hnsw_config=SimpleNamespace(m=m, ef_construct=ef),
+            quantization_config=quantization,
+        ),
+        payload_schema=payload_schema or {},
+    )
+
+
+def test_creates_quantized_collection_with_payload_indexes():
+    from rag_pipeline.collection import CollectionSpec, ensure_collection
+
+    client = RecordingClient()
+    spec = CollectionSpec(name="c", on_disk=True, hnsw_m=32, hnsw_ef_construct=200, quantization="scalar")
+    assert ensure_collection(client, spec) == "created"
+
+    (name, kwargs), *indexes = client.calls
+    assert name == "create_collection"
+    assert kwargs["vectors_config"]["text"].on_disk is True
+    assert kwargs["hnsw_config"].m == 32
+    assert kwargs["quantization_config"].scalar.always_ram is True
+    assert {c[1]["field_name"] for c in indexes} == {"source", "page"}
+
+
+def test_migrates_only_changed_settings():
+    from rag_pipeline.collection import CollectionSpec, ensure_collection
+
+    client = RecordingClient(_info(payload_schema={"source": 1, "page": 1}))
+    spec = CollectionSpec(name="c", quantization="binary")
+    assert ensure_collection(client, spec) == "updated"
+    assert [c[0] for c in client.calls] == ["update_collection"]
+    assert client.calls[0][1]["quantization_config"].binary is not None
+
+    client = RecordingClient(_info(payload_schema={"source": 1, "page": 1}))
+    assert ensure_collection(client, CollectionSpec(name="c")) == "unchanged"
+    assert client.calls == []
+
+
+def test_dimension_mismatch_is_an_error():
+    import pytest
+
+    from rag_pipeline.collection import CollectionSpec, ensure_collection
+
+    with pytest.raises(RuntimeError, match="can't be migrated"):
+        ensure_collection(RecordingClient(_info(size=768)), CollectionSpec(name="c"))
+
+
+def test_search_params_enable_oversampling_for_quantized_collections(monkeypatch):
+    from rag_pipeline.collection import search_params_from_env
+
+    monkeypatch.delenv("QDRANT_QUANTIZATION", raising=False)
+    monkeypatch.delenv("QDRANT_SEARCH_EF", raising=False)
+    assert search_params_from_env() is None
+
+    monkeypatch.setenv("QDRANT_QUANTIZATION", "scalar")
+    monkeypatch.setenv("QDRANT_OVERSAMPLING", "3")
+    monkeypatch.setenv("QDRANT_SEARCH_EF", "128")
+    params = search_params_from_env()
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore is True and params.quantization.oversampling == 3.0
+
+
+def test_prefetch_vector_is_created_and_required():
+    import pytest
+
+    from rag_pipeline.collection import CollectionSpec, ensure_collection
+
+    client = RecordingClient()
+    ensure_collection(client, CollectionSpec(name="c", prefetch_dim=256))
+    vectors = client.calls[0][1]["vectors_config"]
+    assert vectors["text_256"].size == 256 and vectors["text"].size == 1536
+
+    with pytest.raises(RuntimeError, match="text_256"):
+        ensure_collection(RecordingClient(_info()), CollectionSpec(name="c", prefetch_dim=256))
+
+
+def test_retriever_prefetches_low_dim_and_rescores_full(monkeypatch):
+    import numpy as np
+    from qdrant_client import QdrantClient, models
+
+    import rag_pipeline.retriever as retriever
+    from rag_pipeline.collection import truncate_vector
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(40, 16))
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "c",
+        vectors_config={
+            "text": models.VectorParams(size=16, distance=models.Distance.COSINE),
+            "text_4": models.VectorParams(size=4, distance=models.Distance.COSINE),
+        },
+    )
+    client.upsert(
+        "c",
+        [
+            models.PointStruct(id=i, vector={"text": v.tolist(), "text_4": truncate_vector(v, 4)}, payload={"page": i})
+            for i, v in enumerate(vectors)
+        ],
+    )
+
+    class Embeddings:
+        def __init__(self, **_):
+            pass
+
+        def embed_query(self, text):
+            return vectors[7].tolist()
+
+    monkeypatch.setattr(retriever, "get_embeddings", Embeddings)
+    monkeypatch.setattr(retriever, "QdrantClient", lambda **_: client)
+    monkeypatch.setattr(retriever, "COLLECTION_NAME", "c")
+    monkeypatch.setattr(retriever, "PREFETCH_DIM", 4)
+
+    hits = retriever.QdrantRetriever(top_k=2).retrieve("q")
+    assert hits[0]["page"] == 7
+    assert abs(hits[0]["score"] - 1.0) < 1e-6  # rescored with the full 16-d vector
+
+    norm = np.linalg.norm(truncate_vector([3.0, 4.0, 12.0], 2))
+    assert truncate_vector([3.0, 4.0, 12.0], 2) == [0.6, 0.8] and abs(norm - 1.0) < 1e-9
@@ -0,0 +1,134 @@
+import time
+
+import pytest
+
+
+def test_call_gives_up_at_the_deadline():
+    import threading
+
+    from common.deadline import Deadline, DeadlineExceeded, call, deadline_scope
+
+    def timed_out_client():
+        time.sleep(0.1)
+        raise TimeoutError("read timed out")  # the SDK's timeout, set from the deadline
+
+    with deadline_scope(Deadline.after(0.05)):
+        with pytest.raises(DeadlineExceeded, match="qdrant.search"):
+            call("qdrant.search", timed_out_client)
+        started = []
+        with pytest.raises(DeadlineExceeded):
+            call("qdrant.search", lambda: started.append(1))  # already expired: not even started
+        assert not started
+
+    with deadline_scope(Deadline.after(0.05)):
+        with pytest.raises(DeadlineExceeded):
+            call("llm.rag", time.sleep, 0.1)  # returned, but too late to use
+
+    with deadline_scope(Deadline.after(1.0)):
+        assert call("qdrant.search", lambda x: x * 2, 21) == 42
+        # Not hedged: runs in the caller's thread, no pool to queue for
+        assert call("llm.rag", threading.current_thread) is threading.current_thread()
+        with pytest.raises(ValueError):
+            call("llm.rag", int, "x")  # failures before the deadline are the client's own
+
+
+def test_nested_scope_keeps_the_earlier_deadline():
+    from common.deadline import Deadline, current_deadline, deadline_scope
+
+    outer = Deadline.after(1.0)
+    with deadline_scope(outer):
+        with deadline_scope(outer.expires_at + 60):  # raw value, as carried in the graph state
+            assert current_deadline() is outer
+        with deadline_scope(None):
+            assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_hedge_fires_after_p95_and_first_result_wins(monkeypatch):
+    import common.deadline as deadline
+    from observability import metrics
+
+    monkeypatch.setattr(deadline, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(deadline, "HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(deadline, "LATENCIES", deadline.LatencyTracker())
+    for _ in range(20):
+        deadline.LATENCIES.observe("qdrant.search", 0.01)
+
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        if len(calls) == 1:
+            time.sleep(1.0)  # the slow primary
+            return "primary"
+        return "hedge"
+
+    metrics.set_enabled(True)
+    metrics.REGISTRY.reset()
+    try:
+        start = time.perf_counter()
+        assert deadline.call("qdrant.search", search, "q") == "hedge"
+        assert time.perf_counter() - start < 0.5
+        assert metrics.REGISTRY.counter_value(metrics.HEDGED_CALLS, stage="qdrant.search", result="won") == 1
+    finally:
+        metrics.set_enabled(False)
+    assert calls == ["q", "q"]
+
+    # LLM generation isn't in HEDGE_STAGES: never duplicated
+    assert deadline.hedge_delay("llm.rag") is None
+
+
+def test_hedged_call_survives_one_failed_attempt(monkeypatch):
+    import common.deadline as deadline
+
+    monkeypatch.setattr(deadline, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(deadline, "HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(deadline, "LATENCIES", deadline.LatencyTracker())
+    deadline.LATENCIES.observe("owm.fetch", 0.01)
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.1)
+            raise ConnectionError("reset")
+        time.sleep(0.2)
+        return "ok"
+
+    assert deadline.call("owm.fetch", flaky) == "ok"
+
+    def broken():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        deadline.call("owm.fetch", broken)
+
+
+def test_pdf_route_returns_citations_when_no_time_is_left_to_generate(monkeypatch):
+    import rag_pipeline.service as svc
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from langgraph_pipeline.graph import run_agent
+
+    monkeypatch.setattr(svc, "DEADLINE_GENERATION_MIN_SECONDS", 5.0)
+    with install_fakes(FakeProfile.zero()):
+        out = run_agent("Explain retrieval-augmented generation (RAG).", deadline_seconds=2.0)
+        full = run_agent("Explain retrieval-augmented generation (RAG).", deadline_seconds=0)
+
+    assert out["route"] == "pdf" and out["degraded"] == "deadline"
+    assert out["citations"] == full["citations"] and out["citations"]
+    assert "Retrieval-augmented generation" in out["answer"]
+    assert "degraded" not in full
+
+
+def test_weather_route_degrades_when_owm_is_too_slow():
+    from benchmarks.fakes import FakeProfile, LatencyModel, install_fakes
+    from langgraph_pipeline.graph import run_agent
+
+    profile = FakeProfile.zero()
+    profile.owm = LatencyModel(median_ms=300)
+    with install_fakes(profile):
+        out = run_agent("What's the weather in Mumbai?", deadline_seconds=0.2)
+
+    assert out["route"] == "weather" and out["degraded"] == "deadline"
+    assert "didn't answer in time" in out["answer"]
@@ -0,0 +1,41 @@
+from langchain_core.documents import Document
+
+
+def _chunk(text: str, page: int, ref: str) -> Document:
+    return Document(page_content=text, metadata={"page": page, "chunk_ref": ref, "point_id": f"id-{ref}"})
+
+
+def test_near_duplicates_are_collapsed_with_aliases():
+    from rag_pipeline.dedupe import NearDuplicateFilter
+
+    disclaimer = (
+        "This document is provided for informational purposes only and does not constitute advice. "
+        "All trademarks are the property of their respective owners. Reproduction without permission "
+        "is prohibited. Contact the publisher for licensing questions and further information. "
+    ) * 3  # ~800 chars, a typical chunk
+    chunks = [
+        _chunk(disclaimer, 1, "a"),
+        _chunk("Transformers use self-attention to mix information across tokens in a sequence.", 1, "b"),
+        _chunk(disclaimer.replace("Contact", "Please contact", 1), 2, "c"),
+        _chunk(disclaimer, 3, "d"),
+    ]
+
+    f = NearDuplicateFilter(max_distance=3)
+    kept = list(f.filter(chunks))
+
+    assert [c.metadata["chunk_ref"] for c in kept] == ["a", "b"]
+    assert f.dropped == 2
+    assert f.aliases["id-a"] == [{"page": 2, "chunk_ref": "c"}, {"page": 3, "chunk_ref": "d"}]
+
+
+def test_distinct_chunks_are_kept():
+    from rag_pipeline.dedupe import NearDuplicateFilter
+
+    texts = [
+        "Retrieval augmented generation retrieves documents and adds them to the prompt.",
+        "Chain-of-thought prompting was demonstrated in 2022 and improves reasoning.",
+        "Reinforcement learning from human feedback aligns outputs with preferences.",
+    ]
+    f = NearDuplicateFilter()
+    kept = list(f.filter(_chunk(t, i, str(i)) for i, t in enumerate(texts)))
+    assert len(kept) == 3 and f.dropped == 0
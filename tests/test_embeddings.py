@@ -0,0 +1,77 @@
+import pytest
+
+
+def test_hashing_backend_is_deterministic_and_records_info():
+    from rag_pipeline.embeddings import HashingBackend
+
+    backend = HashingBackend(dim=64)
+    a, b = backend.embed_documents(["weather in Mumbai", "weather in Mumbai"])
+    assert a == b and len(a) == 64
+    assert backend.embed_query("weather in Mumbai") == a
+    assert backend.info == {"backend": "hashing", "model": "hashing-v1", "dim": 64}
+
+
+def test_openai_backend_splits_requests_and_keeps_order(monkeypatch):
+    from rag_pipeline import embeddings
+
+    class Client:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.requests = []
+
+        def embed_documents(self, texts):
+            self.requests.append(list(texts))
+            return [[float(t)] for t in texts]
+
+    monkeypatch.setattr(embeddings, "OpenAIEmbeddings", Client)
+    monkeypatch.setattr(embeddings, "EMBED_REQUEST_SIZE", 3)
+    monkeypatch.setattr(embeddings, "EMBED_CONCURRENCY", 4)
+
+    backend = embeddings.OpenAIBackend("text-embedding-3-small", dim=256)
+    assert backend.client.kwargs == {"model": "text-embedding-3-small", "dimensions": 256}
+    assert backend.embed_documents([str(i) for i in range(8)]) == [[float(i)] for i in range(8)]
+    assert sorted(len(r) for r in backend.client.requests) == [2, 3, 3]
+
+
+def test_get_embeddings_reads_env(monkeypatch):
+    from rag_pipeline.embeddings import get_embeddings
+
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setenv("EMBEDDING_DIM", "32")
+    assert get_embeddings().info["dim"] == 32
+    assert get_embeddings() is get_embeddings()
+
+    monkeypatch.setenv("EMBEDDING_BACKEND", "onnx")
+    with pytest.raises(ValueError):
+        get_embeddings()
+
+
+def test_collection_records_embedding_and_rejects_another_one():
+    from qdrant_client import QdrantClient
+
+    from rag_pipeline.collection import CollectionSpec, collection_embedding, ensure_collection
+    from rag_pipeline.embeddings import EmbeddingMismatchError, HashingBackend
+
+    client = QdrantClient(location=":memory:")
+    info = HashingBackend(dim=32).info
+    assert ensure_collection(client, CollectionSpec(name="c", size=32, embedding=info)) == "created"
+    assert collection_embedding(client.get_collection("c")) == info
+
+    ensure_collection(client, CollectionSpec(name="c", size=32, embedding=info))  # same embedding: fine
+    other = {**info, "model": "all-MiniLM-L6-v2"}
+    with pytest.raises(EmbeddingMismatchError, match="model"):
+        ensure_collection(client, CollectionSpec(name="c", size=32, embedding=other))
+
+
+def test_local_retriever_rejects_index_built_with_another_embedding(tmp_path, monkeypatch):
+    from rag_pipeline import retriever
+    from rag_pipeline.embeddings import EmbeddingMismatchError, HashingBackend
+    from rag_pipeline.local_index import LocalIndexWriter
+
+    writer = LocalIndexWriter(tmp_path, embedding=HashingBackend(dim=8).info)
+    writer.upsert(["a"], [[1.0] * 8], [{"text": "x", "page": 0}])
+    writer.close()
+
+    monkeypatch.setattr(retriever, "get_embeddings", lambda: HashingBackend(dim=16))
+    with pytest.raises(EmbeddingMismatchError, match="dim"):
+        retriever.LocalRetriever(top_k=1, index_dir=str(tmp_path))
@@ -0,0 +1,58 @@
+def test_factoid_detection_and_sentence_split():
+    from rag_pipeline.extractive import is_factoid, split_sentences
+
+    assert is_factoid("When was chain-of-thought prompting demonstrated?")
+    assert is_factoid("How many layers does the model have?")
+    assert not is_factoid("Explain retrieval-augmented generation (RAG).")
+    assert not is_factoid("What is the difference between RLHF and supervised fine-tuning?")
+    assert not is_factoid("How does attention work?")
+
+    text = "GPT-4o accepts text, audio and images. It was released in 2024.\n\n- Tool use via function calling"
+    assert split_sentences(text) == [
+        "GPT-4o accepts text, audio and images.",
+        "It was released in 2024.",
+        "- Tool use via function calling",
+    ]
+
+
+def test_factoid_question_is_answered_without_generation(monkeypatch):
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from langgraph_pipeline.graph import run_agent
+    from observability import metrics
+    from rag_pipeline import extractive
+
+    monkeypatch.setattr(extractive, "EXTRACTIVE_ANSWERS", True)
+    metrics.set_enabled(True)
+    try:
+        with install_fakes(FakeProfile.zero()):
+            fast = run_agent("When was chain-of-thought prompting demonstrated?")
+            open_ended = run_agent("Explain retrieval-augmented generation (RAG).")
+            monkeypatch.setattr(extractive, "EXTRACTIVE_MIN_CONFIDENCE", 0.99)
+            unsure = run_agent("When was chain-of-thought prompting demonstrated?")
+    finally:
+        metrics.set_enabled(False)
+
+    assert fast["answer_mode"] == "extractive" and "llm.rag" not in fast["timings"]
+    assert fast["answer"].startswith("Chain-of-thought prompting was demonstrated in 2022")
+    assert len(fast["citations"]) == 1 and fast["citations"][0]["page"] == 4
+    assert f"chunk_ref={fast['citations'][0]['chunk_ref']}" in fast["answer"]
+
+    for out in (open_ended, unsure):
+        assert "answer_mode" not in out and "llm.rag" in out["timings"]
+
+
+def test_weak_top_hit_falls_back_to_generation(monkeypatch):
+    from rag_pipeline import extractive
+    from rag_pipeline.embeddings import HashingBackend
+
+    backend = HashingBackend(dim=256)
+    query = "Which inputs does GPT-4o accept?"
+    hits = [{"text": "GPT-4o is a multimodal model that accepts text, audio and image inputs.", "page": 9,
+             "chunk_ref": "r9", "score": 0.34}]
+    vector = backend.embed_query(query)
+    assert extractive.extractive_answer(query, vector, hits, backend, min_score=0.25) is None
+
+    hits[0]["score"] = 0.9
+    monkeypatch.setattr(extractive, "EXTRACTIVE_MIN_CONFIDENCE", 0.3)
+    out = extractive.extractive_answer(query, vector, hits, backend, min_score=0.25)
+    assert out["citations"] == [{"page": 9, "chunk_ref": "r9"}]
@@ -19,3 +19,14 @@ def test_graph_routes_to_pdf(monkeypatch):
     assert out["route"] == "pdf"
     assert out["answer"] == "OK"
 
+
+
+def test_stream_agent_yields_node_updates_then_done(monkeypatch):
+    import langgraph_pipeline.graph as g
+
+    monkeypatch.setattr(g, "answer_from_weather", lambda q: {"route": "weather", "answer": "OK"})
+
+    events = list(g.stream_agent("what's the weather in mumbai?"))
+    assert [name for name, _ in events] == ["route", "weather", "done"]
+    assert events[0][1]["route"] == "weather"
+    assert events[-1][1]["answer"] == "OK"
@@ -0,0 +1,28 @@
+def test_iter_chunks_matches_eager_loader(make_pdf):
+    from rag_pipeline.loader import iter_chunks_from_pdf, load_and_chunk_pdf
+
+    pages = [
+        "Introduction\nLarge language models predict the next token.\n" + "Attention is all you need. " * 20,
+        "Retrieval-augmented generation adds documents to the prompt.",
+        "Chain-of-thought prompting was demonstrated in 2022.",
+    ]
+    path = make_pdf(pages)
+
+    eager = load_and_chunk_pdf(path, chunk_size=120, chunk_overlap=20)
+    lazy = list(iter_chunks_from_pdf(path, chunk_size=120, chunk_overlap=20, workers=1))
+
+    assert [c.page_content for c in lazy] == [c.page_content for c in eager]
+    for a, b in zip(lazy, eager):
+        for key in ("source", "page", "page_label", "total_pages", "chunk_ref", "point_id"):
+            assert a.metadata[key] == b.metadata[key]
+
+
+def test_iter_pdf_pages_parallel_keeps_page_order(make_pdf, monkeypatch):
+    import rag_pipeline.loader as loader
+
+    monkeypatch.setattr(loader, "PDF_PARALLEL_MIN_PAGES", 1)
+    path = make_pdf([f"page number {i}" for i in range(6)])
+
+    pages = list(loader.iter_pdf_pages(path, workers=2, window=2))
+    assert [p.metadata["page"] for p in pages] == list(range(6))
+    assert [p.page_content for p in pages] == [f"page number {i}" for i in range(6)]
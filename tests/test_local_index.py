@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def test_search_matches_brute_force_cosine(tmp_path):
+    from rag_pipeline.local_index import LocalIndexWriter, open_index
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    writer = LocalIndexWriter(tmp_path)
+    writer.upsert([f"id-{i}" for i in range(50)], vectors, [{"text": f"t{i}", "page": i} for i in range(50)])
+    assert writer.close() == 50
+
+    index = open_index(tmp_path)
+    assert isinstance(index.vectors, np.memmap)
+
+    query = rng.normal(size=16)
+    hits = index.search(query, top_k=5)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+    assert [p["page"] for _, p in hits] == expected.tolist()
+    assert all(a >= b for (a, _), (b, _) in zip(hits, hits[1:]))
+    assert len(index.search(query, top_k=500)) == 50
+
+
+def test_upsert_replaces_by_id_and_set_payload(tmp_path):
+    from rag_pipeline.local_index import LocalIndexWriter, LocalVectorIndex
+
+    writer = LocalIndexWriter(tmp_path)
+    writer.upsert(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], [{"text": "old"}, {"text": "b"}])
+    writer.upsert(["a"], [[0.0, 2.0]], [{"text": "new"}])
+    writer.set_payload("b", {"aliases": [{"page": 3, "chunk_ref": "x"}]})
+    writer.close()
+
+    index = LocalVectorIndex.load(tmp_path)
+    assert index.ids == ["a", "b"]
+    assert index.payloads[0] == {"text": "new"}
+    assert index.payloads[1]["aliases"] == [{"page": 3, "chunk_ref": "x"}]
+
+
+def test_ingest_and_retrieve_with_local_backend(monkeypatch, make_pdf, tmp_path):
+    import rag_pipeline.ingest as ingest
+    import rag_pipeline.retriever as retriever
+    from benchmarks.fakes import HashingEmbeddings
+
+    pdf = make_pdf(
+        [
+            "Transformers use self-attention over token sequences.",
+            "Retrieval augmented generation grounds answers in documents.",
+        ]
+    )
+    index_dir = str(tmp_path / "index")
+    monkeypatch.setattr(ingest, "PDF_PATH", pdf)
+    monkeypatch.setattr(ingest, "RETRIEVER_BACKEND", "local")
+    monkeypatch.setattr(ingest, "LOCAL_INDEX_DIR", index_dir)
+    monkeypatch.setattr(ingest, "get_embeddings", HashingEmbeddings)
+    monkeypatch.setattr(retriever, "get_embeddings", HashingEmbeddings)
+
+    def no_qdrant(*args, **kwargs):
+        raise AssertionError("local backend must not talk to Qdrant")
+
+    monkeypatch.setattr(ingest, "QdrantClient", no_qdrant)
+    ingest.ingest_pdf()
+
+    r = retriever.LocalRetriever(top_k=1, index_dir=index_dir)
+    hits = r.retrieve("Retrieval augmented generation grounds answers in documents.")
+    assert hits and hits[0]["page"] == 1  # 0-based, as PyPDFLoader
+    assert set(hits[0]) == {"score", "text", "page", "chunk_ref", "source", "aliases"}
+    assert hits[0]["score"] > 0.99
@@ -0,0 +1,81 @@
+def test_timed_is_noop_when_disabled(monkeypatch):
+    import observability.metrics as m
+
+    monkeypatch.setattr(m, "_enabled", False)
+    m.REGISTRY.reset()
+
+    with m.track_request() as timings:
+        with m.timed("node.route"):
+            pass
+
+    assert timings == {}
+    assert m.REGISTRY.histogram(m.STAGE_SECONDS, stage="node.route") is None
+
+
+def test_track_request_collects_stage_timings_and_tokens(monkeypatch):
+    import observability.metrics as m
+
+    monkeypatch.setattr(m, "_enabled", True)
+    m.REGISTRY.reset()
+
+    class DummyMsg:
+        usage_metadata = {"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}
+
+    with m.track_request() as timings:
+        with m.timed("owm.fetch"):
+            pass
+        with m.timed("owm.fetch"):
+            pass
+        m.record_tokens("rag_answer_generation", DummyMsg())
+        m.record_cache("embedding", hit=True)
+
+    assert set(timings) >= {"owm.fetch", "total", "tokens.input", "tokens.output", "cache_hit.embedding"}
+    assert timings["tokens.input"] == 12
+    assert m.REGISTRY.histogram(m.STAGE_SECONDS, stage="owm.fetch").count == 2
+    assert m.REGISTRY.counter_value(m.CACHE_REQUESTS, cache="embedding", result="hit") == 1
+
+
+def test_render_prometheus_text_format(monkeypatch):
+    import observability.metrics as m
+
+    monkeypatch.setattr(m, "_enabled", True)
+    m.REGISTRY.reset()
+    with m.timed("qdrant.search"):
+        pass
+    m.record_cache("route", hit=False)
+
+    text = m.render_prometheus()
+    assert "# TYPE agent_stage_seconds histogram" in text
+    assert 'agent_stage_seconds_bucket{stage="qdrant.search",le="+Inf"} 1' in text
+    assert 'agent_stage_seconds_count{stage="qdrant.search"} 1' in text
+    assert 'agent_cache_requests_total{cache="route",result="miss"} 1' in text
+
+
+def test_run_agent_returns_timings(monkeypatch):
+    import langgraph_pipeline.graph as g
+    import observability.metrics as m
+
+    monkeypatch.setattr(m, "_enabled", True)
+    monkeypatch.setattr(g, "answer_from_weather", lambda q: {"route": "weather", "answer": "OK"})
+
+    out = g.run_agent("what's the weather in mumbai?")
+    assert out["answer"] == "OK"
+    assert {"node.route", "node.weather", "total"} <= set(out["timings"])
+
+
+def test_router_and_location_llm_tokens_are_counted(monkeypatch):
+    import observability.metrics as m
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from langgraph_pipeline.router import _llm_route
+    from openweather_pipeline.service import _llm_extract_location
+
+    monkeypatch.setattr(m, "_enabled", True)
+    m.REGISTRY.reset()
+    with install_fakes(FakeProfile.zero()):
+        with m.track_request() as timings:
+            assert _llm_route("Tell me something interesting")[0] == "pdf"
+        assert _llm_extract_location("How is it outside?") is None
+
+    assert timings["tokens.input"] > 0 and timings["tokens.output"] > 0
+    for component in ("route_classification", "location_extraction"):
+        assert m.REGISTRY.counter_value(m.LLM_TOKENS, component=component, kind="input") > 0
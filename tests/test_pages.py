@@ -0,0 +1,46 @@
+def test_page_centroids_stream_one_vector_per_page():
+    from rag_pipeline.pages import PageCentroids, page_point_id
+
+    acc = PageCentroids()
+    payloads = [{"source": "a.pdf", "page": 0}, {"source": "a.pdf", "page": 0}, {"source": "a.pdf", "page": 1}]
+    vectors = [[1.0, 0.0], [0.0, 1.0], [3.0, 4.0]]
+
+    done = list(acc.add(payloads, vectors)) + list(acc.flush())
+
+    assert [p["payload"]["page"] for p in done] == [0, 1]
+    assert done[0]["payload"]["n_chunks"] == 2
+    assert abs(done[0]["vector"][0] - 2**-0.5) < 1e-9
+    assert done[1]["vector"] == [0.6, 0.8]
+    assert done[1]["id"] == page_point_id("a.pdf", 1)
+
+
+def test_hierarchical_ingest_and_retrieval(monkeypatch, make_pdf):
+    from qdrant_client import QdrantClient
+
+    import rag_pipeline.ingest as ingest
+    import rag_pipeline.retriever as retriever
+    from benchmarks.fakes import HashingEmbeddings
+
+    pdf = make_pdf(
+        [
+            "Transformers rely on attention. Attention weights tokens.\nAttention heads run in parallel.",
+            "Qdrant stores vectors. Vectors are searched with HNSW.\nAttention is not covered here.",
+        ]
+    )
+    client = QdrantClient(":memory:")
+    monkeypatch.setenv("QDRANT_VECTOR_SIZE", "1536")
+    for module in (ingest, retriever):
+        monkeypatch.setattr(module, "QdrantClient", lambda **_: client)
+        monkeypatch.setattr(module, "get_embeddings", HashingEmbeddings)
+        monkeypatch.setattr(module, "PAGE_FANOUT", 1)
+    monkeypatch.setattr(ingest, "PDF_PATH", pdf)
+    monkeypatch.setattr(ingest, "COLLECTION_NAME", "docs")
+    monkeypatch.setattr(ingest, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(retriever, "COLLECTION_NAME", "docs")
+
+    ingest.ingest_pdf()
+    assert client.count("docs_pages").count == 2
+
+    hits = retriever.QdrantRetriever(top_k=4).retrieve("How do attention heads weight tokens?")
+    assert hits and {h["page"] for h in hits} == {0}
+    assert all(h["chunk_ref"] for h in hits)
@@ -0,0 +1,54 @@
+import json
+
+
+def test_collect_questions_merges_logs_quick_and_document_questions(tmp_path):
+    from langgraph_pipeline.prewarm import collect_questions, document_questions
+
+    log = tmp_path / "queries.jsonl"
+    rows = ["What is RLHF?"] * 3 + ["what is rlhf"] + ["Explain attention."] * 2 + ["Weather in Pune?", "rare one"]
+    log.write_text("\n".join(json.dumps({"query": q}) for q in rows) + "\n", encoding="utf-8")
+
+    texts = [
+        "Retrieval-augmented generation (RAG) adds documents to the prompt. A transformer is a neural network.",
+        "It is a test. Reinforcement learning from human feedback (RLHF) aligns models.",
+    ]
+    assert document_questions(texts, 10) == ["What is RAG?", "What is RLHF?", "What is a transformer?"]
+
+    questions = collect_questions([str(log)], top=3, doc_texts=texts, doc_limit=10)
+    assert questions[:2] == ["What is RLHF?", "Explain attention."]
+    assert "Weather in Pune?" not in questions and "rare one" not in questions  # rule-routed / not in the top 3
+    assert "What does the document say about system prompts?" in questions  # a quick question, label stripped
+    assert questions[-2:] == ["What is RAG?", "What is a transformer?"]
+    assert not any("Mumbai" in q for q in questions)
+
+
+def test_prewarm_fills_caches_that_a_fresh_process_loads(tmp_path, monkeypatch):
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from common import cache
+    from langgraph_pipeline import prewarm
+    from langgraph_pipeline.graph import run_agent
+    from observability import metrics
+
+    for c in cache.CACHES:
+        monkeypatch.setattr(c, "max_entries", c.max_entries)  # prewarm raises them
+    log = tmp_path / "queries.txt"
+    log.write_text("What are the key limitations discussed in the document?\n" * 2 + "Is it raining in Pune?\n", encoding="utf-8")
+    out = tmp_path / "warm"
+
+    with install_fakes(FakeProfile.zero()):
+        report = prewarm.main(["--log", str(log), "--doc-questions", "0", "--answers", "--out", str(out)])
+    assert report["errors"] == [] and report["routes"] == {"pdf": report["questions"]}
+    assert report["saved"]["route"] > 0 and report["saved"]["answer"] > 0
+    assert (out / "answer.jsonl").exists() and (out / "embedding.jsonl").exists()
+
+    # A new process: empty caches that load CACHE_DIR on first use
+    cache.clear_all()
+    monkeypatch.setattr(cache, "CACHE_DIR", str(out))
+    metrics.set_enabled(True)
+    try:
+        with install_fakes(FakeProfile.zero()):
+            warm = run_agent("what are the key limitations discussed in the document?", deadline_seconds=0)
+    finally:
+        metrics.set_enabled(False)
+    assert warm["answer_cache"] == "hit"
+    assert "llm.router" not in warm["timings"] and "llm.rag" not in warm["timings"]
@@ -0,0 +1,138 @@
+import threading
+import time
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampler_writes_collapsed_stacks(tmp_path):
+    from observability.profiler import StackSampler, write_collapsed
+
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy worker")
+    worker.start()
+    sampler = StackSampler(interval=0.002).start()
+    time.sleep(0.2)
+    counts = sampler.stop()
+    stop.set()
+    worker.join()
+
+    lines = write_collapsed(counts, tmp_path / "p.collapsed").read_text(encoding="utf-8").splitlines()
+    stack, n = lines[0].rsplit(" ", 1)
+    assert int(n) > 0 and sampler.samples > 0
+    busy = [line for line in lines if line.startswith("busy_worker;")]
+    assert busy and "_busy_loop (tests/test_profiler.py:" in busy[0]
+    assert not any(line.startswith("stack-sampler;") for line in lines)
+
+
+def test_profile_endpoint_and_single_window(tmp_path, monkeypatch):
+    import urllib.request
+
+    from observability import metrics, profiler
+
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    server = metrics.start_metrics_server(0, host="127.0.0.1", debug=True)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        background = profiler.profile_in_background(0.3)
+        time.sleep(0.05)
+        try:
+            urllib.request.urlopen(f"{base}/debug/profile?seconds=0.1")
+            raise AssertionError("a second window should be refused")
+        except urllib.error.HTTPError as e:
+            assert e.code == 409
+        background.join()
+
+        with urllib.request.urlopen(f"{base}/debug/profile?seconds=0.1") as resp:
+            assert resp.status == 200 and resp.headers["Content-Type"].startswith("text/plain")
+        assert len(list(tmp_path.glob("profile-*.collapsed"))) == 2
+
+        for bad in ("/debug/profile?seconds=nan", "/debug/profile?seconds=inf", "/debug/slow?limit=abc"):
+            try:
+                urllib.request.urlopen(base + bad)
+                raise AssertionError(f"{bad} should be rejected")
+            except urllib.error.HTTPError as e:
+                assert e.code == 400
+        # The rejected windows never started a sampler
+        assert not any(t.name == "stack-sampler" for t in threading.enumerate())
+    finally:
+        server.shutdown()
+
+
+def test_debug_endpoints_are_off_by_default():
+    import urllib.request
+
+    from observability import metrics
+
+    server = metrics.start_metrics_server(0, host="127.0.0.1")
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics") as resp:
+            assert resp.status == 200
+        for path in ("/debug/profile?seconds=0", "/debug/slow"):
+            try:
+                urllib.request.urlopen(base + path)
+                raise AssertionError(f"{path} should not be served")
+            except urllib.error.HTTPError as e:
+                assert e.code == 404
+    finally:
+        server.shutdown()
+
+
+def test_slow_requests_are_captured_in_a_ring(tmp_path, monkeypatch):
+    import json
+    import urllib.request
+
+    import langgraph_pipeline.graph as g
+    from observability import metrics, profiler
+
+    monkeypatch.setattr(profiler, "SLOW_REQUEST_SECONDS", 0.05)
+    monkeypatch.setattr(profiler, "SLOW_REQUEST_DIR", str(tmp_path))
+    monkeypatch.setattr(profiler, "SLOW_REQUEST_KEEP", 3)
+    monkeypatch.setattr(metrics, "_enabled", True)
+
+    def slow_pdf(q, **kwargs):
+        with metrics.timed("llm.rag"):
+            time.sleep(0.06 if "slow" in q else 0)
+        return {"route": "pdf", "answer": "OK", "citations": []}
+
+    monkeypatch.setattr(g, "answer_from_pdf", slow_pdf)
+    monkeypatch.setattr(g, "hybrid_route", lambda q, previous=None: ("pdf", "test"))
+
+    g.get_app()  # compiling the graph isn't part of the requests below
+    g.run_agent("fast question", deadline_seconds=0)
+    assert not list(tmp_path.glob("slow-*.json"))
+    for i in range(5):
+        g.run_agent(f"slow question {i}", deadline_seconds=0)
+
+    files = sorted(p.name for p in tmp_path.glob("slow-*.json"))
+    assert files == ["slow-000.json", "slow-001.json", "slow-002.json"]
+    entries = profiler.slow_log().entries()
+    assert [e["query"] for e in entries] == ["slow question 4", "slow question 3", "slow question 2"]
+    assert entries[0]["timings"]["llm.rag"] >= 0.05 and entries[0]["seconds"] >= 0.05
+    assert entries[0]["state"]["route_reason"] == "test" and entries[0]["output"]["answer"] == "OK"
+
+    server = metrics.start_metrics_server(0, host="127.0.0.1", debug=True)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/debug/slow?limit=1") as resp:
+            assert [e["query"] for e in json.loads(resp.read())] == ["slow question 4"]
+    finally:
+        server.shutdown()
+
+
+def test_stream_agent_times_the_graph_not_the_consumer(tmp_path, monkeypatch):
+    import langgraph_pipeline.graph as g
+    from observability import profiler
+
+    monkeypatch.setattr(profiler, "SLOW_REQUEST_SECONDS", 0.05)
+    monkeypatch.setattr(profiler, "SLOW_REQUEST_DIR", str(tmp_path))
+    monkeypatch.setattr(g, "answer_from_pdf", lambda q, **kwargs: {"route": "pdf", "answer": "OK", "citations": []})
+    monkeypatch.setattr(g, "hybrid_route", lambda q, previous=None: ("pdf", "test"))
+
+    g.get_app()
+    for node, _ in g.stream_agent("a question", deadline_seconds=0):
+        time.sleep(0.06)  # a slow reader, e.g. the UI rendering each step
+    assert node == "done"
+    assert not list(tmp_path.glob("slow-*.json"))
@@ -56,3 +56,27 @@ def test_answer_from_pdf_builds_citations_and_calls_llm(monkeypatch):
     assert {"page": 1, "chunk_ref": "refA"} in out["citations"]
     assert {"page": 2, "chunk_ref": "refB"} in out["citations"]
 
+
+def test_answer_from_pdf_cites_deduplicated_aliases(monkeypatch):
+    import rag_pipeline.service as svc
+
+    retrieved = [
+        {"text": "Boilerplate", "page": 1, "chunk_ref": "refA", "aliases": [{"page": 9, "chunk_ref": "refZ"}]},
+    ]
+
+    class DummyRetriever:
+        def __init__(self, top_k: int = 4):
+            self.top_k = top_k
+
+        def retrieve(self, query: str):
+            return retrieved
+
+    class DummyLLM:
+        def invoke(self, messages, config=None):
+            return type("Msg", (), {"content": "ANSWER"})()
+
+    monkeypatch.setattr(svc, "QdrantRetriever", DummyRetriever)
+    monkeypatch.setattr(svc, "ChatOpenAI", lambda **kwargs: DummyLLM())
+
+    out = svc.answer_from_pdf("test question")
+    assert out["citations"] == [{"page": 1, "chunk_ref": "refA"}, {"page": 9, "chunk_ref": "refZ"}]
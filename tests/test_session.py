@@ -0,0 +1,102 @@
+def test_follow_up_detection_and_contextualize():
+    from langgraph_pipeline.session import Session
+
+    s = Session("s")
+    assert not s.is_follow_up("and what are its limitations?")  # nothing to follow yet
+
+    s.record_turn("Explain retrieval-augmented generation (RAG).", {"route": "pdf", "answer": "RAG is ..."})
+    assert s.is_follow_up("and what are its limitations?")
+    assert s.is_follow_up("Why does it help?")
+    assert not s.is_follow_up("What is the main topic of this document?")
+    assert not s.is_follow_up("What does the document say about RLHF and how it compares to supervised fine-tuning?")
+    assert s.contextualize("what are its limitations?") == (
+        "Explain retrieval-augmented generation (RAG). what are its limitations?"
+    )
+
+    s.record_turn("what are its limitations?", {"route": "pdf", "answer": "..."})
+    assert s.topic == "Explain retrieval-augmented generation (RAG)."  # follow-ups keep the topic
+
+
+def test_history_is_trimmed_to_token_budget(monkeypatch):
+    import langgraph_pipeline.session as session_mod
+
+    monkeypatch.setattr(session_mod, "SESSION_HISTORY_TOKENS", 60)
+    s = session_mod.Session("s")
+    for i in range(20):
+        s.record_turn(f"question number {i} about transformers", {"route": "pdf", "answer": "word " * 10})
+
+    history = s.history()
+    assert sum(t.tokens for t in history) <= 60
+    assert history[-1].role == "assistant" and history[-2].content == "question number 19 about transformers"
+    assert len(s.turns) < 40  # old turns are dropped, not kept forever
+
+
+def test_session_store_evicts_lru_and_expired(monkeypatch):
+    from langgraph_pipeline.session import SessionStore
+
+    store = SessionStore(max_sessions=2, ttl_seconds=60)
+    a = store.get("a")
+    a.last_route = "pdf"
+    store.get("b")
+    assert store.get("a") is a
+    store.get("c")  # evicts "b", the least recently used
+    assert len(store) == 2 and store.get("a") is a
+
+    a.updated -= 120
+    assert store.get("a") is not a  # idle past the TTL: fresh session
+
+
+def test_follow_up_reuses_route_and_retrieved_chunks():
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from langgraph_pipeline.graph import run_agent
+    from langgraph_pipeline.session import SESSIONS
+    from observability import metrics
+
+    metrics.set_enabled(True)
+    try:
+        with install_fakes(FakeProfile.zero()):
+            first = run_agent("Explain retrieval-augmented generation (RAG).", session_id="t1")
+            follow = run_agent("and what are its limitations?", session_id="t1")
+            fresh = run_agent("What does the document say about RLHF?", session_id="t1")
+    finally:
+        metrics.set_enabled(False)
+
+    assert first["route"] == "pdf" and first["context_reuse"] == "search"
+    assert follow["route"] == "pdf" and follow["route_reason"] == "session_follow_up"
+    assert follow["context_reuse"] == "reuse"
+    assert follow["citations"] == first["citations"]
+    assert "qdrant.search" not in follow["timings"]  # answered from the session's chunks
+    assert fresh["context_reuse"] == "search" and fresh["route_reason"] != "session_follow_up"
+    assert len(SESSIONS.get("t1").turns) == 6
+    SESSIONS.drop("t1")
+
+
+def test_pdf_prompt_includes_session_history(monkeypatch):
+    import rag_pipeline.service as svc
+    from langgraph_pipeline.session import Session
+
+    class DummyRetriever:
+        def __init__(self, top_k: int = 4):
+            self.top_k = top_k
+
+        def retrieve(self, query: str):
+            return [{"text": "Chunk A", "page": 1, "chunk_ref": "refA"}]
+
+    seen = []
+
+    class DummyLLM:
+        def invoke(self, messages, config=None):
+            seen.append(messages)
+            return type("Msg", (), {"content": "ok"})()
+
+    monkeypatch.setattr(svc, "QdrantRetriever", DummyRetriever)
+    monkeypatch.setattr(svc, "ChatOpenAI", lambda **kwargs: DummyLLM())
+
+    session = Session("s")
+    session.record_turn("What is RAG?", {"route": "pdf", "answer": "Retrieval-augmented generation."})
+    out = svc.answer_from_pdf("why is it useful?", session=session)
+
+    assert out["context_reuse"] == "search"
+    contents = [m.content for m in seen[0]]
+    assert contents[1:3] == ["What is RAG?", "Retrieval-augmented generation."]
+    assert "why is it useful?" in contents[-1]
@@ -0,0 +1,81 @@
+def test_registry_routes_by_strategy(tmp_path):
+    from rag_pipeline.shards import ShardRegistry, registry_from_env
+
+    hashed = ShardRegistry(base="docs", strategy="hash", n_shards=4)
+    shard = hashed.shard_for({"source": "a.pdf", "page": 1})
+    assert shard == hashed.shard_for({"source": "a.pdf", "page": 9})  # whole document in one shard
+    assert hashed.shards() == ["docs_s0", "docs_s1", "docs_s2", "docs_s3"]
+    assert hashed.shards_for_query(sources=["a.pdf"]) == [shard]
+
+    tenants = ShardRegistry(base="docs", strategy="tenant")
+    assert tenants.shard_for({"tenant": "Acme Corp"}) == "docs_acme-corp"
+    assert tenants.shards_for_query(tenant="Acme Corp") == ["docs_acme-corp"]
+    assert tenants.shards_for_query(tenant="unknown") == []
+    # No tenant: the default tenant's shard, not every tenant's
+    assert tenants.shards_for_query() == []
+    assert tenants.shard_for({"page": 1}) == "docs_default"
+    assert tenants.shards_for_query() == ["docs_default"]
+
+    path = tmp_path / "shards.json"
+    tenants.save(path)
+    assert registry_from_env("ignored", path).routes == {"Acme Corp": "docs_acme-corp", "default": "docs_default"}
+
+
+def test_registry_file_rejects_a_different_env_layout(tmp_path, monkeypatch):
+    import pytest
+
+    from rag_pipeline.shards import ShardRegistry, registry_from_env
+
+    path = tmp_path / "shards.json"
+    ShardRegistry(base="docs", strategy="hash", n_shards=4).save(path)
+    monkeypatch.setenv("QDRANT_SHARD_STRATEGY", "hash")
+    monkeypatch.setenv("QDRANT_SHARDS", "4")
+    assert registry_from_env("docs", path).n_shards == 4
+
+    monkeypatch.setenv("QDRANT_SHARDS", "8")
+    with pytest.raises(ValueError, match="4 hash shards"):
+        registry_from_env("docs", path)
+    monkeypatch.setenv("QDRANT_SHARD_STRATEGY", "source")
+    with pytest.raises(ValueError, match="records strategy 'hash'"):
+        registry_from_env("docs", path)
+
+
+def test_pages_collection_override_is_per_shard(monkeypatch):
+    from rag_pipeline.pages import pages_collection_name
+
+    assert pages_collection_name("docs_s1", "docs") == "docs_s1_pages"
+    monkeypatch.setenv("QDRANT_PAGES_COLLECTION", "pages")
+    assert pages_collection_name("docs", "docs") == "pages"
+    assert pages_collection_name("docs_s0", "docs") == "pages_s0"
+    assert pages_collection_name("docs_s1", "docs") == "pages_s1"
+
+
+def test_sharded_ingest_and_parallel_merged_retrieval(monkeypatch, make_pdf, tmp_path):
+    from qdrant_client import QdrantClient
+
+    import rag_pipeline.ingest as ingest
+    import rag_pipeline.retriever as retriever
+    import rag_pipeline.shards as shards
+    from benchmarks.fakes import HashingEmbeddings
+
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(shards, "SHARD_REGISTRY_PATH", str(tmp_path / "shards.json"))
+    monkeypatch.setenv("QDRANT_SHARD_STRATEGY", "source")
+    for module in (ingest, retriever):
+        monkeypatch.setattr(module, "QdrantClient", lambda **_: client)
+        monkeypatch.setattr(module, "get_embeddings", HashingEmbeddings)
+        monkeypatch.setattr(module, "COLLECTION_NAME", "docs")
+    monkeypatch.setattr(ingest, "HYBRID_SEARCH", False)
+
+    for name, text in [("attention.pdf", "Attention heads weight tokens in parallel."), ("hnsw.pdf", "HNSW graphs index vectors.")]:
+        monkeypatch.setattr(ingest, "PDF_PATH", make_pdf([text], name=name))
+        ingest.ingest_pdf()
+
+    r = retriever.QdrantRetriever(top_k=2)
+    assert r.collections == ["docs_attention", "docs_hnsw"]
+
+    hits = r.retrieve("Attention heads weight tokens in parallel.")
+    assert hits[0]["source"].endswith("attention.pdf")
+    assert hits[0]["score"] > 0.99
+    scores = [h["score"] for h in hits]
+    assert scores == sorted(scores, reverse=True)
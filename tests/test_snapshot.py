@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+
+
+def test_int8_quantization_round_trip_error_is_bounded():
+    from rag_pipeline.snapshot import dequantize_int8, quantize_int8
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 64)).astype(np.float32)
+    vectors[3] = 0.0  # all-zero rows must not divide by zero
+    q, scales = quantize_int8(vectors)
+    assert q.dtype == np.int8 and scales.shape == (50,)
+
+    restored = dequantize_int8(q, scales)
+    assert np.all(np.abs(restored - vectors) <= scales[:, None] / 127.0 / 2 + 1e-6)
+    assert np.all(restored[3] == 0.0)
+
+
+def test_local_index_round_trip_with_arrow_payloads(tmp_path):
+    from rag_pipeline.embeddings import HashingBackend
+    from rag_pipeline.local_index import LocalIndexWriter, LocalVectorIndex
+    from rag_pipeline.snapshot import Snapshot, export_local, import_local, latest_snapshot, write_snapshot
+
+    backend = HashingBackend(dim=32)
+    texts = ["Attention heads weight tokens.", "HNSW graphs index vectors.", "BM25 scores terms."]
+    ids = [f"id-{i}" for i in range(len(texts))]
+    writer = LocalIndexWriter(tmp_path / "src", embedding=backend.info)
+    writer.upsert(ids, backend.embed_documents(texts), [{"text": t, "page": i} for i, t in enumerate(texts)])
+    writer.close()
+
+    ids_out, vectors, payloads, embedding = export_local(str(tmp_path / "src"))
+    path = write_snapshot(
+        tmp_path / "snaps", "docs", ids_out, vectors, payloads, {"backend": "local"},
+        embedding=embedding, payload_format="arrow",
+    )
+    assert latest_snapshot(tmp_path / "snaps", "docs") == path
+    assert sorted(p.name for p in path.iterdir()) == ["manifest.json", "payloads.arrow", "vectors.npy"]
+
+    snapshot = Snapshot(path)
+    assert snapshot.manifest["count"] == 3 and snapshot.embedding == backend.info
+    assert import_local(snapshot, str(tmp_path / "dst")) == 3
+
+    copy = LocalVectorIndex.load(tmp_path / "dst")
+    assert copy.ids == ids and copy.payloads == payloads and copy.meta["embedding"] == backend.info
+    assert np.allclose(copy.vectors, vectors)
+
+
+class _SerializedUpserts:
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def upsert(self, *args, **kwargs):
+        with self._lock:
+            self.batches += 1
+            return self._client.upsert(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def test_qdrant_export_int8_and_parallel_import(monkeypatch, make_pdf, tmp_path):
+    from qdrant_client import QdrantClient
+
+    import rag_pipeline.ingest as ingest
+    import rag_pipeline.snapshot as snapshot_mod
+    from benchmarks.fakes import HashingEmbeddings
+
+    source = QdrantClient(":memory:")
+    monkeypatch.setattr(ingest, "QdrantClient", lambda **_: source)
+    monkeypatch.setattr(ingest, "get_embeddings", HashingEmbeddings)
+    monkeypatch.setattr(ingest, "COLLECTION_NAME", "docs")
+    monkeypatch.setattr(ingest, "HYBRID_SEARCH", False)
+    monkeypatch.setattr(ingest, "RETRIEVER_BACKEND", "qdrant")
+    monkeypatch.setattr(ingest, "PDF_PATH", make_pdf([f"Page {i} talks about topic {i}." for i in range(6)]))
+    ingest.ingest_pdf()
+    before, _ = source.scroll("docs", limit=100, with_payload=True, with_vectors=True)
+
+    monkeypatch.setattr("qdrant_client.QdrantClient", lambda **_: source)
+    path = snapshot_mod.main(["export", "--collection", "docs", "--out", str(tmp_path), "--dtype", "int8"])
+    assert (path / "scales.npy").exists()
+
+    # Small batches, several in flight: the import must still land every point exactly once.
+    # Local-mode Qdrant isn't thread-safe (the server is), so the test client serializes writes.
+    target = _SerializedUpserts(QdrantClient(":memory:"))
+    monkeypatch.setattr(snapshot_mod, "SNAPSHOT_BATCH_SIZE", 2)
+    monkeypatch.setattr(snapshot_mod, "SNAPSHOT_WORKERS", 3)
+    monkeypatch.setattr("qdrant_client.QdrantClient", lambda **_: target)
+    assert snapshot_mod.main(["import", "--collection", "docs", "--out", str(tmp_path)]) == len(before)
+    assert target.batches > 1  # split into SNAPSHOT_BATCH_SIZE upserts
+
+    after = {str(p.id): p for p in target.scroll("docs", limit=100, with_payload=True, with_vectors=True)[0]}
+    assert set(after) == {str(p.id) for p in before}
+    for point in before:
+        copy = after[str(point.id)]
+        assert copy.payload == point.payload
+        assert np.allclose(copy.vector["text"], point.vector["text"], atol=0.01)
+
+
+def test_qdrant_import_builds_whole_page_centroids_from_unsorted_rows(monkeypatch, tmp_path):
+    from qdrant_client import QdrantClient
+
+    import rag_pipeline.ingest as ingest
+    from rag_pipeline.embeddings import HashingBackend
+    from rag_pipeline.pages import pages_collection_name
+    from rag_pipeline.snapshot import Snapshot, import_qdrant, write_snapshot
+
+    monkeypatch.setattr(ingest, "PAGE_FANOUT", 2)
+    backend = HashingBackend(dim=16)
+    # Point-id (scroll) order interleaves the pages: 0, 1, 0, 1, ...
+    payloads = [{"text": f"chunk {i} on page {i % 2}", "page": i % 2, "source": "a.pdf"} for i in range(6)]
+    ids = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(6)]
+    path = write_snapshot(
+        tmp_path, "docs", ids, backend.embed_documents([p["text"] for p in payloads]), payloads, {"backend": "qdrant"}
+    )
+
+    client = _SerializedUpserts(QdrantClient(":memory:"))
+    assert import_qdrant(Snapshot(path), client, "docs") == 6
+    pages, _ = client.scroll(pages_collection_name("docs"), limit=10, with_payload=True)
+    assert sorted((p.payload["page"], p.payload["n_chunks"]) for p in pages) == [(0, 3), (1, 3)]
@@ -0,0 +1,53 @@
+import os
+
+# Generous ceiling: importing the graph takes ~15 ms once the SDKs stay lazy, ~2 s if they don't.
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "400"))
+
+
+def test_parse_importtime_output():
+    from benchmarks.startup_bench import parse_importtime
+
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     posixpath\n"
+        "import time:      5000 |       5120 |   langgraph_pipeline.router\n"
+    )
+    records = parse_importtime(stderr)
+    assert [(r.module, r.self_us, r.cumulative_us, r.depth) for r in records] == [
+        ("posixpath", 120, 120, 2),
+        ("langgraph_pipeline.router", 5000, 5120, 1),
+    ]
+
+
+def test_graph_import_stays_lazy_and_within_budget():
+    from benchmarks.startup_bench import HEAVY_PACKAGES, measure, summarize
+
+    module = "langgraph_pipeline.graph"
+    runs = [measure(module) for _ in range(3)]
+    loaded = {r.module.split(".")[0] for r in runs[-1]}
+    assert not loaded & set(HEAVY_PACKAGES), f"heavy packages imported eagerly: {loaded & set(HEAVY_PACKAGES)}"
+    assert not {"rag_pipeline", "openweather_pipeline"} & loaded
+    assert summarize(module, runs)["import_ms"] < IMPORT_BUDGET_MS
+
+
+def test_lazy_callable_imports_on_first_call_and_is_patchable(monkeypatch):
+    import langgraph_pipeline.router as router
+    from common.lazy import LazyCallable
+
+    assert isinstance(router.ChatOpenAI, LazyCallable)
+    json_loads = LazyCallable("json", "loads")
+    assert json_loads("[1]") == [1] and "loaded" in repr(json_loads)
+
+    monkeypatch.setattr(router, "ChatOpenAI", lambda **kwargs: kwargs)
+    assert router.ChatOpenAI(model="m") == {"model": "m"}
+
+
+def test_env_helpers_treat_blank_as_unset(monkeypatch):
+    from common.config import env_flag, env_int
+
+    monkeypatch.setenv("RAG_TOP_K", "")
+    assert env_int("RAG_TOP_K", 4) == 4
+    monkeypatch.setenv("RAG_TOP_K", "7")
+    assert env_int("RAG_TOP_K", 4) == 7
+    monkeypatch.setenv("HYBRID_SEARCH", "Yes")
+    assert env_flag("HYBRID_SEARCH") is True
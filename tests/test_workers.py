@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+
+import pytest
+
+needs_fork = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="the worker pool pre-forks"
+)
+
+
+def test_shared_vector_table_is_memory_mapped_and_merges(tmp_path):
+    import numpy as np
+
+    from common.cache import SharedVectors
+
+    table = SharedVectors("embedding")
+    assert table.build([("a", [1.0, 0.0]), ("b", [0.0, 1.0]), ("odd", [1.0, 2.0, 3.0])], tmp_path) == 2
+    assert table.open(tmp_path) and isinstance(table._vectors, np.memmap)
+    assert table.get("b") == [0.0, 1.0] and table.get("c") is None
+
+    assert table.build([("c", [0.5, 0.5])], tmp_path, merge=True) == 3
+    table.open(tmp_path)
+    assert table.get("a") == [1.0, 0.0] and table.get("c") == [0.5, 0.5]
+
+
+def test_frozen_embeddings_are_served_from_the_shared_table(tmp_path):
+    from common import cache
+    from rag_pipeline.embeddings import HashingBackend, embed_query
+
+    class Counting(HashingBackend):
+        calls = 0
+
+        def embed_query(self, text):
+            Counting.calls += 1
+            return super().embed_query(text)
+
+    backend = Counting(dim=8)
+    vector = embed_query(backend, "what is rag")
+    assert cache.freeze_embeddings(tmp_path) == 1 and len(cache.EMBEDDINGS) == 0
+
+    assert embed_query(backend, "what is rag") == pytest.approx(vector)
+    assert Counting.calls == 1 and len(cache.EMBEDDINGS) == 0
+
+
+@needs_fork
+def test_pool_drains_queued_requests_and_replaces_dead_workers(monkeypatch):
+    from langgraph_pipeline import workers
+
+    def fake_run_agent(query, session_id=None, deadline_seconds=None):
+        if query == "crash":
+            os._exit(3)
+        return {"query": query, "route": "pdf", "pid": os.getpid()}
+
+    # Forked workers import run_agent after the fork, so they get this one
+    monkeypatch.setattr("langgraph_pipeline.graph.run_agent", fake_run_agent)
+    pool = workers.WorkerPool(2, start_method="fork")
+    first = pool.pids
+    assert pool.run("ok")["pid"] in first
+
+    crashed = pool.submit("crash")
+    with pytest.raises(workers.WorkerError, match="exited with code 3"):
+        crashed.result(timeout=10)
+    assert pool.run("after the crash")["route"] == "pdf"
+    assert len(set(first) & set(pool.pids)) == 1
+
+    queued = [pool.submit(f"q{i}") for i in range(20)]
+    pool.close()  # returns once every queued request ran
+    assert [f.result(timeout=0)["query"] for f in queued] == [f"q{i}" for i in range(20)]
+    with pytest.raises(workers.WorkerError):
+        pool.submit("too late")
+
+
+@needs_fork
+def test_pool_runs_the_agent_with_shared_embeddings(tmp_path):
+    from benchmarks.fakes import FakeProfile, install_fakes
+    from common import cache
+    from langgraph_pipeline.graph import run_agent
+    from langgraph_pipeline.workers import WorkerPool
+
+    with install_fakes(FakeProfile.zero()):
+        run_agent("What is the main topic of the document?", deadline_seconds=0)
+        with WorkerPool(2, start_method="fork", cache_dir=str(tmp_path)) as pool:
+            assert pool.preloaded["shared_embeddings"] == 1
+            results = [
+                f.result(timeout=30)
+                for f in [pool.submit("What is the main topic of the document?", 0), pool.submit("Weather in Pune?", 0)]
+            ]
+    assert [r["route"] for r in results] == ["pdf", "weather"]
+    assert results[0]["citations"][0]["page"] == 10
+    assert (tmp_path / "embedding.npy").exists() and len(cache.SHARED_EMBEDDINGS) == 1